@@ -0,0 +1,206 @@
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from views import json_default
+
+
+class BackupScheduler:
+    """
+    Backup nén (gzip) có giới hạn tần suất, chạy ở background thread
+
+    - Tối đa 1 backup mỗi `min_interval` giây, chỉ khi có thay đổi
+    - Backup đầu tiên của mỗi chuỗi là full snapshot, các backup sau là
+      delta (players thay đổi/bị xóa kể từ backup trước), cứ
+      `full_every` delta thì tạo full mới
+    - Tổng số file giữ lại không vượt quá max_backups (xóa nguyên chuỗi cũ)
+    - Danh sách backup nằm trong manifest.json, không cần glob thư mục
+    - restore(): dựng lại database từ full + các delta (tới `upto_seq`);
+      chạy tay: python backup.py [backup_dir] [output_file] [upto_seq]
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, backup_dir='backups', prefix='tft_tracker_backup',
+                 min_interval=3600, full_every=6):
+        self.backup_dir = Path(backup_dir)
+        self.prefix = prefix
+        self.min_interval = min_interval
+        self.full_every = full_every
+
+        # Thay đổi kể từ backup trước: key -> player (None = đã xóa)
+        self._changes = {}
+        # None = chưa có full snapshot trong phiên này -> lần sau phải full
+        self._deltas_since_full = None
+        self._last_backup = 0.0
+        self._seq = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backup')
+        self.manifest = self._load_manifest()
+        if self.manifest['backups']:
+            self._seq = self.manifest['backups'][-1]['seq']
+            self._last_backup = self.manifest['backups'][-1]['created_at']
+
+    def _load_manifest(self):
+        path = self.backup_dir / self.MANIFEST
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"⚠️ Không thể đọc manifest backup: {e}")
+        return {'backups': []}
+
+    # ========== THREAD GỌI ==========
+
+    def track(self, key, player):
+        """Ghi nhận player thay đổi (player=None nếu đã bị xóa)"""
+        self._changes[tuple(key)] = player
+
+    def due(self):
+        """Đã đến lúc backup chưa"""
+        if time.time() - self._last_backup < self.min_interval:
+            return False
+        return bool(self._changes) or self._deltas_since_full is None
+
+    def backup(self, data, max_backups=10):
+        """
+        Serialize phần cần backup rồi giao cho background thread nén + ghi
+
+        Returns: timestamp của backup
+        """
+        now = time.time()
+        timestamp = datetime.fromtimestamp(now).strftime('%Y%m%d_%H%M%S')
+        self._seq += 1
+
+        # Chuỗi full + delta không được dài hơn max_backups
+        full_every = min(self.full_every, max(int(max_backups), 1) - 1)
+        if self._deltas_since_full is None or self._deltas_since_full >= full_every:
+            kind = 'full'
+            payload = data
+            self._deltas_since_full = 0
+        else:
+            kind = 'delta'
+            payload = {
+                'put': [p for p in self._changes.values() if p is not None],
+                'del': [list(key) for key, p in self._changes.items() if p is None]
+            }
+            self._deltas_since_full += 1
+
+        # Serialize ngay để background thread không đọc dữ liệu đang bị sửa
+        raw = json.dumps(
+            payload, ensure_ascii=False, separators=(',', ':'), default=json_default
+        ).encode('utf-8')
+        entry = {
+            'seq': self._seq,
+            'type': kind,
+            'file': f'{self.prefix}_{timestamp}_{self._seq:05d}.{kind}.json.gz',
+            'created_at': now
+        }
+
+        self._changes = {}
+        self._last_backup = now
+        self._executor.submit(self._write, entry, raw, max_backups)
+        return timestamp
+
+    def close(self):
+        """Đợi các backup đang chờ ghi xong"""
+        self._executor.shutdown(wait=True)
+
+    # ========== BACKGROUND THREAD ==========
+
+    def _write(self, entry, raw, max_backups):
+        try:
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.backup_dir / entry['file'], 'wb', compresslevel=6) as f:
+                f.write(raw)
+            entry['size'] = (self.backup_dir / entry['file']).stat().st_size
+
+            self.manifest['backups'].append(entry)
+            self._prune(max(int(max_backups), 1))
+            self._save_manifest()
+        except Exception as e:
+            print(f"❌ Lỗi tạo backup: {e}")
+
+    def _prune(self, max_backups):
+        """Xóa chuỗi backup (full + các delta của nó) cũ nhất khi vượt max_backups"""
+        backups = self.manifest['backups']
+        while True:
+            # Chuỗi cũ nhất kết thúc ngay trước full snapshot kế tiếp
+            next_full = next(
+                (i for i, b in enumerate(backups) if i > 0 and b['type'] == 'full'),
+                None
+            )
+            if next_full is None or len(backups) <= max_backups:
+                break
+            for old in backups[:next_full]:
+                try:
+                    (self.backup_dir / old['file']).unlink()
+                except FileNotFoundError:
+                    pass
+            del backups[:next_full]
+
+    def _save_manifest(self):
+        path = self.backup_dir / self.MANIFEST
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    # ========== RESTORE ==========
+
+    def restore(self, upto_seq=None, key_fn=None):
+        """
+        Dựng lại database từ full snapshot gần nhất + các delta sau nó
+
+        `key_fn(player)` tạo khóa giống khóa dùng trong track()
+        """
+        key_fn = key_fn or (lambda p: (p['discord_id'], p['riot_id'].lower()))
+        backups = [
+            b for b in self._load_manifest()['backups']
+            if upto_seq is None or b['seq'] <= upto_seq
+        ]
+        start = next((i for i in range(len(backups) - 1, -1, -1) if backups[i]['type'] == 'full'), None)
+        if start is None:
+            return None
+
+        def read(entry):
+            with gzip.open(self.backup_dir / entry['file'], 'rb') as f:
+                return json.loads(f.read())
+
+        data = read(backups[start])
+        players = {key_fn(p): p for p in data.get('players', [])}
+        for entry in backups[start + 1:]:
+            delta = read(entry)
+            for key in delta.get('del', []):
+                players.pop(tuple(key), None)
+            for player in delta.get('put', []):
+                players[key_fn(player)] = player
+
+        data['players'] = list(players.values())
+        return data
+
+
+if __name__ == '__main__':
+    # python backup.py [backup_dir] [output_file] [upto_seq]
+    # Ghi database đã dựng lại ra output_file (layout của database.Database);
+    # dừng bot rồi thay file database + xóa .journal của nó bằng file này
+    import sys
+
+    backup_dir = sys.argv[1] if len(sys.argv) > 1 else 'backups'
+    output_file = sys.argv[2] if len(sys.argv) > 2 else 'tft_tracker.restored.json'
+    upto_seq = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    scheduler = BackupScheduler(backup_dir)
+    restored = scheduler.restore(upto_seq)
+    scheduler.close()
+    if restored is None:
+        print(f"❌ Không có full backup nào trong {backup_dir}")
+        sys.exit(1)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(restored, f, ensure_ascii=False, indent=2)
+    print(f"✅ Đã khôi phục {len(restored['players'])} players vào {output_file}")
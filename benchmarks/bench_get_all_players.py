@@ -0,0 +1,72 @@
+"""
+Benchmark database.Database.get_all_players ở 50k players:
+deepcopy (cũ) vs view chỉ-đọc (mới)
+
+Chạy: python benchmarks/bench_get_all_players.py
+"""
+import copy
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from player_record import Player
+
+PLAYERS = 50_000
+ROUNDS = 5
+
+
+def make_player(i):
+    return {
+        'discord_id': str(100000 + i // 3),
+        'discord_name': f'user{i}',
+        'riot_id': f'Player{i}#VN{i % 7}',
+        'region': 'vn',
+        'channel_id': str(900000 + i % 50),
+        'verified': True,
+        'added_at': '2026-10-01T12:00:00',
+        'last_checked': '2026-10-16T12:00:00',
+        'last_match_id': f'VN2_{i}',
+        'settings': {'auto_notify': True, 'mention_on_notify': True, 'include_ai': False},
+        'stats': {'total_notified': i % 40, 'last_notified': '2026-10-16T11:00:00'}
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.json'), backup_dir=os.path.join(tmp, 'backups'))
+        raw_players = [make_player(i) for i in range(PLAYERS)]
+        db.data['players'] = [Player.from_dict(p) for p in raw_players]
+
+        def old_getter():
+            # Bản cũ: list dict + deepcopy mỗi lần gọi
+            return copy.deepcopy(raw_players)
+
+        def iterate(players):
+            return sum(1 for p in players if p['settings']['auto_notify'] and p['riot_id'])
+
+        before_call = timed(old_getter)
+        after_call = timed(db.get_all_players)
+        before_iter = timed(lambda: iterate(old_getter()))
+        after_iter = timed(lambda: iterate(db.get_all_players()))
+
+        print(f"get_all_players() với {PLAYERS} players (ms/lần, trung bình {ROUNDS} lần)")
+        print(f"{'':<22} | {'deepcopy (cũ)':>14} | {'view (mới)':>11}")
+        print('-' * 53)
+        print(f"{'chỉ gọi hàm':<22} | {before_call:>14.2f} | {after_call:>11.4f}")
+        print(f"{'gọi + duyệt toàn bộ':<22} | {before_iter:>14.2f} | {after_iter:>11.2f}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
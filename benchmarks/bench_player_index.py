@@ -0,0 +1,96 @@
+"""
+Benchmark tra cứu/cập nhật player: quét tuyến tính (cũ) vs main.Database (PlayerIndex)
+
+Đo đúng đường gọi thật trên Database đã nạp sẵn n players: get_player() và
+update_last_match() (tra index + mark_notified + đưa record vào journal).
+Database chạy trong thư mục tạm (snapshot + journal + log của main ở đó).
+
+Chạy: python benchmarks/bench_player_index.py
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIZES = [100, 1_000, 10_000, 100_000]
+LOOKUPS = 2_000
+
+
+def make_players(n):
+    return [
+        {
+            'discord_id': str(100000 + i % (n // 3 + 1)),
+            'discord_name': f'user{i}',
+            'riot_id': f'Player{i}#VN{i % 7}',
+            'region': 'vn',
+            'channel_id': '1',
+            'verified': True,
+            'added_at': '2024-01-01T00:00:00',
+            'last_checked': None,
+            'last_match_id': None,
+            'settings': {'auto_notify': True, 'mention_on_notify': True, 'include_ai': False},
+            'stats': {'total_notified': 0, 'last_notified': None}
+        }
+        for i in range(n)
+    ]
+
+
+def linear_get(players, discord_id, riot_id):
+    for player in players:
+        if player['discord_id'] == discord_id and player['riot_id'].lower() == riot_id.lower():
+            return player
+    return None
+
+
+def bench(fn, targets):
+    start = time.perf_counter()
+    for discord_id, riot_id in targets:
+        fn(discord_id, riot_id)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(targets) * 1e6
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix='bench_player_index_')
+    os.chdir(workdir)
+    try:
+        run(workdir)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run(workdir):
+    # Import sau khi chdir: main ghi tft_bot.log vào thư mục hiện tại
+    from main import Database
+
+    print(f"{'players':>9} | {'linear get (us)':>16} | {'get_player (us)':>16} | {'update_last_match (us)':>23}")
+    print('-' * 74)
+    for n in SIZES:
+        players = make_players(n)
+        db_file = os.path.join(workdir, f'players_{n}.json')
+        with open(db_file, 'w', encoding='utf-8') as f:
+            json.dump(players, f)
+        db = Database(db_file, flush_interval=0.5)
+
+        step = max(n // LOOKUPS, 1)
+        targets = [(p['discord_id'], p['riot_id'].upper()) for p in players[::step]][:LOOKUPS]
+
+        # Quét tuyến tính chỉ đo 200 mẫu trải đều để không chạy quá lâu
+        linear_targets = targets[::len(targets) // 200 or 1][:200]
+        linear_us = bench(lambda d, r: linear_get(players, d, r), linear_targets)
+        get_us = bench(db.get_player, targets)
+        update_us = bench(
+            lambda d, r: db.update_last_match(d, r, 'VN2_1', '2024-01-01T00:00:00'), targets
+        )
+        db.close()
+        print(f"{n:>9} | {linear_us:>16.2f} | {get_us:>16.3f} | {update_us:>23.3f}")
+
+
+if __name__ == '__main__':
+    main()
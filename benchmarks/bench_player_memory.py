@@ -0,0 +1,72 @@
+"""
+Benchmark bộ nhớ cho 100k players: dict lồng nhau (cũ) vs Player __slots__
+
+Chạy: python benchmarks/bench_player_memory.py
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from player_record import Player
+
+PLAYERS = 100_000
+
+
+def make_player(i):
+    return {
+        'discord_id': str(100000 + i // 3),
+        'discord_name': f'user{i}',
+        'riot_id': f'Player{i}#VN{i % 7}',
+        'region': ['vn', 'kr', 'euw', 'na'][i % 4],
+        'channel_id': str(900000 + i % 50),
+        'verified': True,
+        'added_at': f'2026-10-01T12:{i % 60:02d}:{i % 59:02d}.{i % 999999:06d}',
+        'last_checked': f'2026-10-16T12:{i % 60:02d}:00.{i % 999983:06d}',
+        'last_match_id': f'VN2_{1000000 + i}',
+        'settings': {'auto_notify': True, 'mention_on_notify': i % 2 == 0, 'include_ai': False},
+        'stats': {'total_notified': i % 40, 'last_notified': '2026-10-16T11:00:00'}
+    }
+
+
+def measure(build):
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, current, elapsed
+
+
+def main():
+    # Giống lúc load từ file JSON: mỗi chuỗi là object riêng
+    raw = json.dumps([make_player(i) for i in range(PLAYERS)])
+
+    dicts, dict_bytes, dict_time = measure(lambda: json.loads(raw))
+    del dicts
+    players, player_bytes, player_time = measure(
+        lambda: [Player.from_dict(p) for p in json.loads(raw)]
+    )
+
+    # Kiểm tra chuyển đổi không mất dữ liệu
+    assert [p.to_dict() for p in players] == json.loads(raw)
+
+    print(f"Bộ nhớ cho {PLAYERS} players")
+    print(f"{'':<18} | {'tổng (MB)':>10} | {'bytes/player':>12} | {'load (s)':>8}")
+    print('-' * 58)
+    print(f"{'dict (cũ)':<18} | {dict_bytes / 1e6:>10.1f} | {dict_bytes / PLAYERS:>12.0f} | {dict_time:>8.2f}")
+    print(f"{'Player (__slots__)':<18} | {player_bytes / 1e6:>10.1f} | {player_bytes / PLAYERS:>12.0f} | {player_time:>8.2f}")
+    print(f"Giảm {100 - player_bytes * 100 / dict_bytes:.0f}% bộ nhớ mỗi player")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark parse rank từ trang tracker.gg: chuỗi regex cũ vs rank_extractor
+
+Các trang mẫu nằm trong benchmarks/fixtures/*.html; phần <!-- padding -->
+và <!-- matches --> được lấp đầy để trang có kích thước như trang thật.
+
+Chạy: python benchmarks/bench_rank_extractor.py
+"""
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rank_extractor import extract_rank, format_rank
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+PAGE_SIZE = 400_000
+ROUNDS = 200
+
+
+def legacy_parse(html):
+    """_parse_tracker_html cũ (giữ nguyên để so sánh)"""
+    rank_patterns = [
+        r'<span[^>]*class="[^"]*rank[^"]*"[^>]*>([^<]+)</span>',
+        r'<div[^>]*class="[^"]*rating[^"]*"[^>]*>([^<]+)</div>',
+        r'<div[^>]*class="[^"]*stat__value[^"]*"[^>]*>([^<]+)</div>',
+        r'Rank[^>]*>([^<]+)<',
+        r'Tier[^>]*>([^<]+)<'
+    ]
+    for pattern in rank_patterns:
+        match = re.search(pattern, html, re.IGNORECASE)
+        if match:
+            rank_text = match.group(1).strip()
+            rank_text = re.sub(r'<[^>]+>', '', rank_text)
+            rank_text = rank_text.replace('&nbsp;', ' ').strip()
+            rank_map = {
+                'iron': 'Sắt', 'bronze': 'Đồng', 'silver': 'Bạc',
+                'gold': 'Vàng', 'platinum': 'Bạch Kim',
+                'diamond': 'Kim Cương', 'master': 'Cao Thủ',
+                'grandmaster': 'Đại Cao Thủ', 'challenger': 'Thách Đấu'
+            }
+            for eng, viet in rank_map.items():
+                if eng in rank_text.lower():
+                    tier_match = re.search(r'[IVXLCDM]+|\d+', rank_text)
+                    tier = tier_match.group() if tier_match else ''
+                    return f'{viet} {tier}'
+    return 'Chưa xếp hạng'
+
+
+def pad_page(template):
+    """Lấp trang mẫu tới khoảng PAGE_SIZE ký tự (CSS/script inline + lịch sử trận)"""
+    style = '<style>' + '.trn-card__content{display:flex;padding:8px 16px}' * 40 + '</style>\n'
+    script = '<script>window.__INITIAL_STATE__={"matches":[' + '{"placement":4,"units":9},' * 60 + ']}</script>\n'
+    row = (
+        '<div class="match-row"><div class="match-row__placement">4th</div>'
+        '<div class="match-row__lobby"><span>Avg. Gold II</span></div>'
+        '<div class="match-row__units">Aatrox Kaisa Warwick JarvanIV Nasus Azir</div></div>\n'
+    )
+    head = (style + script) * max(1, PAGE_SIZE // 2 // len(style + script))
+    rows = row * max(1, PAGE_SIZE // 2 // len(row))
+    return template.replace('<!-- padding -->', head).replace('<!-- matches -->', rows)
+
+
+def bench(fn, html):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = fn(html)
+    return (time.perf_counter() - start) / ROUNDS * 1e3, result
+
+
+def main():
+    paths = sorted(glob.glob(os.path.join(FIXTURES, '*.html')))
+    print(f"{'page':<24}{'size':>10}{'legacy ms':>12}{'new ms':>10}{'speedup':>9}  result (legacy -> new)")
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = pad_page(f.read())
+
+        legacy_ms, legacy = bench(legacy_parse, html)
+        new_ms, new = bench(extract_rank, html)
+        new_text = format_rank(new) if new else 'Chưa xếp hạng'
+        print(
+            f"{os.path.basename(path):<24}{len(html):>10,}{legacy_ms:>12.3f}{new_ms:>10.3f}"
+            f"{legacy_ms / new_ms:>8.1f}x  {legacy!r} -> {new_text!r}"
+        )
+
+
+if __name__ == '__main__':
+    main()
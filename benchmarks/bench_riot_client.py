@@ -0,0 +1,64 @@
+"""
+Benchmark RiotClient với stub server: bỏ qua header rate limit (gọi tới khi bị 429)
+vs RiotRateLimiter (tự chờ theo X-App-Rate-Limit / X-Method-Rate-Limit)
+
+Stub chạy trong cùng process (benchmarks/riot_stub_server.py), không cần API key.
+
+Chạy: python benchmarks/bench_riot_client.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from http_client import http_client
+from riot_client import RiotClient
+from riot_stub_server import make_app
+
+PORT = 8091
+PLAYERS = 30
+
+
+async def run(label, header_driven):
+    app = make_app()
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', PORT).start()
+
+    client = RiotClient(
+        'RGAPI-bench',
+        base_url=f'http://127.0.0.1:{PORT}/{{host}}',
+        app_limits='20:1,100:120' if header_driven else '1000:1',
+        max_retries=10
+    )
+    if not header_driven:
+        # Không đọc header: chỉ biết bị giới hạn khi đã nhận 429
+        client.limiter.update = lambda *args: None
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        client.get_match_history(f'Player{i}#VN2', 'vn', limit=1) for i in range(PLAYERS)
+    ))
+    elapsed = time.perf_counter() - started
+
+    stats = app['stats']
+    ok = sum(1 for matches in results if matches)
+    print(f'{label:<22} {elapsed:6.2f}s  {ok}/{PLAYERS} ok  '
+          f'requests={stats["requests"]:<4} 429={stats["rate_limited"]}')
+
+    await http_client.close()
+    await runner.cleanup()
+
+
+async def main():
+    print(f'{PLAYERS} players x (account + match ids + match), giới hạn app 20:1,100:120 mỗi routing host')
+    await run('bỏ qua header', header_driven=False)
+    await run('theo header', header_driven=True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
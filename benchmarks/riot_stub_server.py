@@ -0,0 +1,151 @@
+"""
+Stub server giả lập Riot API (account-v1, tft-league-v1, tft-match-v1)
+
+Trả về header X-App-Rate-Limit / X-Method-Rate-Limit (+ -Count) như API thật,
+vượt giới hạn thì trả 429 + Retry-After + X-Rate-Limit-Type.
+Routing host nằm ở path: RiotClient(base_url='http://127.0.0.1:8090/{host}').
+
+Chạy: python benchmarks/riot_stub_server.py [port]
+"""
+import hashlib
+import math
+import sys
+import time
+from collections import deque
+
+from aiohttp import web
+
+APP_LIMITS = '20:1,100:120'
+METHOD_LIMITS = {
+    'account': '1000:60',
+    'league': '270:60',
+    'ids': '600:10',
+    'match': '250:10'
+}
+
+
+class _Limit:
+    """Đếm request theo các cửa sổ 'count:seconds' (sliding log)"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.windows = [
+            (int(count), int(seconds), deque())
+            for count, seconds in (part.split(':') for part in spec.split(','))
+        ]
+
+    def hit(self, now):
+        """Ghi nhận 1 request; trả về số giây phải chờ nếu vượt giới hạn"""
+        retry_after = 0
+        for count, seconds, hits in self.windows:
+            while hits and hits[0] <= now - seconds:
+                hits.popleft()
+            if len(hits) >= count:
+                retry_after = max(retry_after, hits[0] + seconds - now)
+        if retry_after:
+            return retry_after
+        for _, _, hits in self.windows:
+            hits.append(now)
+        return 0
+
+    def counts(self):
+        return ','.join(f'{len(hits)}:{seconds}' for _, seconds, hits in self.windows)
+
+
+def _seed(value):
+    return int(hashlib.md5(value.encode()).hexdigest()[:8], 16)
+
+
+def _match(match_id, puuid):
+    seed = _seed(match_id)
+    return {
+        'metadata': {'match_id': match_id, 'participants': [puuid]},
+        'info': {
+            'game_datetime': int(time.time() * 1000) - seed % 86_400_000,
+            'game_length': 1200 + seed % 600,
+            'participants': [{
+                'puuid': puuid,
+                'placement': 1 + seed % 8,
+                'level': 7 + seed % 4,
+                'traits': [
+                    {'name': 'TFT9_Darkin', 'num_units': 3, 'style': 2, 'tier_current': 1},
+                    {'name': 'TFT9_Shurima', 'num_units': 4, 'style': 1, 'tier_current': 2}
+                ],
+                'units': [
+                    {'character_id': 'TFT9_Aatrox', 'tier': 2, 'itemNames': []},
+                    {'character_id': 'TFT9_Azir', 'tier': 1, 'itemNames': []}
+                ]
+            }]
+        }
+    }
+
+
+def make_app(app_limits=APP_LIMITS, method_limits=None):
+    """Tạo aiohttp app; giới hạn tính riêng cho từng routing host như API thật"""
+    method_limits = dict(METHOD_LIMITS, **(method_limits or {}))
+    limits = {}
+    stats = {'requests': 0, 'rate_limited': 0}
+
+    def limited(method, fetch):
+        async def handler(request):
+            host = request.match_info['host']
+            app_limit = limits.setdefault(('app', host), _Limit(app_limits))
+            method_limit = limits.setdefault((method, host), _Limit(method_limits[method]))
+            stats['requests'] += 1
+            now = time.monotonic()
+
+            retry_after, limit_type = app_limit.hit(now), 'application'
+            if not retry_after:
+                retry_after, limit_type = method_limit.hit(now), 'method'
+            headers = {
+                'X-App-Rate-Limit': app_limit.spec,
+                'X-App-Rate-Limit-Count': app_limit.counts(),
+                'X-Method-Rate-Limit': method_limit.spec,
+                'X-Method-Rate-Limit-Count': method_limit.counts()
+            }
+            if retry_after:
+                stats['rate_limited'] += 1
+                headers['Retry-After'] = str(math.ceil(retry_after))
+                headers['X-Rate-Limit-Type'] = limit_type
+                return web.json_response({'status': {'status_code': 429}}, status=429, headers=headers)
+            return web.json_response(fetch(request.match_info, request.query), headers=headers)
+        return handler
+
+    def account(info, query):
+        name, tag = info['name'], info['tag']
+        return {'puuid': f'puuid{_seed(name + tag)}', 'gameName': name, 'tagLine': tag}
+
+    def league(info, query):
+        seed = _seed(info['puuid'])
+        tiers = ['IRON', 'BRONZE', 'SILVER', 'GOLD', 'PLATINUM', 'EMERALD', 'DIAMOND', 'MASTER']
+        return [{
+            'queueType': 'RANKED_TFT',
+            'tier': tiers[seed % len(tiers)],
+            'rank': ['I', 'II', 'III', 'IV'][seed % 4],
+            'leaguePoints': seed % 100,
+            'wins': seed % 50,
+            'losses': seed % 40
+        }]
+
+    def ids(info, query):
+        # Mỗi phút mỗi tài khoản có thêm 1 match mới; match_id chứa puuid để match() dựng lại
+        newest = int(time.time() // 60)
+        count = int(query.get('count', 20))
+        return [f"VN2_{info['puuid']}_{newest - i}" for i in range(count)]
+
+    def match(info, query):
+        match_id = info['match_id']
+        return _match(match_id, match_id.split('_')[1])
+
+    app = web.Application()
+    app['stats'] = stats
+    app.router.add_get('/{host}/riot/account/v1/accounts/by-riot-id/{name}/{tag}', limited('account', account))
+    app.router.add_get('/{host}/tft/league/v1/by-puuid/{puuid}', limited('league', league))
+    app.router.add_get('/{host}/tft/match/v1/matches/by-puuid/{puuid}/ids', limited('ids', ids))
+    app.router.add_get('/{host}/tft/match/v1/matches/{match_id}', limited('match', match))
+    return app
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8090
+    web.run_app(make_app(), port=port)
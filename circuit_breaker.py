@@ -0,0 +1,172 @@
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from config import Config
+from rate_limit import resolve_host
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Status upstream coi là lỗi (quá tải / sập), 404 vẫn là trả lời bình thường
+FAILURE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value, now=None):
+    """Header Retry-After (số giây hoặc HTTP date) -> số giây, None nếu không đọc được"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker cho 1 upstream
+
+    - closed: cho request đi, đếm lỗi liên tiếp; đủ `failure_threshold` -> open
+    - open: chặn mọi request trong thời gian backoff (lũy thừa 2, có jitter,
+      tối đa `max_backoff`), hoặc theo Retry-After nếu upstream gửi
+    - half_open: hết backoff, cho đúng 1 request thử; thành công -> closed,
+      lỗi -> open lại với backoff dài hơn
+    """
+
+    def __init__(self, name, failure_threshold=5, base_backoff=30, max_backoff=900,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._level = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    def allow(self):
+        """Request có được gửi không (half_open chỉ cho 1 request thử)"""
+        if self.state == OPEN:
+            if self.clock() < self._open_until:
+                return False
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def release(self):
+        """Request thử ở half_open bị hủy giữa chừng -> cho request khác thử"""
+        if self.state == HALF_OPEN:
+            self._probing = False
+
+    @contextmanager
+    def guard(self):
+        """
+        Bọc phần gửi request: timeout / lỗi kết nối tính là lỗi,
+        bị cancel thì trả lại lượt thử. Status HTTP ghi qua record_response().
+        """
+        try:
+            yield self
+        except asyncio.CancelledError:
+            self.release()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+
+    def retry_in(self):
+        """Số giây tới khi được thử lại (0 nếu đang cho request đi)"""
+        if self.state == OPEN:
+            return max(0.0, self._open_until - self.clock())
+        return 0.0
+
+    def record_success(self):
+        if self.state != CLOSED:
+            print(f"✅ Circuit {self.name}: đã hoạt động lại")
+        self.state = CLOSED
+        self.failures = 0
+        self._level = 0
+        self._probing = False
+
+    def record_failure(self, retry_after=None):
+        """Ghi nhận lỗi (timeout, 429, 5xx); `retry_after` lấy từ header nếu có"""
+        self.failures += 1
+        if self.state == CLOSED and self.failures < self.failure_threshold and retry_after is None:
+            return
+
+        backoff = min(self.max_backoff, self.base_backoff * (2 ** self._level))
+        delay = random.uniform(backoff / 2, backoff)
+        if retry_after is not None:
+            delay = max(delay, retry_after) if self.state != CLOSED else retry_after
+        self._level += 1
+        self._open_until = self.clock() + delay
+        self._probing = False
+        if self.state != OPEN:
+            self.opened += 1
+            print(f"⚠️ Circuit {self.name}: tạm ngưng gọi trong {delay:.0f}s sau {self.failures} lỗi")
+        self.state = OPEN
+
+    def record_response(self, status, headers=None):
+        """Ghi nhận theo HTTP status; trả về True nếu status bị coi là lỗi"""
+        if status in FAILURE_STATUSES:
+            retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+            self.record_failure(retry_after)
+            return True
+        self.record_success()
+        return False
+
+    def to_dict(self):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opened': self.opened,
+            'retry_in': round(self.retry_in(), 1)
+        }
+
+
+class CircuitBreakers:
+    """1 CircuitBreaker cho mỗi upstream host (khớp theo resolve_host)"""
+
+    def __init__(self, names=(), **options):
+        self.names = tuple(names)
+        self.options = options
+        self._breakers = {}
+
+    def get(self, url_or_host):
+        name = resolve_host(url_or_host, self.names)
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **self.options)
+            self._breakers[name] = breaker
+        return breaker
+
+    def retry_in(self, hosts):
+        """Số giây phải chờ nếu 1 trong các host đang bị chặn, 0 nếu đều gọi được"""
+        return max((self.get(host).retry_in() for host in hosts), default=0.0)
+
+    def stats(self):
+        return {name: breaker.to_dict() for name, breaker in self._breakers.items()}
+
+
+# Breaker dùng chung cho mọi client gọi ra ngoài
+breakers = CircuitBreakers(
+    ('tracker.gg', 'op.gg'),
+    failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+    base_backoff=Config.BREAKER_BASE_BACKOFF,
+    max_backoff=Config.BREAKER_MAX_BACKOFF
+)
@@ -15,14 +15,70 @@ class Config:
     RIOT_API_KEY = os.getenv('RIOT_API_KEY', '')
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
     
-    # Database
-    DB_FILE = os.getenv('DB_FILE', 'tft_tracker.db')
+    # Riot API (dùng khi có RIOT_API_KEY, tracker.gg làm dự phòng)
+    RIOT_API_BASE_URL = os.getenv('RIOT_API_BASE_URL', 'https://{host}.api.riotgames.com')  # {host}: vn2, sea, asia, ...
+    RIOT_APP_RATE_LIMIT = os.getenv('RIOT_APP_RATE_LIMIT', '20:1,100:120')  # dev key; header X-App-Rate-Limit ghi đè
+    
+    # Database: mặc định JSON + journal (file players của bot từ trước tới nay);
+    # đặt DB_FILE=*.db (đuôi khác .json) để dùng SQLite.
+    # Không trỏ vào tft_tracker.json: đó là file layout dict của database.Database
+    DB_FILE = os.getenv('DB_FILE', 'tft_players.json')
     BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+    BACKUP_MIN_INTERVAL = int(os.getenv('BACKUP_MIN_INTERVAL', '60'))  # minutes
+    DB_FLUSH_INTERVAL = float(os.getenv('DB_FLUSH_INTERVAL', '1.0'))  # seconds
+    
+    # Match store (match đã kết thúc, lưu trên đĩa)
+    MATCH_DB_FILE = os.getenv('MATCH_DB_FILE', 'tft_matches.db')
+    MATCH_MEMORY_ENTRIES = int(os.getenv('MATCH_MEMORY_ENTRIES', '512'))  # match giữ trong bộ nhớ
+    MATCH_RETENTION_DAYS = int(os.getenv('MATCH_RETENTION_DAYS', '90'))
+    MATCH_MAX_PER_PLAYER = int(os.getenv('MATCH_MAX_PER_PLAYER', '200'))
     
     # Settings
     AUTO_CHECK_INTERVAL = int(os.getenv('AUTO_CHECK_INTERVAL', '5'))  # minutes
     VERIFICATION_TIMEOUT = int(os.getenv('VERIFICATION_TIMEOUT', '30'))  # minutes
     
+    # Poll / rate limit
+    POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', '8'))  # số player kiểm tra song song
+    POLL_TICK = float(os.getenv('POLL_TICK', '15'))  # seconds, chu kỳ lấy player đến hạn
+    POLL_ACTIVE_INTERVAL = int(os.getenv('POLL_ACTIVE_INTERVAL', '120'))  # seconds, player đang chơi
+    POLL_COOLDOWN = int(os.getenv('POLL_COOLDOWN', '1500'))  # seconds, nghỉ sau 1 trận mới
+    POLL_ACTIVE_WINDOW = int(os.getenv('POLL_ACTIVE_WINDOW', '7200'))  # seconds, còn tính là đang chơi
+    POLL_MAX_INTERVAL = int(os.getenv('POLL_MAX_INTERVAL', '21600'))  # seconds, player lâu không chơi
+    TRACKER_RATE_LIMIT = float(os.getenv('TRACKER_RATE_LIMIT', '2'))  # requests/giây tới tracker.gg
+    OPGG_RATE_LIMIT = float(os.getenv('OPGG_RATE_LIMIT', '2'))  # requests/giây tới op.gg
+    TRACKER_HEDGE_PERCENTILE = float(os.getenv('TRACKER_HEDGE_PERCENTILE', '95'))  # bắn request dự phòng sau p95 độ trễ
+    TRACKER_HEDGE_MIN_DELAY = float(os.getenv('TRACKER_HEDGE_MIN_DELAY', '0.5'))  # seconds
+    TRACKER_CHUNK_SIZE = int(os.getenv('TRACKER_CHUNK_SIZE', '16384'))  # bytes mỗi lần đọc trang tracker.gg
+    TRACKER_MAX_BYTES = int(os.getenv('TRACKER_MAX_BYTES', str(512 * 1024)))  # đọc tối đa, dừng dù chưa thấy rank
+    
+    # Hàng đợi thông báo Discord
+    NOTIFY_WORKERS = int(os.getenv('NOTIFY_WORKERS', '4'))  # số worker gửi song song
+    NOTIFY_QUEUE_SIZE = int(os.getenv('NOTIFY_QUEUE_SIZE', '1000'))  # đầy thì poller chờ
+    NOTIFY_MAX_RETRIES = int(os.getenv('NOTIFY_MAX_RETRIES', '3'))
+    NOTIFY_BATCH_WINDOW = float(os.getenv('NOTIFY_BATCH_WINDOW', '1.0'))  # seconds, gộp thông báo cùng channel
+    RANK_REFRESH_DELAY = float(os.getenv('RANK_REFRESH_DELAY', '20'))  # seconds sau trận mới mới lấy lại rank
+    RANK_REFRESH_WORKERS = int(os.getenv('RANK_REFRESH_WORKERS', '2'))
+    DISCORD_CHANNEL_RATE = int(os.getenv('DISCORD_CHANNEL_RATE', '5'))  # tin / 5 giây mỗi channel
+    DISCORD_GLOBAL_RATE = float(os.getenv('DISCORD_GLOBAL_RATE', '50'))  # requests/giây toàn bot
+    
+    # HTTP connection pool (dùng chung cho mọi client)
+    HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '100'))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '10'))
+    HTTP_DNS_TTL = int(os.getenv('HTTP_DNS_TTL', '300'))  # seconds
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '60'))  # seconds
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '15'))  # seconds
+    
+    # Circuit breaker cho từng upstream
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))  # lỗi liên tiếp trước khi ngắt
+    BREAKER_BASE_BACKOFF = float(os.getenv('BREAKER_BASE_BACKOFF', '30'))  # seconds
+    BREAKER_MAX_BACKOFF = float(os.getenv('BREAKER_MAX_BACKOFF', '900'))  # seconds
+    
+    # Response cache
+    CACHE_TTL = int(os.getenv('CACHE_TTL', '300'))  # seconds
+    CACHE_NEGATIVE_TTL = int(os.getenv('CACHE_NEGATIVE_TTL', '60'))  # seconds, not found / timeout
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '2048'))
+    CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', str(4 * 1024 * 1024)))
+    
     # Regions
     SUPPORTED_REGIONS = {
         'vn': 'Vietnam',
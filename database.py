@@ -1,24 +1,28 @@
-import json
 import os
 from datetime import datetime, timedelta
-from pathlib import Path
-import copy
+
+from backup import BackupScheduler
+from config import Config
+from journal import JournalStore
+from player_record import Player, now_epoch
+from views import freeze
 
 class Database:
     """Quản lý database JSON đơn giản"""
     
-    def __init__(self, db_file='tft_tracker.json'):
+    def __init__(self, db_file='tft_tracker.json', flush_interval=1.0,
+                 backup_dir=Config.BACKUP_DIR, backup_interval=Config.BACKUP_MIN_INTERVAL * 60):
         self.file_path = db_file
+        self.journal = JournalStore(db_file, flush_interval=flush_interval)
+        self.backups = BackupScheduler(backup_dir, min_interval=backup_interval)
         self.data = self._load_database()
+        self._replay_journal()
         
     def _load_database(self):
-        """Load database từ file"""
-        if os.path.exists(self.file_path):
-            try:
-                with open(self.file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                print(f"⚠️ Không thể đọc file {self.file_path}, tạo mới")
+        """Load database từ snapshot"""
+        data = self.journal.load_snapshot(None)
+        if isinstance(data, dict):
+            return data
         
         # Cấu trúc database mặc định
         return {
@@ -36,59 +40,90 @@ class Database:
             }
         }
     
-    def _save_database(self):
-        """Lưu database vào file"""
+    @staticmethod
+    def _player_key(discord_id, riot_id):
+        return (discord_id, riot_id.lower())
+    
+    def _replay_journal(self):
+        """Áp dụng các thay đổi trong journal lên snapshot, chuyển sang Player"""
+        players = {
+            self._player_key(p['discord_id'], p['riot_id']): Player.from_dict(p)
+            for p in self.data['players']
+        }
+        
+        for record in self.journal.replay():
+            if record.get('op') == 'put':
+                player = Player.from_dict(record['player'])
+                players[self._player_key(player['discord_id'], player['riot_id'])] = player
+            elif record.get('op') == 'del':
+                players.pop(self._player_key(record['discord_id'], record['riot_id']), None)
+            if record.get('ts'):
+                self.data['metadata']['last_modified'] = record['ts']
+        
+        self.data['players'] = list(players.values())
+        self.data['metadata']['total_players'] = len(self.data['players'])
+    
+    def _save_database(self, *records):
+        """Đưa các thay đổi vào journal (ghi đĩa ở background), compact khi cần"""
         try:
             # Cập nhật metadata
-            self.data['metadata']['last_modified'] = datetime.now().isoformat()
+            now = datetime.now().isoformat()
+            self.data['metadata']['last_modified'] = now
             self.data['metadata']['total_players'] = len(self.data['players'])
             
-            # Lưu file
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            for record in records:
+                record['ts'] = now
+                self.journal.append(record)
+                self._track_backup(record)
             
-            # Backup nếu cần
-            if self.data['settings']['auto_backup']:
+            # Backup có giới hạn tần suất, ghi ở background
+            if self.data['settings']['auto_backup'] and self.backups.due():
                 self._create_backup()
             
+            if self.journal.needs_compaction():
+                self.journal.compact(self.data)
+            
             return True
         except Exception as e:
             print(f"❌ Lỗi lưu database: {e}")
             return False
     
+    def _put_record(self, player):
+        return {'op': 'put', 'player': player}
+    
+    def _del_record(self, player):
+        return {'op': 'del', 'discord_id': player['discord_id'], 'riot_id': player['riot_id']}
+    
+    def flush(self, timeout=None):
+        """Đợi mọi thay đổi được ghi xuống đĩa (tối đa `timeout` giây)"""
+        return self.journal.flush(timeout)
+    
+    def close(self):
+        """Đóng journal và đợi backup đang chờ"""
+        self.journal.close()
+        self.backups.close()
+    
+    def _track_backup(self, record):
+        """Ghi nhận thay đổi cho backup delta"""
+        if record['op'] == 'put':
+            player = record['player']
+            self.backups.track(self._player_key(player['discord_id'], player['riot_id']), player)
+        elif record['op'] == 'del':
+            self.backups.track(self._player_key(record['discord_id'], record['riot_id']), None)
+    
     def _create_backup(self):
-        """Tạo backup database"""
+        """Tạo backup database (nén + ghi ở background thread)"""
         try:
-            backup_dir = Path('backups')
-            backup_dir.mkdir(exist_ok=True)
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_file = backup_dir / f'tft_tracker_backup_{timestamp}.json'
-            
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
-            
-            # Xóa backups cũ nếu quá nhiều
-            self._cleanup_old_backups(backup_dir)
-            
+            timestamp = self.backups.backup(
+                self.data,
+                max_backups=self.data['settings'].get('max_backups', 10)
+            )
             self.data['settings']['last_backup'] = timestamp
             return True
         except Exception as e:
             print(f"❌ Lỗi tạo backup: {e}")
             return False
     
-    def _cleanup_old_backups(self, backup_dir, max_backups=10):
-        """Xóa backups cũ"""
-        try:
-            backups = list(backup_dir.glob('tft_tracker_backup_*.json'))
-            backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-            
-            if len(backups) > max_backups:
-                for backup in backups[max_backups:]:
-                    backup.unlink()
-        except:
-            pass
-    
     # ========== PLAYER OPERATIONS ==========
     
     def add_player(self, player_data):
@@ -100,8 +135,9 @@ class Database:
                     player['riot_id'].lower() == player_data['riot_id'].lower()):
                     return False
             
-            self.data['players'].append(player_data)
-            return self._save_database()
+            player = Player.from_dict(player_data)
+            self.data['players'].append(player)
+            return self._save_database(self._put_record(player))
         except Exception as e:
             print(f"❌ Lỗi thêm player: {e}")
             return False
@@ -109,34 +145,37 @@ class Database:
     def remove_player(self, discord_id, riot_id):
         """Xóa player"""
         try:
-            initial_count = len(self.data['players'])
-            self.data['players'] = [
-                p for p in self.data['players']
-                if not (p['discord_id'] == discord_id and p['riot_id'].lower() == riot_id.lower())
-            ]
+            kept = []
+            removed = []
+            for p in self.data['players']:
+                if p['discord_id'] == discord_id and p['riot_id'].lower() == riot_id.lower():
+                    removed.append(p)
+                else:
+                    kept.append(p)
             
-            if len(self.data['players']) < initial_count:
-                return self._save_database()
+            if removed:
+                self.data['players'] = kept
+                return self._save_database(*(self._del_record(p) for p in removed))
             return False
         except Exception as e:
             print(f"❌ Lỗi xóa player: {e}")
             return False
     
     def get_player_by_riot_id(self, riot_id):
-        """Tìm player theo Riot ID"""
+        """Tìm player theo Riot ID (view chỉ-đọc, không copy)"""
         try:
             for player in self.data['players']:
                 if player['riot_id'].lower() == riot_id.lower():
-                    return copy.deepcopy(player)
+                    return freeze(player)
             return None
         except:
             return None
     
     def get_players_by_discord_id(self, discord_id):
-        """Lấy tất cả players của một Discord user"""
+        """Lấy tất cả players của một Discord user (view chỉ-đọc)"""
         try:
             players = [
-                copy.deepcopy(p) for p in self.data['players']
+                freeze(p) for p in self.data['players']
                 if p['discord_id'] == discord_id
             ]
             return players
@@ -144,8 +183,16 @@ class Database:
             return []
     
     def get_all_players(self):
-        """Lấy tất cả players"""
-        return copy.deepcopy(self.data['players'])
+        """
+        Lấy tất cả players (view chỉ-đọc, không copy)
+        
+        Chỉ sửa dữ liệu qua các hàm update_*; cần bản sửa được thì dùng to_list()
+        """
+        return freeze(self.data['players'])
+    
+    def count_players(self):
+        """Đếm số players"""
+        return len(self.data['players'])
     
     def update_last_match(self, discord_id, riot_id, match_id, match_time=None):
         """Cập nhật match cuối cùng"""
@@ -153,12 +200,12 @@ class Database:
             for player in self.data['players']:
                 if (player['discord_id'] == discord_id and 
                     player['riot_id'].lower() == riot_id.lower()):
-                    player['last_match_id'] = match_id
-                    player['last_match_time'] = match_time or datetime.now().isoformat()
-                    player['last_checked'] = datetime.now().isoformat()
-                    break
+                    player.set('last_match_id', match_id)
+                    player.set('last_match_time', match_time or datetime.now().isoformat())
+                    player.last_checked = now_epoch()
+                    return self._save_database(self._put_record(player))
             
-            return self._save_database()
+            return False
         except Exception as e:
             print(f"❌ Lỗi update last match: {e}")
             return False
@@ -169,12 +216,10 @@ class Database:
             for player in self.data['players']:
                 if (player['discord_id'] == discord_id and 
                     player['riot_id'].lower() == riot_id.lower()):
-                    if 'settings' not in player:
-                        player['settings'] = {}
-                    player['settings'][setting_key] = setting_value
-                    break
+                    player.set_setting(setting_key, setting_value)
+                    return self._save_database(self._put_record(player))
             
-            return self._save_database()
+            return False
         except Exception as e:
             print(f"❌ Lỗi update setting: {e}")
             return False
@@ -185,10 +230,15 @@ class Database:
             for player in self.data['players']:
                 if (player['discord_id'] == discord_id and 
                     player['riot_id'].lower() == riot_id.lower()):
-                    player[info_key] = info_value
-                    break
+                    records = []
+                    if info_key in ('discord_id', 'riot_id'):
+                        # Khóa thay đổi -> xóa bản ghi theo khóa cũ khi replay
+                        records.append(self._del_record(player))
+                    player.set(info_key, info_value)
+                    records.append(self._put_record(player))
+                    return self._save_database(*records)
             
-            return self._save_database()
+            return False
         except Exception as e:
             print(f"❌ Lỗi update player info: {e}")
             return False
@@ -197,18 +247,26 @@ class Database:
         """Dọn dẹp players không hoạt động"""
         try:
             cutoff_date = datetime.now() - timedelta(days=days_inactive)
-            initial_count = len(self.data['players'])
-            
-            self.data['players'] = [
-                p for p in self.data['players']
-                if 'last_checked' in p and 
-                datetime.fromisoformat(p['last_checked']) > cutoff_date
-            ]
+            cutoff = now_epoch() - days_inactive * 86_400_000_000
+            kept = []
+            removed = []
+            for p in self.data['players']:
+                if isinstance(p.last_checked, int):
+                    # So sánh epoch trực tiếp, không parse chuỗi
+                    active = p.last_checked > cutoff
+                else:
+                    # Giá trị không gói được (có timezone, ...) -> parse như cũ
+                    last_checked = p.get('last_checked')
+                    active = bool(last_checked) and datetime.fromisoformat(last_checked) > cutoff_date
+                if active:
+                    kept.append(p)
+                else:
+                    removed.append(p)
             
-            removed = initial_count - len(self.data['players'])
-            if removed > 0:
-                self._save_database()
-                return removed
+            if removed:
+                self.data['players'] = kept
+                self._save_database(*(self._del_record(p) for p in removed))
+                return len(removed)
             return 0
         except Exception as e:
             print(f"❌ Lỗi cleanup inactive players: {e}")
@@ -4,8 +4,10 @@ from datetime import datetime
 class GeminiAnalyzer:
     """Phân tích TFT với Gemini AI"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, matches=None):
         self.api_key = api_key
+        # MatchStore: lịch sử match đã lưu của player, dùng cho analyze_trend
+        self.matches = matches
         self.is_enabled = bool(api_key)
         self.model = None
         
@@ -106,10 +108,14 @@ class GeminiAnalyzer:
         
         return prompt
     
-    async def analyze_trend(self, match_history, riot_id):
+    async def analyze_trend(self, match_history, riot_id, region='vn', limit=20):
         """
         Phân tích xu hướng từ lịch sử match
+        
+        Có match store thì bổ sung các match đã lưu của player, không phụ thuộc
+        vào phần lịch sử caller đang có.
         """
+        match_history = self._merge_history(match_history or [], riot_id, region, limit)
         if not self.is_enabled() or len(match_history) < 3:
             return None
         
@@ -144,3 +150,13 @@ class GeminiAnalyzer:
         except Exception as e:
             print(f"❌ Lỗi Gemini trend analysis: {e}")
             return None
+    
+    def _merge_history(self, match_history, riot_id, region, limit):
+        """Gộp lịch sử caller đưa vào với match đã lưu (theo match_id), mới nhất trước"""
+        if self.matches is None:
+            return match_history
+        merged = {}
+        for match in list(match_history) + self.matches.recent_matches(riot_id, region, limit):
+            merged.setdefault(match.get('match_id') or id(match), match)
+        ordered = sorted(merged.values(), key=lambda m: m.get('timestamp') or '', reverse=True)
+        return ordered[:limit]
@@ -0,0 +1,98 @@
+import asyncio
+from collections import deque
+
+
+class LatencyTracker:
+    """Giữ `size` độ trễ gần nhất (giây) để tính percentile"""
+
+    def __init__(self, size=100, default=2.0, min_samples=10):
+        self.default = default
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, seconds):
+        self._samples.append(seconds)
+
+    def percentile(self, p):
+        """Percentile `p` (0-100); chưa đủ mẫu thì trả về `default`"""
+        if len(self._samples) < self.min_samples:
+            return self.default
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class SourceStats:
+    """Tỉ lệ thành công (trung bình trượt) + độ trễ của 1 nguồn dữ liệu"""
+
+    def __init__(self, decay=0.9):
+        self.decay = decay
+        self.success_rate = 1.0
+        self.attempts = 0
+        self.successes = 0
+        self.latency = LatencyTracker()
+
+    def record(self, success, seconds):
+        self.attempts += 1
+        if success:
+            self.successes += 1
+            self.latency.record(seconds)
+        self.success_rate = self.success_rate * self.decay + (1 - self.decay) * (1.0 if success else 0.0)
+
+    def to_dict(self):
+        return {
+            'attempts': self.attempts,
+            'successes': self.successes,
+            'success_rate': round(self.success_rate, 3),
+            'p50_latency': round(self.latency.percentile(50), 3),
+            'p95_latency': round(self.latency.percentile(95), 3)
+        }
+
+
+async def hedge(factories, delay, accept=lambda result: result is not None):
+    """
+    Chạy lần lượt các request dự phòng, lấy kết quả hợp lệ đầu tiên
+
+    `factories`: danh sách hàm không tham số trả về coroutine, theo thứ tự ưu tiên.
+    Request kế tiếp được bắn khi request đang chạy chưa xong sau `delay` giây
+    (delay=0 -> chạy đua tất cả cùng lúc) hoặc khi nó lỗi / trả về kết quả
+    không hợp lệ. Có kết quả hợp lệ thì hủy mọi request còn lại.
+
+    Returns: (index của request thắng, kết quả), hoặc (None, None) nếu tất cả thất bại
+    """
+    pending = {}
+    next_index = 0
+
+    def launch():
+        nonlocal next_index
+        task = asyncio.ensure_future(factories[next_index]())
+        pending[task] = next_index
+        next_index += 1
+
+    try:
+        launch()
+        while pending:
+            while delay <= 0 and next_index < len(factories):
+                launch()
+            timeout = delay if next_index < len(factories) else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # Request hiện tại chậm hơn ngưỡng -> bắn request dự phòng
+                launch()
+                continue
+            for task in done:
+                index = pending.pop(task)
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                if accept(task.result()):
+                    return index, task.result()
+            if not pending and next_index < len(factories):
+                # Tất cả request đang chạy đều thất bại -> thử cái tiếp theo ngay
+                launch()
+        return None, None
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,137 @@
+import aiohttp
+
+from config import Config
+
+# ========== HEADER DỰNG SẴN ==========
+# Dùng lại cho mọi request thay vì tạo dict mới mỗi lần gọi
+
+TRACKER_HTML_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'vi,en-US;q=0.7,en;q=0.3',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0'
+}
+
+TRACKER_API_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "vi-VN,vi;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Origin": "https://tracker.gg",
+    "Referer": "https://tracker.gg/",
+    "sec-ch-ua": '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-site"
+}
+
+JSON_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "application/json"
+}
+
+OPGG_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "application/json",
+    "Accept-Language": "vi-VN,vi;q=0.9"
+}
+
+
+class HTTPClient:
+    """
+    Session aiohttp dùng chung cho mọi client gọi ra ngoài
+
+    - 1 TCPConnector: giới hạn kết nối tổng + mỗi host, cache DNS,
+      giữ kết nối keep-alive để không phải bắt tay TLS lại
+    - Timeout mặc định cho mọi request
+    - Đếm request / kết nối mới / kết nối dùng lại qua TraceConfig
+    """
+
+    def __init__(self, limit=100, limit_per_host=10, dns_ttl=300,
+                 keepalive_timeout=60, timeout=15):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+        self._session = None
+        self._connector = None
+        self.counters = {
+            'requests': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+            'dns_cache_hits': 0,
+            'dns_cache_misses': 0
+        }
+
+    def get_session(self):
+        """Lấy session dùng chung (tạo mới nếu chưa có / đã đóng)"""
+        if self._session is None or self._session.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                timeout=self.timeout,
+                trace_configs=[self._trace_config()]
+            )
+        return self._session
+
+    async def close(self):
+        """Đóng session + toàn bộ kết nối (gọi 1 lần khi tắt bot)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._connector = None
+
+    def _trace_config(self):
+        trace = aiohttp.TraceConfig()
+        counters = self.counters
+
+        def count(name):
+            async def handler(session, context, params):
+                counters[name] += 1
+            return handler
+
+        trace.on_request_start.append(count('requests'))
+        trace.on_connection_create_end.append(count('connections_created'))
+        trace.on_connection_reuseconn.append(count('connections_reused'))
+        trace.on_dns_cache_hit.append(count('dns_cache_hits'))
+        trace.on_dns_cache_miss.append(count('dns_cache_misses'))
+        return trace
+
+    def stats(self):
+        """Thống kê pool kết nối"""
+        stats = dict(self.counters)
+        stats['limit'] = self.limit
+        stats['limit_per_host'] = self.limit_per_host
+        connector = self._connector
+        if connector is not None and not connector.closed:
+            # Kết nối đang được dùng / đang rảnh chờ dùng lại
+            stats['in_use'] = len(getattr(connector, '_acquired', ()))
+            stats['idle'] = sum(len(conns) for conns in getattr(connector, '_conns', {}).values())
+        else:
+            stats['in_use'] = stats['idle'] = 0
+        return stats
+
+
+# Client dùng chung cho RiotAPIService, RiotVerifier, TFTService
+http_client = HTTPClient(
+    limit=Config.HTTP_POOL_LIMIT,
+    limit_per_host=Config.HTTP_POOL_LIMIT_PER_HOST,
+    dns_ttl=Config.HTTP_DNS_TTL,
+    keepalive_timeout=Config.HTTP_KEEPALIVE_TIMEOUT,
+    timeout=Config.HTTP_TIMEOUT
+)
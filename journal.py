@@ -0,0 +1,241 @@
+import json
+import os
+import threading
+
+from views import json_default
+
+
+def _snapshot_copy(value):
+    """Copy list/dict lồng nhau; bản ghi có copy() (vd: Player) được copy bằng hàm đó"""
+    if isinstance(value, list):
+        return [_snapshot_copy(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _snapshot_copy(item) for key, item in value.items()}
+    if hasattr(value, 'copy'):
+        return value.copy()
+    return value
+
+
+class JournalStore:
+    """
+    Lưu trữ snapshot + journal append-only, ghi đĩa ở background thread
+
+    - Mỗi thay đổi là 1 dòng JSON gọn; append() chỉ đưa vào hàng đợi,
+      đánh dấu dirty rồi trả về ngay (không chạm đĩa)
+    - Flusher thread gom mọi thay đổi trong `flush_interval` giây và ghi
+      1 lần vào `<file>.journal` (group commit), giữ nguyên thứ tự
+    - Khi journal vượt ngưỡng, snapshot mới được ghi qua file tạm + rename
+      và journal cũ bị xóa
+    - Khi khởi động: load_snapshot() rồi áp dụng từng record của replay()
+    Record phải idempotent (ghi đè cả bản ghi / xóa theo khóa) vì
+    journal đang compact có thể bị replay lại sau khi crash.
+    """
+
+    def __init__(self, snapshot_file, compact_threshold=1024 * 1024, flush_interval=1.0):
+        self.snapshot_file = snapshot_file
+        self.journal_file = f'{snapshot_file}.journal'
+        self.compacting_file = f'{snapshot_file}.journal.compacting'
+        self.compact_threshold = compact_threshold
+        self.flush_interval = flush_interval
+
+        self._journal = None
+        self._journal_size = 0
+        self._snapshot_size = 0
+
+        # Hàng đợi ghi: bytes (1 record) hoặc ('snapshot', bản copy snapshot)
+        self._pending = []
+        self._enqueued = 0
+        self._flushed = 0
+        self._flush_now = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    @property
+    def dirty(self):
+        """Còn thay đổi chưa ghi xuống đĩa"""
+        return self._flushed < self._enqueued
+
+    def load_snapshot(self, default):
+        """Đọc snapshot (trả về `default` nếu chưa có)"""
+        if not os.path.exists(self.snapshot_file):
+            return default
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._snapshot_size = os.path.getsize(self.snapshot_file)
+            return data
+        except Exception as e:
+            print(f"⚠️ Không thể đọc snapshot {self.snapshot_file}: {e}")
+            return default
+
+    def replay(self):
+        """Duyệt các record trong journal theo thứ tự ghi"""
+        # Journal đang compact dở (crash giữa chừng) cũ hơn journal hiện tại
+        for path in (self.compacting_file, self.journal_file):
+            yield from self._read_records(path)
+
+        if os.path.exists(self.journal_file):
+            self._journal_size = os.path.getsize(self.journal_file)
+
+    def _read_records(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Dòng cuối bị ghi dở khi crash -> bỏ qua
+                    print(f"⚠️ Bỏ qua record hỏng trong {path}")
+
+    # ========== GHI (THREAD GỌI) ==========
+
+    def append(self, record):
+        """Đưa 1 record vào hàng đợi ghi"""
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=json_default)
+        data = (line + '\n').encode('utf-8')
+        self._journal_size += len(data)
+        self._enqueue(data)
+
+    def needs_compaction(self):
+        """Journal đã vượt ngưỡng (tối thiểu bằng kích thước snapshot)"""
+        return self._journal_size >= max(self.compact_threshold, self._snapshot_size)
+
+    def compact(self, snapshot):
+        """
+        Gộp journal vào snapshot mới
+
+        Thread gọi (thường là event loop) chỉ chụp bản copy của `snapshot` để có
+        trạng thái nhất quán; serialize + ghi đĩa do flusher thread làm sau các
+        record đã xếp hàng trước đó.
+        """
+        self._journal_size = 0
+        self._enqueue(('snapshot', _snapshot_copy(snapshot)))
+
+    def flush(self, timeout=None):
+        """Ghi ngay mọi thay đổi đang chờ và đợi ghi xong"""
+        with self._cond:
+            target = self._enqueued
+            self._flush_now = True
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: self._flushed >= target or self._thread is None,
+                timeout
+            )
+
+    def close(self, timeout=30):
+        """Ghi nốt thay đổi và dừng flusher thread"""
+        if not self.flush(timeout):
+            print(f"⚠️ Còn thay đổi chưa ghi được vào {self.journal_file}")
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _enqueue(self, item):
+        with self._cond:
+            self._pending.append(item)
+            self._enqueued += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='journal-flusher', daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    # ========== FLUSHER THREAD ==========
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending and self._closed:
+                    return
+                # Gom thêm thay đổi trong cửa sổ flush_interval
+                self._cond.wait_for(lambda: self._flush_now or self._closed, self.flush_interval)
+                batch = self._pending
+                self._pending = []
+                self._flush_now = False
+
+            written = self._write_batch(batch)
+
+            with self._cond:
+                if written < len(batch):
+                    # Ghi lỗi -> giữ phần còn lại để thử lại ở lần sau
+                    self._pending = batch[written:] + self._pending
+                self._flushed += written
+                self._cond.notify_all()
+            if written < len(batch):
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closed, self.flush_interval)
+                    if self._closed:
+                        return
+
+    def _write_batch(self, batch):
+        """Ghi theo thứ tự, trả về số item đã ghi thành công"""
+        written = 0
+        lines = []
+        try:
+            for item in batch:
+                if isinstance(item, bytes):
+                    lines.append(item)
+                    continue
+
+                self._append_lines(lines)
+                written += len(lines)
+                lines = []
+
+                self._write_snapshot(item[1])
+                written += 1
+
+            self._append_lines(lines)
+            written += len(lines)
+        except Exception as e:
+            print(f"❌ Lỗi ghi journal {self.journal_file}: {e}")
+        return written
+
+    def _append_lines(self, lines):
+        if not lines:
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'ab')
+        self._journal.write(b''.join(lines))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _write_snapshot(self, snapshot):
+        payload = json.dumps(
+            snapshot, ensure_ascii=False, separators=(',', ':'), default=json_default
+        ).encode('utf-8')
+        # Xoay journal hiện tại sang file đang compact
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_file):
+            if os.path.exists(self.compacting_file):
+                # Lần compact trước thất bại -> nối tiếp để không mất record
+                with open(self.compacting_file, 'ab') as dst, open(self.journal_file, 'rb') as src:
+                    dst.write(src.read())
+                os.remove(self.journal_file)
+            else:
+                os.replace(self.journal_file, self.compacting_file)
+
+        tmp_file = f'{self.snapshot_file}.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+
+        if os.path.exists(self.compacting_file):
+            os.remove(self.compacting_file)
+        self._snapshot_size = len(payload)
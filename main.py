@@ -3,19 +3,36 @@ from discord.ext import commands, tasks
 import os
 import aiohttp
 import asyncio
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
 import logging
 from aiohttp import web
-import threading
 import time
 
+from circuit_breaker import breakers
+from config import Config
+from hedging import LatencyTracker, hedge
+from http_client import TRACKER_HTML_HEADERS, http_client
+from journal import JournalStore
+from match_store import MatchStore
+from notifier import Notification, NotificationQueue
+from player_index import PlayerIndex
+from player_record import Player
+from poll_scheduler import PollScheduler
+from rank_extractor import RankScanner, format_rank
+from rank_refresher import RankRefresher, rank_is_fresh
+from rate_limit import host_limiter
+from response_cache import MISS, ResponseCache, cache_key
+from riot_client import RiotClient
+from singleflight import SingleFlight
+from sqlite_store import SQLiteDatabase, migrate_json
+from views import freeze, thaw
+
 # ========== CẤU HÌNH LOGGING ==========
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('tft_bot.log'),
+        logging.FileHandler('tft_bot.log', delay=True),  # chỉ tạo file khi có log đầu tiên
         logging.StreamHandler()
     ]
 )
@@ -38,35 +55,60 @@ bot = commands.Bot(
 
 # ========== DATABASE ĐƠN GIẢN ==========
 class Database:
-    def __init__(self):
-        self.db_file = 'tft_players.json'
-        self.players = self._load_db()
+    def __init__(self, db_file='tft_players.json', flush_interval=1.0):
+        self.db_file = db_file
+        self.journal = JournalStore(self.db_file, flush_interval=flush_interval)
+        self.index = PlayerIndex(Player.from_dict(p) for p in self._load_db())
+        for record in self.journal.replay():
+            self._apply_record(record)
     
-    def _load_db(self):
-        if os.path.exists(self.db_file):
-            try:
-                with open(self.db_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+    @property
+    def players(self):
+        return self.index.all()
     
-    def _save_db(self):
+    def _load_db(self):
+        players = self.journal.load_snapshot([])
+        if isinstance(players, dict):
+            # File layout dict của database.Database: không mở để compact ghi đè
+            raise ValueError(f"{self.db_file} không phải file danh sách players của bot")
+        return players if isinstance(players, list) else []
+    
+    def _apply_record(self, record):
+        """Áp dụng 1 record journal vào bộ nhớ (idempotent)"""
+        if record.get('op') == 'put':
+            player = Player.from_dict(record['player'])
+            self.index.remove(player['discord_id'], player['riot_id'])
+            self.index.add(player)
+        elif record.get('op') == 'del':
+            self.index.remove(record['discord_id'], record['riot_id'])
+    
+    def _save_db(self, record):
+        """Đưa 1 thay đổi vào journal (ghi đĩa ở background), compact khi journal quá lớn"""
         try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump(self.players, f, indent=2, ensure_ascii=False)
+            self.journal.append(record)
+            if self.journal.needs_compaction():
+                self.journal.compact(self.players)
             return True
         except Exception as e:
             logger.error(f"Lỗi lưu database: {e}")
             return False
     
+    def _save_player(self, player):
+        return self._save_db({'op': 'put', 'player': player})
+    
+    def flush(self, timeout=None):
+        """Đợi mọi thay đổi được ghi xuống đĩa (tối đa `timeout` giây)"""
+        return self.journal.flush(timeout)
+    
+    def close(self):
+        self.journal.close()
+    
     def add_player(self, discord_id, discord_name, riot_id, region, channel_id, verified=True):
         # Kiểm tra xem đã có chưa
-        for player in self.players:
-            if player['discord_id'] == discord_id and player['riot_id'].lower() == riot_id.lower():
-                return False
+        if self.index.get(discord_id, riot_id) is not None:
+            return False
         
-        player_data = {
+        player_data = Player.from_dict({
             'discord_id': discord_id,
             'discord_name': discord_name,
             'riot_id': riot_id,
@@ -85,69 +127,163 @@ class Database:
                 'total_notified': 0,
                 'last_notified': None
             }
-        }
+        })
         
-        self.players.append(player_data)
-        return self._save_db()
+        self.index.add(player_data)
+        return self._save_player(player_data)
     
     def remove_player(self, discord_id, riot_id):
-        initial_len = len(self.players)
-        self.players = [p for p in self.players if not (p['discord_id'] == discord_id and p['riot_id'].lower() == riot_id.lower())]
-        
-        if len(self.players) < initial_len:
-            return self._save_db()
+        if self.index.remove(discord_id, riot_id) is not None:
+            return self._save_db({'op': 'del', 'discord_id': discord_id, 'riot_id': riot_id})
         return False
     
+    # Getter trả về view chỉ-đọc: mọi thay đổi phải đi qua update_* để vào journal
     def get_player(self, discord_id, riot_id):
-        for player in self.players:
-            if player['discord_id'] == discord_id and player['riot_id'].lower() == riot_id.lower():
-                return player
-        return None
+        return freeze(self.index.get(discord_id, riot_id))
     
     def get_players_by_discord(self, discord_id):
-        return [p for p in self.players if p['discord_id'] == discord_id]
+        return freeze(self.index.by_discord(discord_id))
+    
+    def get_players_by_account(self, riot_id, region):
+        return freeze(self.index.by_account(riot_id, region))
+    
+    def get_all_players(self, limit=None):
+        players = self.index.all()
+        return freeze(players if limit is None else players[:limit])
     
-    def get_all_players(self):
-        return self.players.copy()
+    def count_players(self):
+        return len(self.index)
     
     def update_last_match(self, discord_id, riot_id, match_id, match_time):
-        for player in self.players:
-            if player['discord_id'] == discord_id and player['riot_id'].lower() == riot_id.lower():
-                player['last_match_id'] = match_id
-                player['last_checked'] = datetime.now().isoformat()
-                player['stats']['last_notified'] = match_time
-                player['stats']['total_notified'] = player['stats'].get('total_notified', 0) + 1
-                break
-        return self._save_db()
+        player = self.index.get(discord_id, riot_id)
+        if player is not None:
+            player.mark_notified(match_id, match_time)
+            return self._save_player(player)
+        return False
     
     def update_settings(self, discord_id, riot_id, setting_key, setting_value):
-        for player in self.players:
-            if player['discord_id'] == discord_id and player['riot_id'].lower() == riot_id.lower():
-                if 'settings' not in player:
-                    player['settings'] = {}
-                player['settings'][setting_key] = setting_value
-                break
-        return self._save_db()
+        player = self.index.get(discord_id, riot_id)
+        if player is not None:
+            player.set_setting(setting_key, setting_value)
+            return self._save_player(player)
+        return False
 
-db = Database()
+def open_database(db_file):
+    """Chọn backend theo DB_FILE: *.json -> JSON journal, còn lại -> SQLite"""
+    if db_file.lower().endswith('.json'):
+        return Database(db_file, flush_interval=Config.DB_FLUSH_INTERVAL)
+    
+    sqlite_db = SQLiteDatabase(db_file)
+    imported = migrate_json(sqlite_db)
+    if imported:
+        logger.info(f"📦 Đã chuyển {imported} người chơi từ JSON sang SQLite")
+    return sqlite_db
+
+# Mở trong main() (import module không tạo file), đóng ở cuối main()
+db = None
 
 # ========== RIOT API SERVICE ==========
 class RiotAPIService:
-    def __init__(self):
-        self.session = None
-        self.cache = {}
+    def __init__(self, matches=None):
+        self.cache = ResponseCache(
+            ttl=Config.CACHE_TTL,
+            negative_ttl=Config.CACHE_NEGATIVE_TTL,
+            max_entries=Config.CACHE_MAX_ENTRIES,
+            max_bytes=Config.CACHE_MAX_BYTES
+        )
+        # Rank lấy được gần nhất của mỗi tài khoản (sống lâu hơn cache), dùng khi
+        # render thông báo mà không phải gọi upstream
+        self.rank_snapshots = ResponseCache(
+            ttl=7 * 24 * 3600,
+            negative_ttl=0,
+            max_entries=Config.CACHE_MAX_ENTRIES
+        )
+        # Request đồng thời cùng tài khoản dùng chung 1 lượt gọi upstream
+        self.inflight = SingleFlight()
+        # Định dạng URL Tracker.gg thành công gần nhất theo region + độ trễ để hedge
+        self.url_preference = {}
+        self.tracker_latency = LatencyTracker()
+        # Kho match đã kết thúc (MatchStore)
+        self.matches = matches
+        # Riot API chính thức khi có key; tracker.gg làm dự phòng cho rank
+        self.riot = RiotClient(
+            Config.RIOT_API_KEY,
+            base_url=Config.RIOT_API_BASE_URL,
+            app_limits=Config.RIOT_APP_RATE_LIMIT,
+            matches=matches
+        ) if Config.RIOT_API_KEY else None
+    
+    def use_match_store(self, matches):
+        """Gắn kho match sau khi mở (trong main())"""
+        self.matches = matches
+        if self.riot:
+            self.riot.matches = matches
     
     async def get_session(self):
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-        return self.session
-    
-    async def close(self):
-        if self.session:
-            await self.session.close()
+        """Session dùng chung của http_client (đóng trong main())"""
+        return http_client.get_session()
     
-    async def get_tft_stats_from_tracker(self, riot_id, region='vn'):
-        """Lấy thống kê TFT thực tế từ Tracker.gg"""
+    def poll_upstreams(self, region):
+        """
+        Upstream mà 1 lượt poll tài khoản ở `region` gọi tới
+
+        Rank lấy ở background (rank_refresher), không nằm trong lượt poll;
+        không có Riot key thì match lấy từ mock, không phụ thuộc upstream nào.
+        """
+        if self.riot:
+            return self.riot.hosts(region)
+        return ()
+    
+    async def get_tft_stats(self, riot_id, region='vn', fresh=False):
+        """
+        Lấy thống kê TFT thực tế từ Riot API / Tracker.gg (có cache)
+        
+        `fresh=True` bỏ qua giá trị đang cache (vd: rank vừa thay đổi sau trận mới).
+        Không tìm thấy / lỗi kết nối chỉ được cache ngắn hạn (negative_ttl).
+        """
+        key = cache_key(riot_id, region)
+        if fresh:
+            self.cache.invalidate(key)
+        # Request "fresh" không được gộp với request bắt đầu trước đó (có thể là rank cũ)
+        flight_key = ('tracker', fresh) + key
+        tft_stats = self.cache.get(key)
+        if tft_stats is not MISS:
+            return tft_stats
+        tft_stats = await self.inflight.do(
+            flight_key, lambda: self._fetch_tft_stats(riot_id, region)
+        )
+        # Rank lỗi chỉ giữ negative_ttl, không chiếm cache cả TTL của rank thật
+        error = tft_stats is not None and 'error' in tft_stats
+        self.cache.put(key, tft_stats, self.cache.negative_ttl if error else None)
+        return tft_stats
+    
+    def peek_tft_stats(self, riot_id, region='vn'):
+        """Rank lấy được gần nhất (không gọi upstream), None nếu chưa có"""
+        tft_stats = self.rank_snapshots.get(cache_key(riot_id, region))
+        return None if tft_stats is MISS else tft_stats
+    
+    async def _fetch_tft_stats(self, riot_id, region):
+        """Riot API trước (nếu có key), lỗi thì chuyển sang Tracker.gg"""
+        checked_at = time.time()
+        tft_stats = None
+        if self.riot:
+            try:
+                tft_stats = await self.riot.get_tft_stats(riot_id, region)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Lỗi Riot API (rank) {riot_id}: {e}")
+        if not tft_stats:
+            tft_stats = await self._fetch_tft_stats_from_tracker(riot_id, region)
+        if tft_stats:
+            # Thời điểm lấy rank: so với thời gian trận để biết rank đã tính trận đó chưa
+            tft_stats['checked_at'] = checked_at
+            if 'error' not in tft_stats:
+                self.rank_snapshots.put(cache_key(riot_id, region), tft_stats)
+        return tft_stats
+    
+    async def _fetch_tft_stats_from_tracker(self, riot_id, region):
+        """Gọi Tracker.gg để lấy thống kê TFT"""
         try:
             # Tách username và tagline
             if '#' not in riot_id:
@@ -165,39 +301,22 @@ class RiotAPIService:
                 f"https://tracker.gg/tft/profile/riot/{region}/{encoded_username}%23{tagline}/overview"
             ]
             
-            session = await self.get_session()
-            
-            for url in urls:
-                try:
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                        'Accept-Language': 'vi,en-US;q=0.7,en;q=0.3',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'DNT': '1',
-                        'Connection': 'keep-alive',
-                        'Upgrade-Insecure-Requests': '1',
-                        'Sec-Fetch-Dest': 'document',
-                        'Sec-Fetch-Mode': 'navigate',
-                        'Sec-Fetch-Site': 'none',
-                        'Sec-Fetch-User': '?1',
-                        'Cache-Control': 'max-age=0'
-                    }
-                    
-                    async with session.get(url, headers=headers, timeout=15) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            
-                            # Parse HTML để lấy thông tin rank
-                            # Đây là logic cơ bản, có thể cần điều chỉnh nếu Tracker.gg thay đổi
-                            rank_info = self._parse_tracker_html(html)
-                            
-                            if rank_info:
-                                logger.info(f"Đã lấy rank từ Tracker.gg: {riot_id} - {rank_info['rank']}")
-                                return rank_info
-                except Exception as e:
-                    logger.error(f"Lỗi khi lấy từ {url}: {e}")
-                    continue
+            # Thử trước định dạng URL thành công gần nhất của region; quá ngưỡng
+            # độ trễ (percentile) mà chưa có kết quả thì bắn thêm định dạng còn lại
+            preferred = self.url_preference.get(region, 0)
+            order = [preferred] + [i for i in range(len(urls)) if i != preferred]
+            delay = min(
+                max(self.tracker_latency.percentile(Config.TRACKER_HEDGE_PERCENTILE), Config.TRACKER_HEDGE_MIN_DELAY),
+                Config.HTTP_TIMEOUT
+            )
+            index, rank_info = await hedge(
+                [lambda url=urls[i]: self._fetch_tracker_url(url) for i in order],
+                delay
+            )
+            if index is not None:
+                self.url_preference[region] = order[index]
+                logger.info(f"Đã lấy rank từ Tracker.gg: {riot_id} - {rank_info['rank']}")
+                return rank_info
             
             return None
             
@@ -205,110 +324,180 @@ class RiotAPIService:
             logger.error(f"Lỗi get_tft_stats_from_tracker: {e}")
             return None
     
-    def _parse_tracker_html(self, html):
-        """Parse HTML từ Tracker.gg để lấy rank"""
+    async def _fetch_tracker_url(self, url):
+        """Lấy rank từ 1 URL Tracker.gg (None nếu lỗi / không phải 200)"""
         try:
-            # Tìm thông tin rank trong HTML
-            # Cấu trúc HTML của Tracker.gg thường có:
-            # <div class="rating"> hoặc <div class="rank">
-            
-            import re
-            
-            # Tìm rank text
-            rank_patterns = [
-                r'<span[^>]*class="[^"]*rank[^"]*"[^>]*>([^<]+)</span>',
-                r'<div[^>]*class="[^"]*rating[^"]*"[^>]*>([^<]+)</div>',
-                r'<div[^>]*class="[^"]*stat__value[^"]*"[^>]*>([^<]+)</div>',
-                r'Rank[^>]*>([^<]+)<',
-                r'Tier[^>]*>([^<]+)<'
-            ]
-            
-            for pattern in rank_patterns:
-                match = re.search(pattern, html, re.IGNORECASE)
-                if match:
-                    rank_text = match.group(1).strip()
-                    # Làm sạch rank text
-                    rank_text = re.sub(r'<[^>]+>', '', rank_text)
-                    rank_text = rank_text.replace('&nbsp;', ' ').strip()
-                    
-                    # Phân loại rank
-                    rank_map = {
-                        'iron': 'Sắt', 'bronze': 'Đồng', 'silver': 'Bạc',
-                        'gold': 'Vàng', 'platinum': 'Bạch Kim',
-                        'diamond': 'Kim Cương', 'master': 'Cao Thủ',
-                        'grandmaster': 'Đại Cao Thủ', 'challenger': 'Thách Đấu'
-                    }
-                    
-                    for eng, viet in rank_map.items():
-                        if eng in rank_text.lower():
-                            # Lấy số la mã hoặc số
-                            import re
-                            tier_match = re.search(r'[IVXLCDM]+|\d+', rank_text)
-                            tier = tier_match.group() if tier_match else ''
-                            
-                            return {
-                                'rank': f'{viet} {tier}',
-                                'source': 'tracker.gg',
-                                'raw_text': rank_text
-                            }
-            
-            # Nếu không tìm thấy rank, trả về thông tin mặc định
-            return {
-                'rank': 'Chưa xếp hạng',
-                'source': 'tracker.gg',
-                'raw_text': 'Không tìm thấy thông tin rank'
-            }
-            
+            session = await self.get_session()
+            breaker = breakers.get(url)
+            if not breaker.allow():
+                # Tracker.gg đang lỗi -> bỏ qua ngay thay vì chờ timeout
+                return None
+            with breaker.guard():
+                # Chờ limiter trong guard(): bị cancel lúc đang chờ vẫn trả lại lượt thử half_open
+                await host_limiter.acquire(url)
+                started = time.monotonic()
+                async with session.get(url, headers=TRACKER_HTML_HEADERS) as response:
+                    breaker.record_response(response.status, response.headers)
+                    if response.status == 200:
+                        # Đọc từng chunk, dừng ngay khi thấy rank hoặc vượt giới hạn bytes
+                        rank_info = await self._read_tracker_rank(response)
+                        self.tracker_latency.record(time.monotonic() - started)
+                        return rank_info
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Lỗi khi lấy từ {url}: {e}")
+        return None
+    
+    async def _read_tracker_rank(self, response):
+        """Đọc body dạng stream qua RankScanner, đóng kết nối khi đã có kết quả"""
+        try:
+            scanner = RankScanner()
+            async for chunk in response.content.iter_chunked(Config.TRACKER_CHUNK_SIZE):
+                scanner.feed(chunk)
+                if scanner.done or scanner.bytes_read >= Config.TRACKER_MAX_BYTES:
+                    break
+            if not response.content.at_eof():
+                # Bỏ phần body còn lại thay vì tải hết
+                response.close()
+            return self._rank_info(scanner.close())
         except Exception as e:
             logger.error(f"Lỗi parse HTML: {e}")
+            return self._rank_error(e)
+    
+    def _rank_info(self, rank):
+        if rank:
             return {
-                'rank': 'Lỗi khi lấy rank',
+                'rank': format_rank(rank),
+                'tier': rank['tier'],
+                'division': rank['division'],
+                'lp': rank['lp'],
                 'source': 'tracker.gg',
-                'error': str(e)
+                'raw_text': rank['raw_text']
             }
+        
+        # Nếu không tìm thấy rank, trả về thông tin mặc định
+        return {
+            'rank': 'Chưa xếp hạng',
+            'source': 'tracker.gg',
+            'raw_text': 'Không tìm thấy thông tin rank'
+        }
+    
+    def _rank_error(self, error):
+        return {
+            'rank': 'Lỗi khi lấy rank',
+            'source': 'tracker.gg',
+            'error': str(error)
+        }
+    
+    async def get_recent_match_ids(self, riot_id, region='vn', limit=1):
+        """
+        Bước 1 của lượt poll: chỉ lấy danh sách match_id gần nhất (mới nhất trước)
+        
+        Request nhỏ, đủ để biết có match mới hay không mà chưa tải chi tiết.
+        """
+        return await self.inflight.do(
+            ('ids', limit) + cache_key(riot_id, region),
+            lambda: self._fetch_match_ids(riot_id, region, limit)
+        )
     
-    async def get_tft_match_history(self, riot_id, region='vn', limit=3):
-        """Lấy lịch sử trận đấu TFT"""
+    async def _fetch_match_ids(self, riot_id, region, limit):
         try:
-            # Trong thực tế, bạn cần implement API call thật
-            # Ở đây tôi sẽ trả về dữ liệu mẫu, bạn có thể thay thế bằng API thật
-            
-            await asyncio.sleep(0.5)  # Giả lập delay
-            
-            # Tạo dữ liệu mẫu dựa trên riot_id
-            import hashlib
-            seed = int(hashlib.md5(riot_id.encode()).hexdigest()[:8], 16)
-            import random
-            random.seed(seed)
-            
-            matches = []
-            for i in range(limit):
-                placement = random.randint(1, 8)
-                level = random.randint(7, 10)
-                
-                # Tạo traits và units ngẫu nhiên
-                traits = random.sample(['Darkin', 'Challenger', 'Juggernaut', 'Shurima', 'Ionia', 'Noxus'], 
-                                     random.randint(2, 4))
-                
-                units = random.sample(['Aatrox', 'Kaisa', 'Warwick', 'JarvanIV', 'Nasus', 'Azir'], 
-                                    random.randint(4, 7))
-                
-                matches.append({
-                    'match_id': f'{riot_id.replace("#", "_")}_{int(time.time()) - i}',
-                    'placement': placement,
-                    'level': level,
-                    'traits': [{'name': t, 'tier': random.randint(1, 3)} for t in traits],
-                    'units': [{'name': u, 'tier': random.randint(1, 3)} for u in units],
-                    'timestamp': (datetime.now() - timedelta(hours=i*2)).isoformat(),
-                    'game_duration': random.randint(1200, 1800)
-                })
-            
-            return matches
-            
+            if self.riot:
+                return await self.riot.get_recent_match_ids(riot_id, region, limit)
+            return await self._mock_match_ids(riot_id, limit)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"Lỗi get_tft_match_history: {e}")
+            logger.error(f"Lỗi lấy match ids {riot_id}: {e}")
             return []
+    
+    async def get_tft_match(self, riot_id, region, match_id):
+        """Bước 2: chi tiết 1 match, đọc qua match_store (mỗi match chỉ tải từ upstream 1 lần)"""
+        match = await self.inflight.do(
+            ('match', match_id) + cache_key(riot_id, region),
+            lambda: self._fetch_tft_match(riot_id, region, match_id)
+        )
+        if match and self.matches is not None:
+            # Lưu kèm bản rút gọn theo player: payload Riot trong kho là match đầy đủ
+            self.matches.add_player_match(riot_id, region, match_id, match.get('timestamp'), summary=match)
+        return match
+    
+    async def _fetch_tft_match(self, riot_id, region, match_id):
+        try:
+            if self.riot:
+                # RiotClient lưu match đầy đủ (mọi participant) vào match_store,
+                # ở đây chỉ rút gọn theo player
+                return await self.riot.get_match_summary(riot_id, region, match_id)
+            if self.matches is None:
+                return await self._mock_match(riot_id, match_id)
+            return await self.matches.get_or_fetch(
+                match_id,
+                lambda: self._mock_match(riot_id, match_id),
+                played_at=lambda match: match.get('timestamp')
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Lỗi lấy match {match_id}: {e}")
+            return None
+    
+    async def get_tft_match_history(self, riot_id, region='vn', limit=3, since=None):
+        """
+        Lấy lịch sử trận đấu TFT
+        
+        Lấy danh sách match_id trước, chỉ tải chi tiết các match mới hơn `since`
+        (match_id đã thấy gần nhất; None -> tải cả `limit` match).
+        """
+        match_ids = await self.get_recent_match_ids(riot_id, region, limit)
+        if since in match_ids:
+            match_ids = match_ids[:match_ids.index(since)]
+        matches = await asyncio.gather(
+            *(self.get_tft_match(riot_id, region, match_id) for match_id in match_ids)
+        )
+        return [match for match in matches if match]
+    
+    async def _mock_match_ids(self, riot_id, limit):
+        # Trong thực tế, bạn cần implement API call thật
+        # Ở đây tôi sẽ trả về dữ liệu mẫu, bạn có thể thay thế bằng API thật
+        await asyncio.sleep(0.1)  # Giả lập delay
+        return [f'{riot_id.replace("#", "_")}_{int(time.time()) - i}' for i in range(limit)]
+    
+    async def _mock_match(self, riot_id, match_id):
+        await asyncio.sleep(0.5)  # Giả lập delay
+        
+        # Tạo dữ liệu mẫu dựa trên match_id
+        import hashlib
+        import random
+        rng = random.Random(int(hashlib.md5(match_id.encode()).hexdigest()[:8], 16))
+        
+        # Tạo traits và units ngẫu nhiên
+        traits = rng.sample(['Darkin', 'Challenger', 'Juggernaut', 'Shurima', 'Ionia', 'Noxus'], 
+                            rng.randint(2, 4))
+        
+        units = rng.sample(['Aatrox', 'Kaisa', 'Warwick', 'JarvanIV', 'Nasus', 'Azir'], 
+                           rng.randint(4, 7))
+        
+        return {
+            'match_id': match_id,
+            'placement': rng.randint(1, 8),
+            'level': rng.randint(7, 10),
+            'traits': [{'name': t, 'tier': rng.randint(1, 3)} for t in traits],
+            'units': [{'name': u, 'tier': rng.randint(1, 3)} for u in units],
+            'timestamp': datetime.fromtimestamp(int(match_id.rsplit('_', 1)[1])).isoformat(),
+            'game_duration': rng.randint(1200, 1800)
+        }
+
+def open_match_store():
+    return MatchStore(
+        Config.MATCH_DB_FILE,
+        memory_entries=Config.MATCH_MEMORY_ENTRIES,
+        retention_days=Config.MATCH_RETENTION_DAYS,
+        max_per_player=Config.MATCH_MAX_PER_PLAYER
+    )
 
+# Mở cùng db trong main()
+match_store = None
 riot_api = RiotAPIService()
 
 # ========== WEB SERVER CHO HEALTHCHECK ==========
@@ -333,14 +522,14 @@ class WebServer:
         return web.json_response({
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
-            'players_tracking': len(db.get_all_players()),
+            'players_tracking': db.count_players(),
             'bot_ready': bot.is_ready() if bot else False
         })
     
     async def handle_status(self, request):
-        players = db.get_all_players()
+        players = db.get_all_players(limit=10)  # Giới hạn 10 players để hiển thị
         player_list = []
-        for p in players[:10]:  # Giới hạn 10 players để hiển thị
+        for p in players:
             player_list.append({
                 'riot_id': p['riot_id'],
                 'discord': p['discord_name'],
@@ -349,16 +538,25 @@ class WebServer:
         
         return web.json_response({
             'bot_status': 'online' if bot.is_ready() else 'offline',
-            'total_players': len(players),
+            'total_players': db.count_players(),
             'players': player_list,
-            'auto_check_running': auto_check_matches.is_running() if 'auto_check_matches' in globals() else False
+            'auto_check_running': auto_check_matches.is_running() if 'auto_check_matches' in globals() else False,
+            'poll_queue': poll_scheduler.stats() if 'poll_scheduler' in globals() else None,
+            'tracker_cache': riot_api.cache.stats(),
+            'inflight': riot_api.inflight.stats(),
+            'http_pool': http_client.stats(),
+            'match_store': match_store.stats(),
+            'notifications': notifier.stats() if 'notifier' in globals() else None,
+            'rank_refresher': rank_refresher.stats() if 'rank_refresher' in globals() else None,
+            'riot_api': riot_api.riot.stats() if riot_api.riot else None,
+            'circuit_breakers': breakers.stats()
         })
     
     async def handle_players(self, request):
         players = db.get_all_players()
         return web.json_response({
             'total': len(players),
-            'players': players
+            'players': thaw(players)
         })
     
     async def start(self):
@@ -379,9 +577,11 @@ class WebServer:
 @bot.event
 async def on_ready():
     logger.info(f'✅ Bot đã sẵn sàng: {bot.user.name}')
-    logger.info(f'📊 Đang theo dõi {len(db.get_all_players())} người chơi')
+    logger.info(f'📊 Đang theo dõi {db.count_players()} người chơi')
     
-    # Khởi động task auto check
+    # Khởi động worker gửi thông báo + task auto check
+    notifier.start()
+    rank_refresher.start()
     if not auto_check_matches.is_running():
         auto_check_matches.start()
     
@@ -389,7 +589,7 @@ async def on_ready():
     await bot.change_presence(
         activity=discord.Activity(
             type=discord.ActivityType.watching,
-            name=f"{len(db.get_all_players())} người chơi TFT"
+            name=f"{db.count_players()} người chơi TFT"
         )
     )
 
@@ -428,8 +628,8 @@ async def track_player(ctx, riot_id: str, region: str = 'vn'):
     embed.set_footer(text="Vui lòng chờ trong giây lát...")
     msg = await ctx.send(embed=embed)
     
-    # Lấy thông tin từ Tracker.gg
-    tft_stats = await riot_api.get_tft_stats_from_tracker(riot_id, region)
+    # Lấy thông tin từ Riot API / Tracker.gg
+    tft_stats = await riot_api.get_tft_stats(riot_id, region)
     
     if not tft_stats:
         embed = discord.Embed(
@@ -548,6 +748,9 @@ async def confirm_tracking(ctx, riot_id: str):
         await ctx.send(embed=embed)
         return
     
+    # Poll ngay, coi như đang hoạt động
+    poll_scheduler.add(PlayerIndex.make_account_key(session['riot_id'], session['region']), active=True)
+    
     # Xóa session
     del verification_sessions[user_id]
     
@@ -570,7 +773,7 @@ async def confirm_tracking(ctx, riot_id: str):
     
     embed.add_field(
         name="🔄 Tự động hóa",
-        value="• Bot sẽ tự động kiểm tra mỗi **3 phút**\n"
+        value=f"• Bot tự động kiểm tra mỗi **{Config.POLL_ACTIVE_INTERVAL // 60} phút** khi bạn đang chơi\n"
               "• Thông báo khi có trận TFT mới\n"
               "• Hiển thị rank và đội hình",
         inline=False
@@ -584,7 +787,7 @@ async def confirm_tracking(ctx, riot_id: str):
     await bot.change_presence(
         activity=discord.Activity(
             type=discord.ActivityType.watching,
-            name=f"{len(db.get_all_players())} người chơi TFT"
+            name=f"{db.count_players()} người chơi TFT"
         )
     )
 
@@ -648,7 +851,7 @@ async def untrack_player(ctx, riot_id: str = None):
         await bot.change_presence(
             activity=discord.Activity(
                 type=discord.ActivityType.watching,
-                name=f"{len(db.get_all_players())} người chơi TFT"
+                name=f"{db.count_players()} người chơi TFT"
             )
         )
     else:
@@ -713,12 +916,7 @@ async def force_check_now(ctx, riot_id: str = None):
         
         msg = await ctx.send(f"🔍 Đang kiểm tra {len(players)} người chơi...")
         
-        for player in players:
-            try:
-                await check_and_notify(player)
-                await asyncio.sleep(1)
-            except Exception as e:
-                logger.error(f"Lỗi force check {player['riot_id']}: {e}")
+        await run_check_pool(players, Config.POLL_CONCURRENCY)
         
         await msg.edit(content="✅ Đã kiểm tra xong tất cả người chơi!")
         return
@@ -731,7 +929,7 @@ async def force_check_now(ctx, riot_id: str = None):
         return
     
     await ctx.send(f"🔍 Đang kiểm tra **{riot_id}**...")
-    await check_and_notify(player)
+    await run_check_pool([player], 1)
     await ctx.send(f"✅ Đã kiểm tra xong **{riot_id}**!")
 
 @bot.command(name='ping')
@@ -749,15 +947,17 @@ async def ping_command(ctx):
     embed.add_field(
         name="📊 Thống kê",
         value=f"• Server: {len(bot.guilds)}\n"
-              f"• Players: {len(db.get_all_players())}\n"
-              f"• Auto-check: {'✅ Đang chạy' if auto_check_matches.is_running() else '❌ Đã dừng'}",
+              f"• Players: {db.count_players()}\n"
+              f"• Auto-check: {'✅ Đang chạy' if auto_check_matches.is_running() else '❌ Đã dừng'}\n"
+              f"• Chờ kiểm tra: {poll_scheduler.depth()}\n"
+              f"• Chờ thông báo: {notifier.depth()}",
         inline=True
     )
     
     embed.add_field(
         name="⚙️ Cài đặt",
         value=f"• Prefix: `{PREFIX}`\n"
-              f"• Kiểm tra mỗi: 3 phút\n"
+              f"• Kiểm tra mỗi: {Config.POLL_ACTIVE_INTERVAL // 60}-{Config.POLL_MAX_INTERVAL // 60} phút\n"
               f"• Web server: Port {WEB_PORT}",
         inline=True
     )
@@ -797,73 +997,248 @@ async def help_command(ctx):
     
     embed.add_field(
         name="✨ Tính năng:",
-        value="• Xác thực Riot ID thực tế\n• Tự động kiểm tra mỗi 3 phút\n• Thông báo rank và đội hình\n• Web server cho Render",
+        value="• Xác thực Riot ID thực tế\n• Tự động kiểm tra theo mức độ hoạt động\n• Thông báo rank và đội hình\n• Web server cho Render",
         inline=False
     )
     
-    embed.set_footer(text=f"Đang theo dõi {len(db.get_all_players())} người chơi")
+    embed.set_footer(text=f"Đang theo dõi {db.count_players()} người chơi")
     
     await ctx.send(embed=embed)
 
 # ========== AUTO CHECK TASK ==========
 
-@tasks.loop(minutes=3)
+poll_scheduler = PollScheduler(
+    active_interval=Config.POLL_ACTIVE_INTERVAL,
+    cooldown=Config.POLL_COOLDOWN,
+    active_window=Config.POLL_ACTIVE_WINDOW,
+    max_interval=Config.POLL_MAX_INTERVAL
+)
+
+def poll_key(player):
+    """Khóa của tài khoản trong poll_scheduler (mỗi tài khoản poll 1 lần cho mọi subscriber)"""
+    return PlayerIndex.make_account_key(player['riot_id'], player['region'])
+
+@tasks.loop(seconds=Config.POLL_TICK)
 async def auto_check_matches():
-    """Tự động kiểm tra trận đấu mới mỗi 3 phút"""
-    logger.info(f"🔄 Đang kiểm tra {len(db.get_all_players())} người chơi...")
+    """Kiểm tra các tài khoản đã đến hạn poll theo lịch riêng của từng tài khoản"""
+    # Dọn match quá hạn (tối đa 1 lần / giờ)
+    removed = match_store.maybe_compact()
+    if removed:
+        logger.info(f"🗑️ Đã xóa {removed} match cũ khỏi match store")
+    
+    players = []
+    for key in poll_scheduler.pop_due():
+        subscribers = db.get_players_by_account(*key)
+        if not subscribers:
+            # Không còn ai theo dõi tài khoản này
+            poll_scheduler.remove(key)
+        else:
+            players.extend(subscribers)
+    if not players:
+        return
     
-    players = db.get_all_players()
+    logger.info(f"🔄 Đang kiểm tra {len(players)} người chơi đến hạn...")
+    started = time.monotonic()
+    await run_check_pool(players, Config.POLL_CONCURRENCY)
+    logger.info(f"✅ Kiểm tra xong {len(players)} người chơi trong {time.monotonic() - started:.1f}s")
+
+@auto_check_matches.before_loop
+async def before_auto_check():
+    poll_scheduler.sync(poll_key(p) for p in db.get_all_players())
+
+async def run_check_pool(players, concurrency):
+    """
+    Chạy check_account qua pool worker giới hạn số lượng chạy song song
     
+    Players được gom theo tài khoản (riot_id, region): mỗi tài khoản chỉ fetch 1 lần.
+    """
+    accounts = {}
     for player in players:
-        try:
-            await check_and_notify(player)
-            await asyncio.sleep(2)  # Delay giữa các player
-        except Exception as e:
-            logger.error(f"Lỗi khi kiểm tra {player['riot_id']}: {e}")
-            continue
+        accounts.setdefault(poll_key(player), []).append(player)
+    
+    queue = asyncio.Queue()
+    for item in accounts.items():
+        queue.put_nowait(item)
+    
+    async def worker():
+        while True:
+            try:
+                key, subscribers = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            wait = breakers.retry_in(riot_api.poll_upstreams(key[1]))
+            if wait > 0:
+                # Upstream đang bị ngắt -> dời lịch thay vì chờ timeout
+                poll_scheduler.defer(key, wait)
+                continue
+            match = None
+            try:
+                # Tốc độ gọi upstream do host_limiter điều tiết, không sleep cố định
+                match = await check_account(subscribers)
+            except Exception as e:
+                logger.error(f"Lỗi khi kiểm tra {subscribers[0]['riot_id']}: {e}")
+            finally:
+                # Lên lịch lần poll sau theo hoạt động
+                poll_scheduler.record(key, match)
+    
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(accounts))))]
+    await asyncio.gather(*workers)
 
 async def check_and_notify(player):
-    """Kiểm tra và thông báo match mới"""
+    """
+    Kiểm tra và thông báo match mới
+    
+    Returns: match mới đã thông báo, None nếu không có
+    """
+    return await check_account([player])
+
+async def check_account(subscribers):
+    """
+    Kiểm tra 1 tài khoản và thông báo match mới tới mọi subscriber
+    
+    `subscribers`: các player cùng (riot_id, region). Match history và rank chỉ
+    lấy 1 lần, mỗi subscriber so với last_match_id riêng của mình.
+    
+    Returns: match mới nhất nếu có subscriber được thông báo, None nếu không
+    """
     try:
-        riot_id = player['riot_id']
-        region = player['region']
-        channel_id = int(player['channel_id'])
+        riot_id = subscribers[0]['riot_id']
+        region = subscribers[0]['region']
         
-        # Lấy channel
-        channel = bot.get_channel(channel_id)
-        if not channel:
-            logger.error(f"Channel {channel_id} không tồn tại")
-            return
+        # Bước 1: chỉ lấy match_id mới nhất (1 lần cho cả tài khoản)
+        match_ids = await riot_api.get_recent_match_ids(riot_id, region, limit=1)
         
-        # Lấy match history
-        matches = await riot_api.get_tft_match_history(riot_id, region, limit=1)
+        if not match_ids:
+            return None
         
-        if not matches:
-            return
+        match_id = match_ids[0]
         
-        latest_match = matches[0]
-        match_id = latest_match.get('match_id')
+        # Chỉ những subscriber chưa được thông báo match này
+        pending = [p for p in subscribers if p.get('last_match_id') != match_id]
+        if not pending:
+            return None
         
-        # Kiểm tra xem đã thông báo match này chưa
-        if player.get('last_match_id') == match_id:
-            return
+        # Bước 2: có match chưa thấy -> mới tải chi tiết
+        latest_match = await riot_api.get_tft_match(riot_id, region, match_id)
+        if not latest_match:
+            return None
         
-        # Cập nhật last match
-        db.update_last_match(
-            player['discord_id'],
-            riot_id,
-            match_id,
-            latest_match.get('timestamp')
-        )
+        # Rank: dùng snapshot đang có trong cache, không gọi upstream trên đường
+        # gửi thông báo
+        tft_stats = riot_api.peek_tft_stats(riot_id, region)
+        
+        notifications = []
+        for player in pending:
+            try:
+                # Lấy channel
+                channel_id = int(player['channel_id'])
+                channel = bot.get_channel(channel_id)
+                if not channel:
+                    logger.error(f"Channel {channel_id} không tồn tại")
+                    continue
+                
+                # Cập nhật last match
+                db.update_last_match(
+                    player['discord_id'],
+                    player['riot_id'],
+                    match_id,
+                    latest_match.get('timestamp')
+                )
+                
+                # Gửi thông báo
+                notification = await send_match_notification(channel, player, latest_match, tft_stats)
+                if notification:
+                    notifications.append(notification)
+            except Exception as e:
+                logger.error(f"Lỗi thông báo {player['riot_id']} cho {player['discord_id']}: {e}")
         
-        # Gửi thông báo
-        await send_match_notification(channel, player, latest_match)
+        # Snapshot cũ hơn trận (chưa tính LP) -> làm mới ở background, có rank
+        # sau trận thì sửa lại các thông báo vừa gửi
+        if not rank_is_fresh(tft_stats, latest_match):
+            rank_refresher.request(
+                riot_id, region,
+                lambda new_stats: update_notified_rank(notifications, latest_match, new_stats)
+            )
+        
+        return latest_match
         
     except Exception as e:
         logger.error(f"Lỗi check_and_notify: {e}")
+        return None
+
+async def deliver_notification(batch):
+    """Gửi 1 batch thông báo thành 1 tin nhắn nhiều embed (chạy trong worker của notifier)"""
+    channel = bot.get_channel(batch.channel_id)
+    if channel is None:
+        raise LookupError(f"Channel {batch.channel_id} không tồn tại")
+    return await channel.send(batch.content, embeds=batch.embeds)
+
+async def edit_notification(batch):
+    """Sửa tin nhắn đã gửi theo embed hiện tại của batch (vd: rank sau trận)"""
+    await batch.message.edit(embeds=batch.embeds)
 
-async def send_match_notification(channel, player, match_data):
-    """Gửi thông báo trận đấu mới"""
+async def update_notified_rank(notifications, match_data, tft_stats):
+    """Rank sau trận đã có -> thay dòng rank trong các thông báo của trận đó"""
+    if not rank_is_fresh(tft_stats, match_data) or 'error' in tft_stats:
+        return
+    line = f"{RANK_LINE}{current_rank_text(tft_stats, match_data)}"
+    for notification in notifications:
+        embed = notification.embed
+        embed.description = '\n'.join(
+            line if text.startswith(RANK_LINE) else text
+            for text in embed.description.split('\n')
+        )
+    edited = await notifier.update(notifications)
+    if edited:
+        logger.info(f"✏️ Đã cập nhật rank sau trận trong {edited} tin nhắn: {tft_stats['rank']}")
+
+def is_retryable(error):
+    """Lỗi gửi Discord tạm thời (429, 5xx, mạng) thì gửi lại; thiếu quyền / mất channel thì thôi"""
+    if isinstance(error, (discord.Forbidden, discord.NotFound)):
+        return False
+    if isinstance(error, discord.HTTPException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError, OSError))
+
+# Rank sau trận mới được lấy lại ở background, không chặn thông báo
+rank_refresher = RankRefresher(
+    lambda riot_id, region: riot_api.get_tft_stats(riot_id, region, fresh=True),
+    workers=Config.RANK_REFRESH_WORKERS,
+    delay=Config.RANK_REFRESH_DELAY
+)
+
+notifier = NotificationQueue(
+    deliver_notification,
+    workers=Config.NOTIFY_WORKERS,
+    max_size=Config.NOTIFY_QUEUE_SIZE,
+    channel_rate=Config.DISCORD_CHANNEL_RATE,
+    global_rate=Config.DISCORD_GLOBAL_RATE,
+    max_retries=Config.NOTIFY_MAX_RETRIES,
+    retryable=is_retryable,
+    batch_window=Config.NOTIFY_BATCH_WINDOW,
+    edit=edit_notification
+)
+
+RANK_LINE = "**📊 Rank hiện tại:** "
+
+def current_rank_text(tft_stats, match_data):
+    """Rank từ snapshot; chưa tính trận này thì ghi rõ là rank trước trận"""
+    if not tft_stats:
+        return "Đang cập nhật"
+    if rank_is_fresh(tft_stats, match_data):
+        return tft_stats['rank']
+    return f"{tft_stats['rank']} (trước trận)"
+
+async def send_match_notification(channel, player, match_data, tft_stats=None):
+    """
+    Gửi thông báo trận đấu mới
+    
+    `tft_stats`: snapshot rank lấy từ lượt poll (không gọi lại upstream ở đây);
+    None -> hiển thị "Đang cập nhật", rank sau trận được sửa vào sau
+    (update_notified_rank).
+    
+    Returns: Notification đã xếp hàng, None nếu lỗi
+    """
     try:
         riot_id = player['riot_id']
         settings = player.get('settings', {})
@@ -891,15 +1266,11 @@ async def send_match_notification(channel, player, match_data):
             emoji = "📉"
             result = f"**TOP {placement} - Cần cố gắng hơn!** 💪"
         
-        # Lấy lại rank hiện tại từ Tracker.gg
-        tft_stats = await riot_api.get_tft_stats_from_tracker(riot_id, player['region'])
-        current_rank = tft_stats['rank'] if tft_stats else "Đang cập nhật"
-        
         # Tạo embed
         embed = discord.Embed(
             title=f"{emoji} {riot_id} vừa hoàn thành trận TFT!",
             description=f"{result}\n\n"
-                       f"**📊 Rank hiện tại:** {current_rank}\n"
+                       f"{RANK_LINE}{current_rank_text(tft_stats, match_data)}\n"
                        f"**🎮 Level trong trận:** {level}\n"
                        f"**⏰ Thời gian:** <t:{int(datetime.now().timestamp())}:R>",
             color=color,
@@ -949,17 +1320,26 @@ async def send_match_notification(channel, player, match_data):
             icon_url=bot.user.avatar.url if bot.user.avatar else None
         )
         
-        # Gửi thông báo
-        await channel.send(mention, embed=embed)
-        logger.info(f"✅ Đã thông báo match mới của {riot_id}")
+        # Đưa vào hàng đợi, worker của notifier gửi (poller không chờ Discord)
+        notification = Notification(channel.id, mention, embed, label=riot_id)
+        await notifier.submit(notification)
+        logger.info(f"📨 Đã xếp hàng thông báo match mới của {riot_id}")
+        return notification
         
     except Exception as e:
         logger.error(f"Lỗi send_match_notification: {e}")
+        return None
 
 # ========== MAIN FUNCTION ==========
 
 async def main():
     """Hàm chính khởi động bot và web server"""
+    global db, match_store
+    # Mở database + match store (đóng ở finally bên dưới)
+    db = open_database(Config.DB_FILE)
+    match_store = open_match_store()
+    riot_api.use_match_store(match_store)
+    
     # Khởi động web server
     web_server = WebServer(port=WEB_PORT)
     await web_server.start()
@@ -977,9 +1357,14 @@ async def main():
         logger.error(f"❌ Lỗi khởi động bot: {e}")
     finally:
         # Dọn dẹp
+        await notifier.stop()
+        await rank_refresher.stop()
         await bot.close()
         await web_server.stop()
-        await riot_api.close()
+        await http_client.close()
+        # close() tự flush (có timeout), không gọi flush() không giới hạn ở đây
+        db.close()
+        match_store.close()
         logger.info("✅ Bot đã dừng")
 
 if __name__ == "__main__":
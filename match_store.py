@@ -0,0 +1,258 @@
+import json
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_id   TEXT PRIMARY KEY,
+    played_at  TEXT,
+    stored_at  REAL NOT NULL,
+    size       INTEGER NOT NULL,
+    payload    BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS player_matches (
+    riot_key   TEXT NOT NULL,
+    region     TEXT NOT NULL DEFAULT '',
+    match_id   TEXT NOT NULL,
+    played_at  TEXT,
+    summary    BLOB,
+    PRIMARY KEY (riot_key, region, match_id)
+);
+CREATE INDEX IF NOT EXISTS idx_player_matches_recent ON player_matches (riot_key, region, played_at DESC);
+CREATE INDEX IF NOT EXISTS idx_player_matches_match ON player_matches (match_id);
+"""
+
+
+def encode_payload(value):
+    """dict -> JSON gọn + zlib"""
+    raw = json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    return zlib.compress(raw, 6), len(raw)
+
+
+def decode_payload(blob):
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+def _account(riot_id, region):
+    return riot_id.strip().lower(), (region or '').strip().lower()
+
+
+class MatchStore:
+    """
+    Kho match đã kết thúc trên đĩa (SQLite), khóa theo match_id
+
+    Match đã kết thúc không đổi nên mỗi match chỉ cần tải từ upstream 1 lần:
+    - `matches`: payload upstream của match (vd: tft-match-v1 đầy đủ mọi
+      participant), JSON nén zlib, phía trước là LRU trong bộ nhớ
+      (`memory_entries` match đã decode)
+    - `player_matches`: danh sách match_id theo thời gian của mỗi tài khoản
+      (riot_id, region), kèm bản rút gọn theo player (dạng match_summary)
+    - compact(): giữ tối đa `max_per_player` match mỗi tài khoản, bỏ match
+      cũ hơn `retention_days`, xóa payload không còn tài khoản nào trỏ tới
+    Giá trị trả về là object dùng chung, caller không được sửa.
+    """
+
+    def __init__(self, db_file='tft_matches.db', memory_entries=512,
+                 retention_days=90, max_per_player=200, compact_interval=3600,
+                 clock=time.time):
+        self.file_path = db_file
+        self.memory_entries = memory_entries
+        self.retention_days = retention_days
+        self.max_per_player = max_per_player
+        self.compact_interval = compact_interval
+        self.clock = clock
+
+        self.conn = sqlite3.connect(db_file, isolation_level=None, check_same_thread=False)
+        # auto_vacuum chỉ có hiệu lực khi tạo file mới (trước khi tạo bảng)
+        self.conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+        self._memory = OrderedDict()
+        self._last_compact = self.clock()
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stored': 0,
+            'raw_bytes': 0,
+            'stored_bytes': 0,
+            'compactions': 0
+        }
+
+    def _migrate(self):
+        """Thêm cột mới cho file tạo từ phiên bản cũ"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(player_matches)')}
+        if 'summary' not in columns:
+            self.conn.execute('ALTER TABLE player_matches ADD COLUMN summary BLOB')
+
+    # ========== MATCH ==========
+
+    def get(self, match_id):
+        """Payload của match (LRU -> đĩa), None nếu chưa có"""
+        value = self._memory.get(match_id)
+        if value is not None:
+            self._memory.move_to_end(match_id)
+            self.counters['memory_hits'] += 1
+            return value
+        row = self.conn.execute('SELECT payload FROM matches WHERE match_id = ?', (match_id,)).fetchone()
+        if row is None:
+            self.counters['misses'] += 1
+            return None
+        self.counters['disk_hits'] += 1
+        value = decode_payload(row[0])
+        self._remember(match_id, value)
+        return value
+
+    def put(self, match_id, value, played_at=None):
+        """Lưu match (ghi đè nếu đã có: cùng match_id thì cùng nội dung)"""
+        blob, raw_size = encode_payload(value)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO matches (match_id, played_at, stored_at, size, payload) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (match_id, played_at, self.clock(), raw_size, blob)
+        )
+        self.counters['stored'] += 1
+        self.counters['raw_bytes'] += raw_size
+        self.counters['stored_bytes'] += len(blob)
+        self._remember(match_id, value)
+
+    async def get_or_fetch(self, match_id, fetch, played_at=None):
+        """
+        Đọc qua kho: chưa có thì gọi `fetch()` (coroutine) và lưu lại
+
+        Kết quả None (lỗi / không tìm thấy) không được lưu.
+        `played_at`: hàm lấy thời gian trận từ payload (để compact theo tuổi).
+        """
+        value = self.get(match_id)
+        if value is not None:
+            return value
+        value = await fetch()
+        if value is not None:
+            self.put(match_id, value, played_at(value) if played_at else None)
+        return value
+
+    def _remember(self, match_id, value):
+        self._memory[match_id] = value
+        self._memory.move_to_end(match_id)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # ========== DANH SÁCH MATCH THEO TÀI KHOẢN ==========
+
+    def add_player_match(self, riot_id, region, match_id, played_at=None, summary=None):
+        """
+        Ghi match vào danh sách của tài khoản; trả về True nếu là match mới
+
+        `summary`: match rút gọn theo player (dạng match_summary), đọc lại qua recent_matches()
+        """
+        account = _account(riot_id, region)
+        blob = encode_payload(summary)[0] if summary is not None else None
+        cursor = self.conn.execute(
+            'INSERT OR IGNORE INTO player_matches (riot_key, region, match_id, played_at, summary) '
+            'VALUES (?, ?, ?, ?, ?)',
+            account + (match_id, played_at, blob)
+        )
+        if cursor.rowcount > 0:
+            return True
+        if blob is not None:
+            self.conn.execute(
+                'UPDATE player_matches SET summary = ? '
+                'WHERE riot_key = ? AND region = ? AND match_id = ? AND summary IS NULL',
+                (blob,) + account + (match_id,)
+            )
+        return False
+
+    def match_ids(self, riot_id, region, limit=20):
+        """match_id của tài khoản, mới nhất trước"""
+        rows = self.conn.execute(
+            'SELECT match_id FROM player_matches WHERE riot_key = ? AND region = ? '
+            'ORDER BY played_at DESC LIMIT ?',
+            _account(riot_id, region) + (limit,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def recent_matches(self, riot_id, region, limit=20):
+        """
+        Các match gần nhất của tài khoản, dạng rút gọn theo player (match_summary)
+
+        Không trả payload upstream: 1 payload tft-match-v1 chứa cả 8 người chơi,
+        chỉ bản rút gọn mới có match_id / placement / timestamp của tài khoản.
+        """
+        rows = self.conn.execute(
+            'SELECT summary FROM player_matches WHERE riot_key = ? AND region = ? '
+            'AND summary IS NOT NULL ORDER BY played_at DESC LIMIT ?',
+            _account(riot_id, region) + (limit,)
+        ).fetchall()
+        return [decode_payload(row[0]) for row in rows]
+
+    # ========== RETENTION ==========
+
+    def maybe_compact(self):
+        """Chạy compact() nếu đã quá `compact_interval` giây kể từ lần trước"""
+        if self.clock() - self._last_compact < self.compact_interval:
+            return None
+        return self.compact()
+
+    def compact(self):
+        """Áp dụng chính sách giữ lại, trả về số match đã xóa"""
+        self._last_compact = self.clock()
+        expire = self.clock() - self.retention_days * 86400
+        cutoff = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(expire))
+        try:
+            self.conn.execute('BEGIN')
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS dropped (match_id TEXT)')
+            self.conn.execute('DELETE FROM dropped')
+            # Match quá cũ + match ngoài max_per_player match mới nhất của mỗi tài khoản
+            self.conn.execute(
+                'INSERT INTO dropped SELECT match_id FROM ('
+                ' SELECT match_id, played_at, ROW_NUMBER() OVER ('
+                '  PARTITION BY riot_key, region ORDER BY played_at DESC) AS n'
+                ' FROM player_matches) WHERE n > ? OR played_at < ?',
+                (self.max_per_player, cutoff)
+            )
+            self.conn.execute(
+                'DELETE FROM player_matches WHERE played_at < ? OR rowid IN ('
+                ' SELECT rowid FROM ('
+                '  SELECT rowid, ROW_NUMBER() OVER ('
+                '   PARTITION BY riot_key, region ORDER BY played_at DESC) AS n'
+                '  FROM player_matches) WHERE n > ?)',
+                (cutoff, self.max_per_player)
+            )
+            # Payload không còn tài khoản nào trỏ tới: vừa bị loại ở trên, hoặc
+            # chưa từng gắn với tài khoản nào (vd: get_match_details) và đã quá hạn
+            removed = self.conn.execute(
+                'DELETE FROM matches WHERE (match_id IN (SELECT match_id FROM dropped) OR stored_at < ?) '
+                'AND match_id NOT IN (SELECT match_id FROM player_matches)',
+                (expire,)
+            ).rowcount
+            self.conn.execute('COMMIT')
+        except Exception as e:
+            self.conn.execute('ROLLBACK')
+            print(f"❌ Lỗi compact match store: {e}")
+            return 0
+        # Trả lại các trang trống cho hệ điều hành
+        self.conn.execute('PRAGMA incremental_vacuum')
+        if removed:
+            self._memory.clear()
+        self.counters['compactions'] += 1
+        return removed
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception as e:
+            print(f"❌ Lỗi đóng match store: {e}")
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['memory_entries'] = len(self._memory)
+        stats['matches'] = self.conn.execute('SELECT COUNT(*) FROM matches').fetchone()[0]
+        if stats['stored_bytes']:
+            stats['compression_ratio'] = round(stats['raw_bytes'] / stats['stored_bytes'], 2)
+        return stats
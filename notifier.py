@@ -0,0 +1,315 @@
+import asyncio
+import time
+
+from hedging import LatencyTracker
+from rate_limit import TokenBucket
+
+
+class Notification:
+    """1 tin nhắn chờ gửi vào 1 channel Discord (`batch`: batch chứa nó sau khi gom)"""
+
+    __slots__ = ('channel_id', 'content', 'embed', 'label', 'enqueued_at', 'attempts', 'batch')
+
+    def __init__(self, channel_id, content=None, embed=None, label=''):
+        self.channel_id = channel_id
+        self.content = content
+        self.embed = embed
+        self.label = label
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+        self.batch = None
+
+    @property
+    def size(self):
+        """Số ký tự của embed (Discord giới hạn tổng 6000 ký tự / tin nhắn)"""
+        try:
+            return len(self.embed) if self.embed is not None else 0
+        except TypeError:
+            return 0
+
+
+class NotificationBatch:
+    """
+    Các thông báo cùng channel gộp thành 1 tin nhắn (nhiều embed, gộp mention)
+
+    `message`: giá trị send() trả về (vd: discord.Message) sau khi gửi xong.
+    """
+
+    __slots__ = ('channel_id', 'notifications', 'attempts', 'message')
+
+    def __init__(self, channel_id, notifications):
+        self.channel_id = channel_id
+        self.notifications = notifications
+        self.attempts = 0
+        self.message = None
+        for notification in notifications:
+            notification.batch = self
+
+    def __len__(self):
+        return len(self.notifications)
+
+    @property
+    def label(self):
+        return ', '.join(n.label for n in self.notifications)
+
+    @property
+    def content(self):
+        """Nội dung các thông báo (mention), bỏ trùng, giữ thứ tự"""
+        parts = dict.fromkeys(
+            part for n in self.notifications if n.content for part in n.content.split()
+        )
+        return ' '.join(parts) or None
+
+    @property
+    def embeds(self):
+        return [n.embed for n in self.notifications if n.embed is not None]
+
+
+class NotificationQueue:
+    """
+    Hàng đợi thông báo + worker gửi riêng, tách khỏi vòng poll
+
+    - Poller chỉ submit() rồi đi tiếp; `workers` task gửi tin song song
+    - Giới hạn tốc độ theo bucket của Discord: mỗi channel `channel_rate`
+      tin / `channel_per` giây, toàn bot `global_rate` request / giây
+    - Lỗi tạm thời (`retryable(error)` True) được gửi lại tối đa
+      `max_retries` lần, chờ lũy thừa 2 (hoặc theo `retry_after` của lỗi)
+    - Thông báo cùng channel trong `batch_window` giây được gộp thành 1 tin
+      nhắn (tối đa `batch_size` embed, `batch_chars` ký tự embed)
+    - Hàng đợi giới hạn `max_size` tin: đầy thì submit() chờ (backpressure)
+    - `send(batch)`: coroutine gửi thật 1 NotificationBatch (vd: channel.send),
+      trả về tin nhắn đã gửi
+    - `edit(batch)`: coroutine sửa tin nhắn đã gửi theo embed hiện tại của
+      batch (vd: message.edit), dùng cho update()
+    """
+
+    def __init__(self, send, workers=4, max_size=1000, channel_rate=5, channel_per=5,
+                 global_rate=50, max_retries=3, retry_base=1.0, retryable=lambda error: True,
+                 batch_window=1.0, batch_size=10, batch_chars=6000, edit=None):
+        self.send = send
+        self.edit = edit
+        self.workers = workers
+        self.max_size = max_size
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.batch_chars = batch_chars
+        self.channel_rate = channel_rate
+        self.channel_per = channel_per
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retryable = retryable
+
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self._channel_buckets = {}
+        self._queue = None
+        self._tasks = []
+        self._retry_handles = set()
+        # Thông báo đang gom theo channel + task gửi khi hết batch_window
+        self._pending = {}
+        self._flush_tasks = {}
+
+        # Thời gian từ lúc submit tới lúc gửi xong / thời gian 1 lần gọi send()
+        self.queue_latency = LatencyTracker(size=500, default=0.0, min_samples=1)
+        self.send_latency = LatencyTracker(size=500, default=0.0, min_samples=1)
+        self.counters = {
+            'submitted': 0,
+            'sent': 0,
+            'messages': 0,
+            'retried': 0,
+            'failed': 0,
+            'dropped': 0,
+            'edited': 0,
+            'edit_failed': 0
+        }
+        self.in_flight = 0
+
+    # ========== VÒNG ĐỜI ==========
+
+    @property
+    def running(self):
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """Tạo worker (gọi trong event loop, gọi lại khi đang chạy thì bỏ qua)"""
+        if self.running:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self, timeout=10):
+        """Gửi nốt tin đang chờ + đang chờ gửi lại (tối đa `timeout` giây) rồi dừng worker"""
+        for channel_id in list(self._pending):
+            await self._flush(channel_id)
+        if self._queue is not None and self.running:
+            try:
+                await asyncio.wait_for(self._drain(), timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Dừng notifier khi còn "
+                      f"{self._queue.qsize() + len(self._retry_handles)} thông báo chưa gửi")
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _drain(self):
+        while True:
+            await self._queue.join()
+            if not self._retry_handles:
+                return
+            await asyncio.sleep(self.retry_base)
+
+    # ========== GỬI ==========
+
+    async def submit(self, notification):
+        """
+        Gom thông báo theo channel; batch được đưa vào hàng đợi khi đủ
+        `batch_size` / `batch_chars` hoặc hết `batch_window` (chờ nếu hàng đợi đầy)
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        self.counters['submitted'] += 1
+        channel_id = notification.channel_id
+
+        pending = self._pending.get(channel_id)
+        if pending and sum(n.size for n in pending) + notification.size > self.batch_chars:
+            await self._flush(channel_id)
+        pending = self._pending.setdefault(channel_id, [])
+        pending.append(notification)
+
+        if len(pending) >= self.batch_size or self.batch_window <= 0:
+            await self._flush(channel_id)
+        elif channel_id not in self._flush_tasks:
+            self._flush_tasks[channel_id] = asyncio.create_task(self._flush_later(channel_id))
+
+    async def _flush_later(self, channel_id):
+        await asyncio.sleep(self.batch_window)
+        self._flush_tasks.pop(channel_id, None)
+        await self._flush(channel_id)
+
+    async def _flush(self, channel_id):
+        """Đưa các thông báo đang gom của channel vào hàng đợi thành 1 batch"""
+        task = self._flush_tasks.pop(channel_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        notifications = self._pending.pop(channel_id, None)
+        if notifications:
+            await self._queue.put(NotificationBatch(channel_id, notifications))
+
+    def _bucket(self, channel_id):
+        bucket = self._channel_buckets.get(channel_id)
+        if bucket is None:
+            bucket = TokenBucket(self.channel_rate / self.channel_per, self.channel_rate)
+            self._channel_buckets[channel_id] = bucket
+        return bucket
+
+    async def _worker(self, index):
+        while True:
+            batch = await self._queue.get()
+            try:
+                await self._deliver(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Lỗi notifier worker {index}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, batch):
+        await self._bucket(batch.channel_id).acquire()
+        await self.global_bucket.acquire()
+
+        batch.attempts += 1
+        self.in_flight += len(batch)
+        started = time.monotonic()
+        try:
+            batch.message = await self.send(batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._failed(batch, e)
+            return
+        finally:
+            self.in_flight -= len(batch)
+            self.send_latency.record(time.monotonic() - started)
+
+        now = time.monotonic()
+        self.counters['messages'] += 1
+        self.counters['sent'] += len(batch)
+        for notification in batch.notifications:
+            self.queue_latency.record(now - notification.enqueued_at)
+
+    def _failed(self, batch, error):
+        if batch.attempts > self.max_retries or not self.retryable(error):
+            self.counters['failed'] += len(batch)
+            print(f"❌ Không gửi được thông báo {batch.label} "
+                  f"sau {batch.attempts} lần: {error}")
+            return
+        retry_after = getattr(error, 'retry_after', None)
+        delay = retry_after if retry_after else self.retry_base * (2 ** (batch.attempts - 1))
+        self.counters['retried'] += 1
+        handle = None
+
+        def requeue():
+            self._retry_handles.discard(handle)
+            try:
+                self._queue.put_nowait(batch)
+            except asyncio.QueueFull:
+                self.counters['dropped'] += len(batch)
+                print(f"⚠️ Hàng đợi thông báo đầy, bỏ thông báo {batch.label}")
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    async def update(self, notifications):
+        """
+        Embed của `notifications` vừa được sửa tại chỗ: tin chưa gửi sẽ gửi bản
+        mới, tin đã gửi được sửa lại (mỗi tin nhắn 1 lần, chung giới hạn tốc độ)
+
+        Trả về số tin nhắn đã sửa.
+        """
+        if self.edit is None:
+            return 0
+        batches = {
+            id(n.batch): n.batch for n in notifications
+            if n.batch is not None and n.batch.message is not None
+        }
+        edited = 0
+        for batch in batches.values():
+            await self._bucket(batch.channel_id).acquire()
+            await self.global_bucket.acquire()
+            try:
+                await self.edit(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters['edit_failed'] += 1
+                print(f"❌ Không sửa được thông báo {batch.label}: {e}")
+                continue
+            edited += 1
+        self.counters['edited'] += edited
+        return edited
+
+    # ========== THỐNG KÊ ==========
+
+    def depth(self):
+        """Số batch trong hàng đợi + số thông báo đang gom"""
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + sum(len(pending) for pending in self._pending.values())
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['depth'] = self.depth()
+        stats['max_size'] = self.max_size
+        stats['avg_batch'] = round(stats['sent'] / stats['messages'], 2) if stats['messages'] else 0.0
+        stats['in_flight'] = self.in_flight
+        stats['retry_pending'] = len(self._retry_handles)
+        stats['workers'] = sum(1 for task in self._tasks if not task.done())
+        stats['queue_latency_p50'] = round(self.queue_latency.percentile(50), 3)
+        stats['queue_latency_p95'] = round(self.queue_latency.percentile(95), 3)
+        stats['send_latency_p50'] = round(self.send_latency.percentile(50), 3)
+        stats['send_latency_p95'] = round(self.send_latency.percentile(95), 3)
+        return stats
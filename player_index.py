@@ -0,0 +1,120 @@
+class PlayerIndex:
+    """Chỉ mục in-memory cho danh sách players (tra cứu O(1))"""
+
+    def __init__(self, players=None):
+        # riot_id / region trong khóa được chuẩn hóa như nhau: strip().lower()
+        # Khóa chính: (discord_id, riot_id) -> player
+        self._by_key = {}
+        # Chỉ mục phụ: discord_id -> {riot_id: player}
+        self._by_discord = {}
+        # Chỉ mục phụ: (riot_id, region) -> {discord_id: player}
+        self._by_account = {}
+
+        for player in players or []:
+            self.add(player)
+
+    @staticmethod
+    def make_key(discord_id, riot_id):
+        """Tạo khóa chính (riot_id chuẩn hóa giống make_account_key)"""
+        return (discord_id, riot_id.strip().lower())
+
+    @staticmethod
+    def make_account_key(riot_id, region):
+        """Tạo khóa theo tài khoản (riot_id, region) đã chuẩn hóa"""
+        return (riot_id.strip().lower(), (region or '').strip().lower())
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def __iter__(self):
+        return iter(self._by_key.values())
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    def all(self):
+        """Lấy tất cả players (theo thứ tự thêm vào)"""
+        return list(self._by_key.values())
+
+    def add(self, player):
+        """Thêm player, trả về False nếu đã tồn tại"""
+        key = self.make_key(player['discord_id'], player['riot_id'])
+        if key in self._by_key:
+            return False
+
+        self._by_key[key] = player
+        self._link(key, player)
+        return True
+
+    def remove(self, discord_id, riot_id):
+        """Xóa player, trả về player đã xóa hoặc None"""
+        key = self.make_key(discord_id, riot_id)
+        player = self._by_key.pop(key, None)
+        if player is not None:
+            self._unlink(key, player)
+        return player
+
+    def get(self, discord_id, riot_id):
+        """Tìm player theo khóa chính"""
+        return self._by_key.get(self.make_key(discord_id, riot_id))
+
+    def by_discord(self, discord_id):
+        """Lấy tất cả players của một Discord user"""
+        return list(self._by_discord.get(discord_id, {}).values())
+
+    def by_account(self, riot_id, region):
+        """Lấy tất cả subscriptions của một tài khoản (riot_id, region)"""
+        return list(self._by_account.get(self.make_account_key(riot_id, region), {}).values())
+
+    def accounts(self):
+        """Duyệt (account_key, [players]) theo từng tài khoản"""
+        for account_key, subscribers in self._by_account.items():
+            yield account_key, list(subscribers.values())
+
+    def update(self, discord_id, riot_id, **fields):
+        """Cập nhật field của player và giữ các chỉ mục nhất quán"""
+        key = self.make_key(discord_id, riot_id)
+        player = self._by_key.get(key)
+        if player is None:
+            return None
+
+        if not fields.keys() & {'discord_id', 'riot_id', 'region'}:
+            player.update(fields)
+            return player
+
+        # Field thuộc khóa thay đổi -> tháo ra, cập nhật rồi gắn lại
+        new_key = self.make_key(
+            fields.get('discord_id', player['discord_id']),
+            fields.get('riot_id', player['riot_id'])
+        )
+        if new_key != key and new_key in self._by_key:
+            return None
+
+        del self._by_key[key]
+        self._unlink(key, player)
+        player.update(fields)
+        self._by_key[new_key] = player
+        self._link(new_key, player)
+        return player
+
+    def _link(self, key, player):
+        discord_id, riot_lower = key
+        self._by_discord.setdefault(discord_id, {})[riot_lower] = player
+
+        account_key = self.make_account_key(player['riot_id'], player.get('region'))
+        self._by_account.setdefault(account_key, {})[discord_id] = player
+
+    def _unlink(self, key, player):
+        discord_id, riot_lower = key
+        owned = self._by_discord.get(discord_id)
+        if owned is not None:
+            owned.pop(riot_lower, None)
+            if not owned:
+                del self._by_discord[discord_id]
+
+        account_key = self.make_account_key(player['riot_id'], player.get('region'))
+        subscribers = self._by_account.get(account_key)
+        if subscribers is not None:
+            subscribers.pop(discord_id, None)
+            if not subscribers:
+                del self._by_account[account_key]
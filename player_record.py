@@ -0,0 +1,302 @@
+import sys
+from collections.abc import Mapping
+from operator import attrgetter
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class _Absent:
+    """Đánh dấu key không có trong bản ghi JSON gốc"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<absent>'
+
+
+ABSENT = _Absent()
+
+
+def now_epoch():
+    """Thời điểm hiện tại (giờ local, như datetime.now()) dạng epoch microseconds"""
+    return (datetime.now() - _EPOCH) // _MICROSECOND
+
+
+def epoch_to_iso(value):
+    """epoch microseconds -> chuỗi ISO-8601 giống datetime.isoformat()"""
+    return (_EPOCH + timedelta(microseconds=value)).isoformat()
+
+
+def iso_to_epoch(value):
+    """
+    Chuỗi ISO-8601 (không timezone) -> epoch microseconds
+
+    Trả về None nếu không chuyển ngược lại đúng chuỗi gốc được
+    (có timezone, sai định dạng, ...), khi đó giữ nguyên chuỗi.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        return None
+    epoch = (dt - _EPOCH) // _MICROSECOND
+    return epoch if epoch_to_iso(epoch) == value else None
+
+
+def _set_time(player, key, value):
+    """Gán field thời gian nếu chuyển sang epoch được"""
+    epoch = iso_to_epoch(value)
+    if epoch is None:
+        return False
+    setattr(player, key, epoch)
+    return True
+
+
+# ========== BITFIELD ==========
+# Mỗi cờ có 1 bit "có key" và 1 bit giá trị để chuyển đổi không mất dữ liệu
+VERIFIED_SET = 1 << 0
+VERIFIED = 1 << 1
+SETTINGS_SET = 1 << 2
+STATS_SET = 1 << 3
+TOTAL_NOTIFIED_SET = 1 << 4
+
+SETTING_BITS = {
+    # key: (bit có key, bit giá trị)
+    'auto_notify': (1 << 5, 1 << 6),
+    'mention_on_notify': (1 << 7, 1 << 8),
+    'include_ai': (1 << 9, 1 << 10),
+}
+SETTING_MASK = 0
+for _present, _value in SETTING_BITS.values():
+    SETTING_MASK |= _present | _value
+
+STRING_FIELDS = ('discord_id', 'discord_name', 'riot_id', 'region', 'channel_id', 'last_match_id')
+INTERNED_FIELDS = ('discord_id', 'region', 'channel_id')
+TIME_FIELDS = ('added_at', 'last_checked', 'verified_at')
+KEY_ORDER = (
+    'discord_id', 'discord_name', 'riot_id', 'region', 'channel_id', 'verified',
+    'added_at', 'last_checked', 'last_match_id', 'settings', 'stats', 'verified_at'
+)
+
+
+class Player(Mapping):
+    """
+    Bản ghi player gọn (__slots__)
+
+    - Thời gian lưu dạng epoch microseconds (int)
+    - region / discord_id / channel_id được intern
+    - settings (auto_notify, mention_on_notify, include_ai) + verified gói trong `flags`
+    - Đọc như dict theo layout JSON cũ (player['riot_id'], player.get(...));
+      settings/stats trả về dict mới, chỉ sửa qua set()/set_setting()
+    - Key lạ hoặc giá trị không gói được nằm nguyên trong `extra`
+    """
+
+    __slots__ = (
+        'discord_id', 'discord_name', 'riot_id', 'region', 'channel_id', 'last_match_id',
+        'added_at', 'last_checked', 'verified_at', 'last_notified', 'total_notified',
+        'flags', 'extra'
+    )
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, ABSENT)
+        self.flags = 0
+        self.extra = None
+
+    # ========== CHUYỂN ĐỔI ==========
+
+    @classmethod
+    def from_dict(cls, data):
+        """Tạo Player từ dict layout JSON"""
+        if isinstance(data, Player):
+            return data
+        player = cls()
+        for key, value in data.items():
+            player.set(key, value)
+        return player
+
+    def to_dict(self):
+        """Chuyển về dict layout JSON (không mất dữ liệu)"""
+        return {key: self._get(key) for key in self}
+
+    def copy(self):
+        """
+        Bản copy độc lập, rẻ hơn to_dict() nhiều (chỉ chép slot)
+
+        Giá trị trong `extra` chỉ bị thay (set()), không bị sửa tại chỗ nên copy nông là đủ.
+        """
+        player = Player.__new__(Player)
+        (player.discord_id, player.discord_name, player.riot_id, player.region,
+         player.channel_id, player.last_match_id, player.added_at, player.last_checked,
+         player.verified_at, player.last_notified, player.total_notified,
+         player.flags, player.extra) = _slot_values(self)
+        if player.extra:
+            player.extra = dict(player.extra)
+        return player
+
+    # ========== MAPPING (CHỈ ĐỌC) ==========
+
+    def __getitem__(self, key):
+        value = self._get(key)
+        if value is ABSENT:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        if self.extra and key in self.extra:
+            return True
+        if key in STRING_FIELDS or key in TIME_FIELDS:
+            return getattr(self, key) is not ABSENT
+        if key == 'verified':
+            return bool(self.flags & VERIFIED_SET)
+        if key == 'settings':
+            return bool(self.flags & SETTINGS_SET)
+        if key == 'stats':
+            return bool(self.flags & STATS_SET)
+        return False
+
+    def __iter__(self):
+        for key in KEY_ORDER:
+            if key in self:
+                yield key
+        if self.extra:
+            for key in self.extra:
+                if key not in KEY_ORDER:
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f'Player({self.to_dict()!r})'
+
+    def _get(self, key):
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        if key in STRING_FIELDS:
+            return getattr(self, key)
+        if key in TIME_FIELDS:
+            value = getattr(self, key)
+            return epoch_to_iso(value) if isinstance(value, int) else value
+        if key == 'verified':
+            return bool(self.flags & VERIFIED) if self.flags & VERIFIED_SET else ABSENT
+        if key == 'settings':
+            if not self.flags & SETTINGS_SET:
+                return ABSENT
+            return {
+                name: bool(self.flags & value_bit)
+                for name, (present_bit, value_bit) in SETTING_BITS.items()
+                if self.flags & present_bit
+            }
+        if key == 'stats':
+            if not self.flags & STATS_SET:
+                return ABSENT
+            stats = {}
+            if self.flags & TOTAL_NOTIFIED_SET:
+                stats['total_notified'] = self.total_notified
+            if self.last_notified is not ABSENT:
+                value = self.last_notified
+                stats['last_notified'] = epoch_to_iso(value) if isinstance(value, int) else value
+            return stats
+        return ABSENT
+
+    # ========== GHI ==========
+
+    def set(self, key, value):
+        """Gán 1 key theo layout JSON"""
+        if self.extra:
+            self.extra.pop(key, None)
+            if not self.extra:
+                self.extra = None
+
+        if key in STRING_FIELDS and (value is None or isinstance(value, str)):
+            if key in INTERNED_FIELDS and value is not None:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        elif key in TIME_FIELDS and (value is None or _set_time(self, key, value)):
+            if value is None:
+                setattr(self, key, None)
+        elif key == 'verified' and isinstance(value, bool):
+            self.flags = (self.flags & ~VERIFIED) | VERIFIED_SET | (VERIFIED if value else 0)
+        elif key == 'settings' and self._can_pack_settings(value):
+            flags = (self.flags & ~SETTING_MASK) | SETTINGS_SET
+            for name, flag in value.items():
+                present_bit, value_bit = SETTING_BITS[name]
+                flags |= present_bit | (value_bit if flag else 0)
+            self.flags = flags
+        elif key == 'stats' and self._can_pack_stats(value):
+            self.flags |= STATS_SET
+            if 'total_notified' in value:
+                self.flags |= TOTAL_NOTIFIED_SET
+                self.total_notified = value['total_notified']
+            else:
+                self.flags &= ~TOTAL_NOTIFIED_SET
+                self.total_notified = ABSENT
+            last_notified = value.get('last_notified', ABSENT)
+            if isinstance(last_notified, str):
+                last_notified = iso_to_epoch(last_notified)
+            self.last_notified = last_notified
+        else:
+            # Không gói được -> giữ nguyên giá trị gốc
+            self._clear(key)
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def update(self, fields):
+        """Gán nhiều key cùng lúc"""
+        for key, value in dict(fields).items():
+            self.set(key, value)
+
+    def set_setting(self, name, value):
+        """Cập nhật 1 setting"""
+        settings = self.get('settings')
+        settings = dict(settings) if isinstance(settings, dict) else {}
+        settings[name] = value
+        self.set('settings', settings)
+
+    def mark_notified(self, match_id, match_time):
+        """Ghi nhận đã thông báo match mới (dùng cho update_last_match)"""
+        stats = self.get('stats')
+        stats = dict(stats) if isinstance(stats, dict) else {}
+        stats['last_notified'] = match_time
+        stats['total_notified'] = stats.get('total_notified', 0) + 1
+        self.set('last_match_id', match_id)
+        self.last_checked = now_epoch()
+        self.set('stats', stats)
+
+    def _clear(self, key):
+        if key in STRING_FIELDS or key in TIME_FIELDS:
+            setattr(self, key, ABSENT)
+        elif key == 'verified':
+            self.flags &= ~(VERIFIED_SET | VERIFIED)
+        elif key == 'settings':
+            self.flags &= ~(SETTINGS_SET | SETTING_MASK)
+        elif key == 'stats':
+            self.flags &= ~(STATS_SET | TOTAL_NOTIFIED_SET)
+            self.total_notified = ABSENT
+            self.last_notified = ABSENT
+
+    @staticmethod
+    def _can_pack_settings(value):
+        return (
+            isinstance(value, dict)
+            and all(name in SETTING_BITS and isinstance(flag, bool) for name, flag in value.items())
+        )
+
+    @staticmethod
+    def _can_pack_stats(value):
+        if not isinstance(value, dict) or not set(value) <= {'total_notified', 'last_notified'}:
+            return False
+        total = value.get('total_notified', 0)
+        if not isinstance(total, int) or isinstance(total, bool):
+            return False
+        last_notified = value.get('last_notified')
+        return last_notified is None or iso_to_epoch(last_notified) is not None
+
+
+_slot_values = attrgetter(*Player.__slots__)
@@ -0,0 +1,169 @@
+import heapq
+import itertools
+import random
+import time
+
+
+class _Entry:
+    """Trạng thái poll của 1 khóa"""
+
+    __slots__ = ('due', 'seq', 'interval', 'last_activity', 'misses', 'in_flight')
+
+    def __init__(self):
+        self.due = 0.0
+        self.seq = 0
+        self.interval = 0.0
+        self.last_activity = None
+        self.misses = 0
+        self.in_flight = False
+
+
+class PollScheduler:
+    """
+    Lịch poll riêng cho từng khóa (player / tài khoản), lưu trong heap theo thời điểm đến hạn
+
+    - Vừa có trận mới -> nghỉ khoảng 1 trận (`cooldown`, hoặc game_duration của trận đó)
+    - Có trận trong `active_window` gần đây -> poll mỗi `active_interval`
+    - Không hoạt động -> interval tăng gấp đôi sau mỗi lần poll trống,
+      tối đa `max_interval`
+    Heap dùng xóa lười: entry cũ bị bỏ qua khi seq không còn khớp.
+    """
+
+    def __init__(self, active_interval=120, cooldown=1500, active_window=7200,
+                 max_interval=21600, jitter=0.1, clock=time.monotonic):
+        self.active_interval = active_interval
+        self.cooldown = cooldown
+        self.active_window = active_window
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.clock = clock
+
+        self._entries = {}
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # ========== LỊCH ==========
+
+    def add(self, key, delay=0.0, active=False):
+        """
+        Thêm khóa mới (bỏ qua nếu đã có), đến hạn sau `delay` giây
+
+        `active=True` coi như vừa hoạt động (vd: player vừa được track)
+        """
+        if key in self._entries:
+            return False
+        entry = _Entry()
+        entry.interval = self.active_interval
+        if active:
+            entry.last_activity = self.clock()
+        self._entries[key] = entry
+        self._push(key, entry, delay)
+        return True
+
+    def remove(self, key):
+        """Bỏ khóa khỏi lịch (entry trong heap bị bỏ qua khi pop)"""
+        return self._entries.pop(key, None) is not None
+
+    def sync(self, keys, spread=None):
+        """
+        Đồng bộ lịch với tập khóa hiện có
+
+        Khóa mới được rải đều trong `spread` giây (mặc định active_interval)
+        để không dồn cùng lúc khi khởi động.
+        """
+        keys = set(keys)
+        spread = self.active_interval if spread is None else spread
+        for key in list(self._entries):
+            if key not in keys:
+                del self._entries[key]
+        for key in keys:
+            self.add(key, random.uniform(0, spread))
+
+    def pop_due(self, limit=None):
+        """Lấy các khóa đã đến hạn (đánh dấu đang poll cho tới khi record())"""
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(due) >= limit:
+                break
+            _, seq, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry.seq != seq:
+                continue
+            entry.in_flight = True
+            due.append(key)
+        return due
+
+    def record(self, key, match=None):
+        """
+        Ghi nhận kết quả poll và lên lịch lần sau
+
+        `match`: trận mới tìm thấy (dict, có thể có 'game_duration' giây), None nếu không có
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        now = self.clock()
+        entry.in_flight = False
+
+        if match:
+            entry.last_activity = now
+            entry.misses = 0
+            interval = match.get('game_duration') or self.cooldown
+        elif entry.last_activity is not None and now - entry.last_activity < self.active_window:
+            interval = self.active_interval
+        else:
+            entry.misses += 1
+            interval = self.active_interval * (2 ** min(entry.misses, 32))
+
+        entry.interval = min(max(interval, self.active_interval), self.max_interval)
+        self._push(key, entry, entry.interval)
+
+    def defer(self, key, delay):
+        """Dời lần poll sau `delay` giây mà không tính là 1 lần poll (vd: upstream đang lỗi)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.in_flight = False
+        self._push(key, entry, delay)
+
+    def _push(self, key, entry, delay):
+        if self.jitter and delay:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        entry.due = self.clock() + delay
+        entry.seq = next(self._seq)
+        heapq.heappush(self._heap, (entry.due, entry.seq, key))
+
+        # Dọn heap khi entry cũ chiếm quá nửa
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                (e.due, e.seq, k) for k, e in self._entries.items() if not e.in_flight
+            ]
+            heapq.heapify(self._heap)
+
+    # ========== THỐNG KÊ ==========
+
+    def depth(self):
+        """Số khóa đang chờ poll (đã đến hạn + đang poll)"""
+        now = self.clock()
+        return sum(1 for e in self._entries.values() if e.in_flight or e.due <= now)
+
+    def next_due_in(self):
+        """Số giây tới lần poll gần nhất (None nếu lịch trống)"""
+        pending = [e.due for e in self._entries.values() if not e.in_flight]
+        if not pending:
+            return None
+        return max(0.0, min(pending) - self.clock())
+
+    def stats(self):
+        return {
+            'scheduled': len(self._entries),
+            'due': self.depth(),
+            'next_due_in': self.next_due_in()
+        }
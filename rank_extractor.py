@@ -0,0 +1,197 @@
+import codecs
+import heapq
+import itertools
+import re
+
+# Tier theo thứ tự từ thấp lên cao, tên tiếng Việt để hiển thị
+TIERS = {
+    'IRON': 'Sắt',
+    'BRONZE': 'Đồng',
+    'SILVER': 'Bạc',
+    'GOLD': 'Vàng',
+    'PLATINUM': 'Bạch Kim',
+    'EMERALD': 'Lục Bảo',
+    'DIAMOND': 'Kim Cương',
+    'MASTER': 'Cao Thủ',
+    'GRANDMASTER': 'Đại Cao Thủ',
+    'CHALLENGER': 'Thách Đấu',
+}
+DIVISIONS = {'1': 'I', '2': 'II', '3': 'III', '4': 'IV'}
+# Tier không có division
+APEX_TIERS = ('MASTER', 'GRANDMASTER', 'CHALLENGER')
+
+# Container chứa rank trên trang tracker.gg (các vị trí parser cũ từng dò).
+# Quét trên bản lower() của trang (không phân biệt hoa/thường như parser cũ):
+# pattern chữ thường không cần re.IGNORECASE nên vẫn nhanh trên trang lớn.
+_CLASS_ANCHOR_RE = re.compile(r'class="[^"]*(?:rank|rating|stat__value)[^"]*"')
+# Nhãn "Rank"/"Tier": rank nằm ở element kế bên
+_LABEL_ANCHOR_RE = re.compile(r'>\s*(?:rank|tier)\s*<')
+_BLOCK_RE = re.compile(r'<(/?)(?:div|span|section|li|ul|p|a|h\d)\b', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]*>')
+_SPACE_RE = re.compile(r'(?:\s|&nbsp;)+')
+# GRANDMASTER đứng trước MASTER để không khớp nhầm
+_TIER_RE = re.compile(
+    r'\b(grandmaster|challenger|master|diamond|emerald|platinum|gold|silver|bronze|iron)\b'
+    r'(?:\s+(IV|III|II|I|[1-4])(?![\w,]))?'
+    r'(?:\D{0,40}?([\d,]+)\s*LP\b)?',
+    re.IGNORECASE
+)
+
+
+def extract_rank(html, window=2048, max_anchors=8):
+    """
+    Tìm rank trong HTML tracker.gg
+
+    Chỉ xét tối đa `max_anchors` container rank đầu tiên, mỗi container
+    đọc `window` ký tự phía sau (không quét regex trên toàn trang).
+
+    Returns: {'tier': 'GOLD', 'division': 'II' | None, 'lp': int | None, 'raw_text': str}
+             hoặc None nếu không tìm thấy
+    """
+    if not html:
+        return None
+    lowered, html = _lowered(html)
+    anchors = heapq.merge(
+        ((m.end(), 1) for m in _CLASS_ANCHOR_RE.finditer(lowered)),
+        ((m.end() - 1, 2) for m in _LABEL_ANCHOR_RE.finditer(lowered))
+    )
+    for start, depth in itertools.islice(anchors, max_anchors):
+        result = _parse_element(_element_text(html[start:start + window], depth))
+        if result:
+            return result
+    return None
+
+
+class RankScanner:
+    """
+    Bản streaming của extract_rank: feed() từng chunk bytes của response
+
+    Dừng ngay khi tìm thấy rank (hoặc đã xét hết `max_anchors` container),
+    caller kiểm tra `done` để đóng kết nối sớm. Chỉ giữ phần HTML chưa xét
+    trong bộ nhớ, không buffer cả trang.
+    """
+
+    # Giữ lại đuôi buffer để không cắt đôi 1 anchor giữa 2 chunk
+    _KEEP = 512
+
+    def __init__(self, window=2048, max_anchors=8, encoding='utf-8'):
+        self.window = window
+        self.max_anchors = max_anchors
+        self.result = None
+        self.done = False
+        self.bytes_read = 0
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        # _lower: bản lower() của _buf (cùng độ dài) để dò anchor
+        self._buf = ''
+        self._lower = ''
+        self._anchors = 0
+
+    def feed(self, data):
+        """Thêm 1 chunk; trả về kết quả nếu đã tìm thấy rank"""
+        if not self.done:
+            self.bytes_read += len(data)
+            self._append(self._decoder.decode(data))
+            self._scan(final=False)
+        return self.result
+
+    def close(self):
+        """Hết dữ liệu (hoặc dừng đọc): xét nốt phần còn lại"""
+        if not self.done:
+            self._append(self._decoder.decode(b'', final=True))
+            self._scan(final=True)
+            self.done = True
+            self._cut(len(self._buf))
+        return self.result
+
+    def _append(self, text):
+        lowered, text = _lowered(text)
+        self._buf += text
+        self._lower += lowered
+
+    def _cut(self, index):
+        """Bỏ phần buffer trước `index`"""
+        self._buf = self._buf[index:]
+        self._lower = self._lower[index:]
+
+    def _next_anchor(self):
+        candidates = []
+        match = _CLASS_ANCHOR_RE.search(self._lower)
+        if match:
+            candidates.append((match.start(), match.end(), 1))
+        match = _LABEL_ANCHOR_RE.search(self._lower)
+        if match:
+            candidates.append((match.start(), match.end() - 1, 2))
+        return min(candidates) if candidates else None
+
+    def _scan(self, final):
+        while not self.done:
+            anchor = self._next_anchor()
+            if anchor is None:
+                self._cut(max(len(self._buf) - self._KEEP, 0))
+                return
+            anchor_start, start, depth = anchor
+            chunk = self._buf[start:start + self.window]
+            element = _element_text(chunk, depth)
+            if not final and len(chunk) < self.window and element is chunk:
+                # Element chưa đóng, chờ thêm dữ liệu
+                self._cut(anchor_start)
+                return
+
+            self.result = _parse_element(element)
+            self._anchors += 1
+            if self.result or self._anchors >= self.max_anchors:
+                self.done = True
+                self._cut(len(self._buf))
+                return
+            self._cut(start)
+
+
+def _lowered(text):
+    """
+    (bản lower() để dò anchor, text để cắt element) cùng độ dài
+
+    lower() đổi độ dài với vài ký tự Unicode hiếm (vd: 'İ'), khi đó dùng luôn
+    bản lower() để vị trí khớp nhau (_TIER_RE không phân biệt hoa/thường).
+    """
+    lowered = text.lower()
+    return lowered, text if len(lowered) == len(text) else lowered
+
+
+def _parse_element(chunk):
+    """Tìm tier/division/LP trong nội dung 1 element"""
+    text = _SPACE_RE.sub(' ', _TAG_RE.sub(' ', chunk))
+    match = _TIER_RE.search(text)
+    if not match:
+        return None
+    tier, division, lp = match.groups()
+    tier = tier.upper()
+    if division:
+        division = DIVISIONS.get(division, division.upper())
+    # Master trở lên không có division
+    if tier in APEX_TIERS:
+        division = None
+    return {
+        'tier': tier,
+        'division': division,
+        'lp': int(lp.replace(',', '')) if lp else None,
+        'raw_text': match.group(0).strip()
+    }
+
+
+def _element_text(chunk, depth):
+    """Cắt `chunk` tại chỗ đóng element chứa anchor (`depth` cấp element cha)"""
+    for tag in _BLOCK_RE.finditer(chunk):
+        depth += -1 if tag.group(1) else 1
+        if depth <= 0:
+            return chunk[:tag.start()]
+    return chunk
+
+
+def format_rank(result):
+    """{'tier': 'GOLD', 'division': 'II', 'lp': 45} -> 'Vàng II (45 LP)'"""
+    text = TIERS.get(result['tier'], result['tier'].title())
+    if result.get('division'):
+        text += f" {result['division']}"
+    if result.get('lp') is not None:
+        text += f" ({result['lp']} LP)"
+    return text
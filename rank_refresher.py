@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+
+
+def rank_is_fresh(tft_stats, match):
+    """Rank được lấy sau khi `match` kết thúc (đã tính LP của trận đó) hay chưa"""
+    if not tft_stats or not tft_stats.get('checked_at'):
+        return False
+    try:
+        played_at = datetime.fromisoformat(match.get('timestamp')).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return tft_stats['checked_at'] >= played_at
+
+
+class RankRefresher:
+    """
+    Làm mới rank ở background, ngoài đường gửi thông báo
+
+    - request(): xếp 1 tài khoản cần lấy lại rank (trùng thì bỏ qua), chạy
+      sau `delay` giây để upstream kịp cập nhật LP của trận vừa xong
+    - `workers` task gọi `refresh(riot_id, region)` (vd: get_tft_stats(fresh=True)),
+      kết quả nằm trong cache rank cho lần poll / thông báo sau
+    - `on_refreshed(result)` (coroutine, tùy chọn) được gọi khi có kết quả
+      (None nếu lỗi), vd: sửa thông báo đã gửi với rank sau trận
+    """
+
+    def __init__(self, refresh, workers=2, delay=20, max_pending=1000):
+        self.refresh = refresh
+        self.workers = workers
+        self.delay = delay
+        self.max_pending = max_pending
+
+        self._queue = None
+        self._tasks = []
+        self._pending = set()
+        self._handles = {}
+        self._callbacks = {}
+        self.counters = {'requested': 0, 'refreshed': 0, 'failed': 0, 'skipped': 0}
+
+    def start(self):
+        """Tạo worker (gọi trong event loop, gọi lại khi đang chạy thì bỏ qua)"""
+        if any(not task.done() for task in self._tasks):
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for handle in self._handles.values():
+            handle.cancel()
+        self._handles.clear()
+        self._callbacks.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def request(self, riot_id, region, on_refreshed=None):
+        """
+        Xếp lịch làm mới rank; trả về False nếu đã có trong hàng đợi / hàng đợi đầy
+
+        Đã có trong hàng đợi thì `on_refreshed` được gọi cùng lần làm mới đó.
+        """
+        key = (riot_id.strip().lower(), (region or '').strip().lower())
+        if key in self._pending:
+            if on_refreshed is not None:
+                self._callbacks.setdefault(key, []).append(on_refreshed)
+            self.counters['skipped'] += 1
+            return False
+        if len(self._pending) >= self.max_pending:
+            self.counters['skipped'] += 1
+            return False
+        if on_refreshed is not None:
+            self._callbacks.setdefault(key, []).append(on_refreshed)
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._pending.add(key)
+        self.counters['requested'] += 1
+
+        def enqueue():
+            self._handles.pop(key, None)
+            self._queue.put_nowait((key, riot_id, region))
+
+        self._handles[key] = asyncio.get_running_loop().call_later(self.delay, enqueue)
+        return True
+
+    async def _worker(self):
+        while True:
+            key, riot_id, region = await self._queue.get()
+            result = None
+            try:
+                result = await self.refresh(riot_id, region)
+                self.counters['refreshed' if result else 'failed'] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters['failed'] += 1
+                print(f"❌ Lỗi làm mới rank {riot_id}: {e}")
+            finally:
+                self._pending.discard(key)
+                callbacks = self._callbacks.pop(key, [])
+                self._queue.task_done()
+            for callback in callbacks:
+                try:
+                    await callback(result)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"❌ Lỗi xử lý rank mới của {riot_id}: {e}")
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['pending'] = len(self._pending)
+        return stats
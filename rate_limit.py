@@ -0,0 +1,98 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from config import Config
+
+
+def resolve_host(url_or_host, names=()):
+    """
+    Chuẩn hóa URL / host về tên upstream
+
+    Host khớp theo hậu tố với `names`: 'tracker.gg' áp dụng cho cả api.tracker.gg.
+    """
+    host = urlsplit(url_or_host).hostname if '://' in url_or_host else url_or_host
+    host = (host or '').lower()
+    for name in names:
+        if host == name or host.endswith('.' + name):
+            return name
+    return host
+
+
+class TokenBucket:
+    """Token bucket cho asyncio: `rate` token/giây, tối đa `capacity` token"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(self.rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Lấy token nếu có sẵn, không chờ"""
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens=1):
+        """Chờ đến khi đủ token (các request chờ theo thứ tự FIFO)"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    @property
+    def available(self):
+        self._refill()
+        return self._tokens
+
+
+class HostRateLimiter:
+    """
+    Token bucket riêng cho từng upstream host (khớp theo resolve_host)
+
+    Host không cấu hình dùng `default_rate` (0 = không giới hạn).
+    """
+
+    def __init__(self, rates=None, default_rate=0):
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self._buckets = {}
+
+    def _resolve(self, url_or_host):
+        return resolve_host(url_or_host, self.rates)
+
+    def bucket(self, url_or_host):
+        """Lấy bucket của host"""
+        name = self._resolve(url_or_host)
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = TokenBucket(self.rates.get(name, self.default_rate))
+            self._buckets[name] = bucket
+        return bucket
+
+    async def acquire(self, url_or_host):
+        """Chờ lượt gửi request tới host"""
+        await self.bucket(url_or_host).acquire()
+
+
+# Limiter dùng chung cho mọi client gọi ra ngoài
+host_limiter = HostRateLimiter({
+    'tracker.gg': Config.TRACKER_RATE_LIMIT,
+    'op.gg': Config.OPGG_RATE_LIMIT,
+})
@@ -0,0 +1,136 @@
+import json
+import time
+from collections import OrderedDict
+
+
+class _Miss:
+    """Đánh dấu không có trong cache (None là giá trị hợp lệ: negative entry)"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<miss>'
+
+
+MISS = _Miss()
+
+
+def cache_key(riot_id, region):
+    """Khóa cache theo tài khoản: (riot_id.lower(), region)"""
+    return (riot_id.strip().lower(), (region or '').strip().lower())
+
+
+def _estimate_size(value):
+    """Ước lượng kích thước (bytes) của response đã parse"""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str)) + 64
+    except (TypeError, ValueError):
+        return 1024
+
+
+class ResponseCache:
+    """
+    Cache response có TTL + LRU, giới hạn số entry và tổng kích thước
+
+    - put(): entry thường sống `ttl` giây
+    - put_negative(): lưu "không tìm thấy / timeout" (giá trị None) trong
+      `negative_ttl` giây để không gọi lại upstream liên tục
+    - Vượt max_entries hoặc max_bytes -> bỏ entry dùng lâu nhất
+    Giá trị trả về là object dùng chung, caller không được sửa.
+    """
+
+    def __init__(self, ttl=300, negative_ttl=60, max_entries=2048,
+                 max_bytes=4 * 1024 * 1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+
+        # key -> (expires, value, size)
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=MISS):
+        """Lấy giá trị còn hạn (negative entry trả về None), không có -> `default`"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, value, size = entry
+            if expires > self.clock():
+                self._entries.move_to_end(key)
+                if value is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                return value
+            self._drop(key)
+        self.misses += 1
+        return default
+
+    def put(self, key, value, ttl=None):
+        """Lưu response (value=None tương đương put_negative)"""
+        if value is None:
+            return self.put_negative(key, ttl)
+        self._store(key, value, self.ttl if ttl is None else ttl)
+
+    def put_negative(self, key, ttl=None):
+        """Lưu kết quả "không tìm thấy" / lỗi tạm thời"""
+        self._store(key, None, self.negative_ttl if ttl is None else ttl)
+
+    def invalidate(self, key):
+        self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    async def get_or_fetch(self, key, fetch, ttl=None):
+        """
+        Trả về giá trị trong cache, nếu không có thì `await fetch()` rồi lưu lại
+
+        fetch() trả về None được lưu như negative entry.
+        """
+        value = self.get(key)
+        if value is not MISS:
+            return value
+        value = await fetch()
+        self.put(key, value, ttl)
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0
+        }
+
+    def _store(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        self._drop(key)
+        size = 64 if value is None else _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (self.clock() + ttl, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
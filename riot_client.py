@@ -0,0 +1,403 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from urllib.parse import quote
+
+from circuit_breaker import breakers, parse_retry_after
+from http_client import http_client
+from rank_extractor import APEX_TIERS, format_rank
+from response_cache import MISS, ResponseCache, cache_key
+
+# ========== ROUTING ==========
+# region của bot (Config.SUPPORTED_REGIONS) -> platform routing (summoner, league)
+PLATFORMS = {
+    'vn': 'vn2', 'na': 'na1', 'euw': 'euw1', 'eune': 'eun1', 'kr': 'kr', 'jp': 'jp1',
+    'br': 'br1', 'lan': 'la1', 'las': 'la2', 'oce': 'oc1', 'ru': 'ru', 'tr': 'tr1'
+}
+# region -> regional routing cho tft-match-v1
+MATCH_REGIONS = {
+    'na': 'americas', 'br': 'americas', 'lan': 'americas', 'las': 'americas',
+    'kr': 'asia', 'jp': 'asia',
+    'euw': 'europe', 'eune': 'europe', 'tr': 'europe', 'ru': 'europe',
+    'vn': 'sea', 'oce': 'sea'
+}
+# account-v1 không có cụm sea -> dùng asia
+ACCOUNT_REGIONS = dict(MATCH_REGIONS, vn='asia', oce='asia')
+
+RANKED_QUEUE = 'RANKED_TFT'
+
+
+class RiotAPIError(Exception):
+    """Riot API trả về lỗi không xử lý được (không phải 404)"""
+
+    def __init__(self, status, message=''):
+        super().__init__(f'Riot API {status}: {message}')
+        self.status = status
+
+
+# ========== RATE LIMIT THEO HEADER ==========
+
+# Request được server đếm lúc tới nơi (muộn hơn lúc client ghi nhận) -> giữ thêm 1 chút
+WINDOW_MARGIN = 0.1
+
+
+class _Window:
+    """1 cửa sổ giới hạn `limit` request / `seconds` giây (sliding log)"""
+
+    __slots__ = ('limit', 'seconds', 'hits')
+
+    def __init__(self, limit, seconds):
+        self.limit = limit
+        self.seconds = seconds
+        self.hits = deque()
+
+    def wait_time(self, now):
+        span = self.seconds + WINDOW_MARGIN
+        while self.hits and self.hits[0] <= now - span:
+            self.hits.popleft()
+        if len(self.hits) < self.limit:
+            return 0.0
+        return self.hits[0] + span - now
+
+
+def parse_limits(value):
+    """'20:1,100:120' -> [(20, 1), (100, 120)]"""
+    limits = []
+    for part in (value or '').split(','):
+        if ':' not in part:
+            continue
+        count, seconds = part.split(':', 1)
+        try:
+            limits.append((int(count), int(seconds)))
+        except ValueError:
+            continue
+    return limits
+
+
+class _Scope:
+    """Các cửa sổ giới hạn của 1 phạm vi (app hoặc method) trên 1 routing host"""
+
+    __slots__ = ('windows', 'blocked_until')
+
+    def __init__(self, limits=()):
+        self.windows = [_Window(count, seconds) for count, seconds in limits]
+        self.blocked_until = 0.0
+
+    def set_limits(self, limits, counts, now):
+        """Cập nhật theo header X-*-Rate-Limit / X-*-Rate-Limit-Count"""
+        current = {(w.limit, w.seconds): w for w in self.windows}
+        windows = []
+        for count, seconds in limits:
+            window = current.get((count, seconds)) or _Window(count, seconds)
+            # Server đếm nhiều hơn (vd: key dùng chung với process khác) -> đồng bộ lên
+            used = counts.get(seconds, 0)
+            window.wait_time(now)
+            while len(window.hits) < used:
+                window.hits.append(now)
+            windows.append(window)
+        self.windows = windows
+
+    def wait_time(self, now):
+        wait = max(0.0, self.blocked_until - now)
+        for window in self.windows:
+            wait = max(wait, window.wait_time(now))
+        return wait
+
+    def record(self, now):
+        for window in self.windows:
+            window.hits.append(now)
+
+
+class RiotRateLimiter:
+    """
+    Giới hạn app + method của Riot API, đọc từ header response
+
+    - Mỗi routing host (vn2, sea, asia, ...) có giới hạn app riêng
+    - Giới hạn method học từ X-Method-Rate-Limit của lần gọi đầu tiên
+    - 429 chặn đúng phạm vi (X-Rate-Limit-Type) trong Retry-After giây
+    """
+
+    def __init__(self, app_limits='20:1,100:120', clock=time.monotonic):
+        self.app_limits = parse_limits(app_limits)
+        self.clock = clock
+        self._scopes = {}
+        self.waited = 0.0
+
+    def _scope(self, key):
+        scope = self._scopes.get(key)
+        if scope is None:
+            scope = _Scope(self.app_limits if key[0] == 'app' else ())
+            self._scopes[key] = scope
+        return scope
+
+    async def acquire(self, host, method):
+        """
+        Chờ tới khi cả giới hạn app và method đều còn lượt
+
+        Kiểm tra + ghi nhận không có await ở giữa nên không cần lock;
+        host khác nhau không chặn nhau.
+        """
+        scopes = (self._scope(('app', host)), self._scope(('method', host, method)))
+        while True:
+            now = self.clock()
+            wait = max(scope.wait_time(now) for scope in scopes)
+            if wait <= 0:
+                for scope in scopes:
+                    scope.record(now)
+                return
+            self.waited += wait
+            await asyncio.sleep(wait)
+
+    def update(self, host, method, headers):
+        now = self.clock()
+        for kind, key in (('App', ('app', host)), ('Method', ('method', host, method))):
+            limits = parse_limits(headers.get(f'X-{kind}-Rate-Limit'))
+            if limits:
+                counts = {seconds: count for count, seconds in parse_limits(headers.get(f'X-{kind}-Rate-Limit-Count'))}
+                self._scope(key).set_limits(limits, counts, now)
+
+    def block(self, host, method, seconds, limit_type=None):
+        """Chặn sau 429: application -> cả host, còn lại -> riêng method"""
+        key = ('app', host) if limit_type == 'application' else ('method', host, method)
+        scope = self._scope(key)
+        scope.blocked_until = max(scope.blocked_until, self.clock() + seconds)
+
+    def stats(self):
+        now = self.clock()
+        return {
+            ':'.join(key): {
+                'limits': [f'{w.limit}:{w.seconds}' for w in scope.windows],
+                'used': [len(w.hits) for w in scope.windows],
+                'wait': round(scope.wait_time(now), 2)
+            }
+            for key, scope in self._scopes.items()
+        }
+
+
+# ========== CLIENT ==========
+
+def _clean_name(value):
+    """'TFT9_Aatrox' / 'Set9_Darkin' -> 'Aatrox' / 'Darkin'"""
+    return value.split('_', 1)[-1] if value else value
+
+
+def _played_at(match):
+    return datetime.fromtimestamp(match.get('info', {}).get('game_datetime', 0) / 1000).isoformat()
+
+
+def match_summary(match, puuid):
+    """Rút gọn 1 match tft-match-v1 về dạng check_and_notify dùng (None nếu không có player)"""
+    info = match.get('info', {})
+    participant = next((p for p in info.get('participants', []) if p.get('puuid') == puuid), None)
+    if participant is None:
+        return None
+    traits = sorted(
+        (t for t in participant.get('traits', []) if t.get('tier_current', 0) > 0),
+        key=lambda t: (-t.get('style', 0), -t.get('num_units', 0))
+    )
+    return {
+        'match_id': match.get('metadata', {}).get('match_id'),
+        'placement': participant.get('placement', 8),
+        'level': participant.get('level', 'N/A'),
+        'traits': [{'name': _clean_name(t['name']), 'tier': t['tier_current']} for t in traits],
+        'units': [
+            {'name': _clean_name(u.get('character_id')), 'tier': u.get('tier', 1), 'items': u.get('itemNames', [])}
+            for u in participant.get('units', [])
+        ],
+        'timestamp': _played_at(match),
+        'game_duration': int(info.get('game_length', 0)) or None,
+        'source': 'riot'
+    }
+
+
+class RiotClient:
+    """
+    Client Riot API chính thức: account-v1, tft-summoner-v1, tft-league-v1, tft-match-v1
+
+    `base_url` có {host} là routing value (vd: 'https://{host}.api.riotgames.com'
+    hoặc 'http://127.0.0.1:8090/{host}' khi chạy với stub server).
+    `matches`: MatchStore; match đầy đủ (mọi participant) chỉ tải 1 lần.
+    """
+
+    def __init__(self, api_key, base_url='https://{host}.api.riotgames.com',
+                 app_limits='20:1,100:120', max_retries=2, matches=None):
+        self.api_key = api_key
+        self.matches = matches
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.limiter = RiotRateLimiter(app_limits)
+        self.headers = {'X-Riot-Token': api_key, 'Accept': 'application/json'}
+        # puuid của Riot ID không đổi -> cache lâu
+        self.accounts = ResponseCache(ttl=24 * 3600, negative_ttl=300, max_entries=8192)
+        self.requests = 0
+        self.throttled = 0
+
+    # ========== ROUTING ==========
+
+    @staticmethod
+    def platform(region):
+        return PLATFORMS.get((region or '').lower(), 'vn2')
+
+    @staticmethod
+    def match_region(region):
+        return MATCH_REGIONS.get((region or '').lower(), 'sea')
+
+    @staticmethod
+    def account_region(region):
+        return ACCOUNT_REGIONS.get((region or '').lower(), 'asia')
+
+    def hosts(self, region):
+        """Các routing host 1 lượt poll của region dùng tới"""
+        return [
+            self.base_url.format(host=self.account_region(region)),
+            self.base_url.format(host=self.platform(region)),
+            self.base_url.format(host=self.match_region(region))
+        ]
+
+    # ========== ENDPOINT ==========
+
+    async def get_account(self, riot_id, region):
+        """account-v1 by-riot-id (có cache) -> {'puuid', 'gameName', 'tagLine'} hoặc None"""
+        if '#' not in riot_id:
+            return None
+        key = cache_key(riot_id, region)
+        account = self.accounts.get(key)
+        if account is not MISS:
+            return account
+        game_name, tag_line = (part.strip() for part in riot_id.split('#', 1))
+        account = await self._request(
+            self.account_region(region), 'account-v1.by-riot-id',
+            f'/riot/account/v1/accounts/by-riot-id/{quote(game_name)}/{quote(tag_line)}'
+        )
+        self.accounts.put(key, account)
+        return account
+
+    async def get_summoner(self, puuid, region):
+        """tft-summoner-v1 by-puuid"""
+        return await self._request(
+            self.platform(region), 'tft-summoner-v1.by-puuid',
+            f'/tft/summoner/v1/summoners/by-puuid/{puuid}'
+        )
+
+    async def get_league_entries(self, puuid, region):
+        """tft-league-v1 by-puuid -> danh sách entry (mỗi queue 1 entry)"""
+        return await self._request(
+            self.platform(region), 'tft-league-v1.by-puuid',
+            f'/tft/league/v1/by-puuid/{puuid}'
+        ) or []
+
+    async def get_match_ids(self, puuid, region, count=20, start=0):
+        """tft-match-v1 ids, mới nhất trước"""
+        return await self._request(
+            self.match_region(region), 'tft-match-v1.ids',
+            f'/tft/match/v1/matches/by-puuid/{puuid}/ids',
+            {'start': start, 'count': count}
+        ) or []
+
+    async def get_match(self, match_id, region):
+        """tft-match-v1 chi tiết 1 match (đọc qua MatchStore nếu có)"""
+        fetch = lambda: self._request(
+            self.match_region(region), 'tft-match-v1.match',
+            f'/tft/match/v1/matches/{match_id}'
+        )
+        if self.matches is None:
+            return await fetch()
+        return await self.matches.get_or_fetch(match_id, fetch, played_at=_played_at)
+
+    # ========== DẠNG DỮ LIỆU CỦA BOT ==========
+
+    async def get_tft_stats(self, riot_id, region):
+        """Rank TFT hiện tại, cùng dạng với get_tft_stats_from_tracker (None nếu không có tài khoản)"""
+        account = await self.get_account(riot_id, region)
+        if not account:
+            return None
+        entries = await self.get_league_entries(account['puuid'], region)
+        entry = next((e for e in entries if e.get('queueType') == RANKED_QUEUE), None)
+        stats = {
+            'riot_id': f"{account.get('gameName')}#{account.get('tagLine')}",
+            'puuid': account['puuid'],
+            'source': 'riot'
+        }
+        if entry is None:
+            stats['rank'] = 'Chưa xếp hạng'
+            return stats
+        rank = {
+            'tier': entry['tier'],
+            'division': None if entry['tier'] in APEX_TIERS else entry.get('rank'),
+            'lp': entry.get('leaguePoints')
+        }
+        stats.update(rank)
+        stats['rank'] = format_rank(rank)
+        stats['wins'] = entry.get('wins')
+        stats['losses'] = entry.get('losses')
+        return stats
+
+    async def get_recent_match_ids(self, riot_id, region, count=1):
+        """match_id gần nhất của Riot ID (mới nhất trước), [] nếu không có tài khoản"""
+        account = await self.get_account(riot_id, region)
+        if not account:
+            return []
+        return await self.get_match_ids(account['puuid'], region, count=count)
+
+    async def get_match_summary(self, riot_id, region, match_id):
+        """Chi tiết 1 match của Riot ID, dạng match_summary()"""
+        account = await self.get_account(riot_id, region)
+        if not account:
+            return None
+        match = await self.get_match(match_id, region)
+        return match_summary(match, account['puuid']) if match else None
+
+    async def get_match_history(self, riot_id, region, limit=3, since=None):
+        """limit match gần nhất, chỉ tải chi tiết các match mới hơn `since`"""
+        match_ids = await self.get_recent_match_ids(riot_id, region, count=limit)
+        if since in match_ids:
+            match_ids = match_ids[:match_ids.index(since)]
+        matches = await asyncio.gather(
+            *(self.get_match_summary(riot_id, region, match_id) for match_id in match_ids)
+        )
+        return [match for match in matches if match]
+
+    # ========== HTTP ==========
+
+    async def _request(self, host, method, path, params=None):
+        """GET 1 endpoint; 404 -> None, 429 -> chờ theo Retry-After rồi thử lại"""
+        url = self.base_url.format(host=host) + path
+        breaker = breakers.get(url)
+        session = http_client.get_session()
+
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                raise RiotAPIError(503, f'{host} đang tạm ngưng (circuit open)')
+            with breaker.guard():
+                # Chờ limiter trong guard(): bị cancel lúc đang chờ vẫn trả lại lượt thử half_open
+                await self.limiter.acquire(host, method)
+                self.requests += 1
+                async with session.get(url, params=params, headers=self.headers) as response:
+                    self.limiter.update(host, method, response.headers)
+                    limit_type = response.headers.get('X-Rate-Limit-Type')
+                    if response.status == 429 and limit_type in ('application', 'method'):
+                        # Vượt giới hạn của key -> chờ đúng phạm vi bị chặn, không tính là upstream lỗi
+                        self.throttled += 1
+                        retry_after = parse_retry_after(response.headers.get('Retry-After')) or 1.0
+                        self.limiter.block(host, method, retry_after, limit_type)
+                        breaker.release()
+                        continue
+                    breaker.record_response(response.status, response.headers)
+                    if response.status == 404:
+                        return None
+                    if response.status == 200:
+                        return await response.json()
+                    # Status đã được ghi ở trên: raise ngoài guard() để không tính lỗi 2 lần
+                    error = RiotAPIError(response.status, await response.text())
+            raise error
+        raise RiotAPIError(429, f'{method} bị giới hạn sau {self.max_retries + 1} lần thử')
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'waited': round(self.limiter.waited, 2),
+            'limits': self.limiter.stats(),
+            'accounts': self.accounts.stats()
+        }
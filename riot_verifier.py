@@ -1,28 +1,44 @@
 import aiohttp
 import asyncio
+import copy
 from datetime import datetime
 import re
 import json
+import time
 from urllib.parse import quote
 
+from circuit_breaker import breakers
+from hedging import SourceStats, hedge
+from http_client import JSON_HEADERS, OPGG_HEADERS, TRACKER_API_HEADERS, http_client
+from rate_limit import host_limiter
+from response_cache import MISS, ResponseCache, cache_key
+from singleflight import SingleFlight
+
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
 class RiotVerifier:
     """Xác thực Riot ID và lấy thông tin THẬT từ tracker.gg"""
     
-    def __init__(self, api_key=None):
+    # Nguồn có tỉ lệ thành công thấp hơn ngưỡng không được chạy đua ngay
+    DEGRADED_SUCCESS_RATE = 0.3
+    
+    def __init__(self, api_key=None, cache=None, race=True):
         self.api_key = api_key
         self.has_api_key = bool(api_key)
-        self.session = None
+        self.cache = cache if cache is not None else ResponseCache()
+        self.inflight = SingleFlight()
+        # race=True: hỏi tracker.gg và op.gg song song, lấy kết quả đầu tiên
+        self.race = race
+        self.source_stats = {'tracker.gg': SourceStats(), 'op.gg': SourceStats()}
+        # ETag / Last-Modified + kết quả đã parse của lần tải gần nhất, theo (loại, tài khoản)
+        self.validators = ResponseCache(ttl=24 * 3600, max_entries=4096)
     
     async def get_session(self):
-        """Lấy aiohttp session"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-        return self.session
+        """Lấy aiohttp session dùng chung (http_client)"""
+        return http_client.get_session()
     
     async def close_session(self):
-        """Đóng session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """Session dùng chung được đóng bởi http_client.close(), không đóng ở đây"""
     
     async def verify_riot_id(self, riot_id, region='vn'):
         """
@@ -34,26 +50,64 @@ class RiotVerifier:
                 'error': 'Sai format! Dùng: Username#Tagline'
             }
         
+        key = ('verify',) + cache_key(riot_id, region)
+        cached = self.cache.get(key)
+        if cached is not MISS:
+            return cached if cached is not None else self._not_found()
+        
+        return await self.inflight.do(key, lambda: self._verify_and_cache(key, riot_id, region))
+    
+    async def _verify_and_cache(self, key, riot_id, region):
+        result = await self._verify_riot_id(riot_id, region)
+        # Lỗi (không tìm thấy, timeout, ...) chỉ cache ngắn hạn
+        self.cache.put(key, result if result.get('success') else None)
+        return result
+    
+    def _not_found(self):
+        return {
+            'success': False,
+            'error': 'Không tìm thấy tài khoản. Kiểm tra lại Riot ID và region.'
+        }
+    
+    async def _verify_riot_id(self, riot_id, region):
         try:
             username, tagline = riot_id.split('#', 1)
             username = username.strip()
             tagline = tagline.strip()
             
-            # Ưu tiên dùng tracker.gg (dữ liệu thật)
-            tracker_data = await self._get_tracker_gg_data(username, tagline, region)
-            if tracker_data and tracker_data.get('success'):
-                return tracker_data
-            
-            # Fallback: Dùng op.gg
-            opgg_data = await self._get_opgg_data(username, tagline, region)
-            if opgg_data and opgg_data.get('success'):
-                return opgg_data
-            
-            return {
-                'success': False,
-                'error': 'Không tìm thấy tài khoản. Kiểm tra lại Riot ID và region.'
+            fetchers = {
+                'tracker.gg': self._get_tracker_gg_data,
+                'op.gg': self._get_opgg_data
             }
             
+            if not self.race:
+                # Ưu tiên dùng tracker.gg (dữ liệu thật), fallback: op.gg
+                for source, fetch in fetchers.items():
+                    data = await self._timed(source, fetch(username, tagline, region))
+                    if data and data.get('success'):
+                        return data
+                return self._not_found()
+            
+            # Nguồn tốt hơn chạy trước; nếu nguồn kém đang suy giảm thì chỉ bắn
+            # khi nguồn tốt chưa trả lời sau p95 độ trễ của nó (thay vì chạy đua ngay)
+            sources = sorted(
+                fetchers,
+                key=lambda name: (-self.source_stats[name].success_rate,
+                                  self.source_stats[name].latency.percentile(50))
+            )
+            best, worst = self.source_stats[sources[0]], self.source_stats[sources[-1]]
+            delay = best.latency.percentile(95) if worst.success_rate < self.DEGRADED_SUCCESS_RATE else 0
+            
+            _, data = await hedge(
+                [
+                    lambda source=source: self._timed(source, fetchers[source](username, tagline, region))
+                    for source in sources
+                ],
+                delay,
+                accept=lambda result: bool(result and result.get('success'))
+            )
+            return data or self._not_found()
+            
         except Exception as e:
             print(f"Lỗi verify_riot_id: {e}")
             return {
@@ -61,6 +115,42 @@ class RiotVerifier:
                 'error': f'Lỗi kết nối: {str(e)[:100]}'
             }
     
+    async def _timed(self, source, request):
+        """Chạy request của 1 nguồn và ghi nhận thành công / độ trễ"""
+        started = time.monotonic()
+        data = await request
+        self.source_stats[source].record(bool(data and data.get('success')), time.monotonic() - started)
+        return data
+    
+    def get_source_stats(self):
+        """Thống kê từng nguồn xác thực"""
+        return {name: stats.to_dict() for name, stats in self.source_stats.items()}
+    
+    def _conditional_headers(self, headers, key):
+        """Thêm If-None-Match / If-Modified-Since nếu đã có validator của `key`"""
+        entry = self.validators.get(key)
+        if entry is MISS or entry is None:
+            return headers
+        headers = dict(headers)
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def _not_modified(self, key):
+        """Response 304: bản copy kết quả lần trước (không parse lại, caller sửa không ảnh hưởng cache)"""
+        entry = self.validators.get(key)
+        if entry is MISS or entry is None:
+            return None
+        return copy.deepcopy(entry['result'])
+    
+    def _store_validators(self, key, response, result):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.validators.put(key, {'etag': etag, 'last_modified': last_modified, 'result': result})
+    
     async def _get_tracker_gg_data(self, username, tagline, region):
         """Lấy dữ liệu THẬT từ tracker.gg"""
         try:
@@ -68,38 +158,41 @@ class RiotVerifier:
             url = f"https://api.tracker.gg/api/v2/tft/standard/profile/riot/{quote(username)}%23{tagline}"
             
             session = await self.get_session()
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Language": "vi-VN,vi;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Origin": "https://tracker.gg",
-                "Referer": "https://tracker.gg/",
-                "sec-ch-ua": '"Google Chrome";v="119", "Chromium";v="119", "Not?A_Brand";v="24"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Windows"',
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-site"
-            }
+            breaker = breakers.get(url)
+            if not breaker.allow():
+                # Nguồn đang lỗi -> bỏ qua ngay thay vì chờ timeout
+                return None
             
-            async with session.get(url, headers=headers, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
+            validator_key = ('tracker',) + cache_key(f'{username}#{tagline}', region)
+            headers = self._conditional_headers(TRACKER_API_HEADERS, validator_key)
+            
+            with breaker.guard():
+                # Chờ limiter trong guard(): bị cancel lúc đang chờ vẫn trả lại lượt thử half_open
+                await host_limiter.acquire(url)
+                async with session.get(url, headers=headers, timeout=REQUEST_TIMEOUT) as response:
+                    breaker.record_response(response.status, response.headers)
+                    if response.status == 304:
+                        # Không đổi từ lần trước -> bỏ qua decode + parse
+                        return self._not_modified(validator_key)
+                    if response.status == 200:
+                        data = await response.json()
                     
-                    # Parse dữ liệu từ tracker.gg
-                    account_info = self._parse_tracker_gg_response(data, username, tagline)
+                        # Parse dữ liệu từ tracker.gg
+                        account_info = self._parse_tracker_gg_response(data, username, tagline)
                     
-                    if account_info:
+                        if account_info:
+                            result = {
+                                'success': True,
+                                'data': account_info,
+                                'source': 'tracker.gg'
+                            }
+                            self._store_validators(validator_key, response, result)
+                            return result
+                    elif response.status == 404:
                         return {
-                            'success': True,
-                            'data': account_info,
-                            'source': 'tracker.gg'
+                            'success': False,
+                            'error': 'Không tìm thấy tài khoản trên tracker.gg'
                         }
-                elif response.status == 404:
-                    return {
-                        'success': False,
-                        'error': 'Không tìm thấy tài khoản trên tracker.gg'
-                    }
                     
         except asyncio.TimeoutError:
             print(f"Timeout khi lấy dữ liệu từ tracker.gg cho {username}#{tagline}")
@@ -196,25 +289,27 @@ class RiotVerifier:
             url = f"https://op.gg/api/v1.0/internal/bypass/summoners/{opgg_region}/{username}-{tagline}/tft/summary"
             
             session = await self.get_session()
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Accept": "application/json",
-                "Accept-Language": "vi-VN,vi;q=0.9"
-            }
+            breaker = breakers.get(url)
+            if not breaker.allow():
+                # Nguồn đang lỗi -> bỏ qua ngay thay vì chờ timeout
+                return None
             
-            async with session.get(url, headers=headers, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
+            with breaker.guard():
+                await host_limiter.acquire(url)
+                async with session.get(url, headers=OPGG_HEADERS, timeout=REQUEST_TIMEOUT) as response:
+                    breaker.record_response(response.status, response.headers)
+                    if response.status == 200:
+                        data = await response.json()
                     
-                    # Parse dữ liệu từ op.gg
-                    account_info = self._parse_opgg_response(data, username, tagline)
+                        # Parse dữ liệu từ op.gg
+                        account_info = self._parse_opgg_response(data, username, tagline)
                     
-                    if account_info:
-                        return {
-                            'success': True,
-                            'data': account_info,
-                            'source': 'op.gg'
-                        }
+                        if account_info:
+                            return {
+                                'success': True,
+                                'data': account_info,
+                                'source': 'op.gg'
+                            }
                         
         except Exception as e:
             print(f"Lỗi op.gg API: {e}")
@@ -281,8 +376,23 @@ class RiotVerifier:
             print(f"Lỗi parse op.gg response: {e}")
             return None
     
-    async def get_tft_stats_live(self, riot_id, region='vn'):
-        """Lấy thống kê TFT live từ tracker.gg"""
+    async def get_tft_stats_live(self, riot_id, region='vn', since=None):
+        """
+        Lấy thống kê TFT live từ tracker.gg (có cache)
+        
+        `match_ids`: match gần nhất (chỉ đọc metadata); `matches`: chi tiết,
+        chỉ parse các match mới hơn `since` (match_id đã thấy gần nhất).
+        """
+        key = ('live', since) + cache_key(riot_id, region)
+        cached = self.cache.get(key)
+        if cached is not MISS:
+            return cached if cached is not None else {'success': False, 'match_ids': [], 'matches': [], 'total_matches': 0}
+        
+        result = await self._get_tft_stats_live(riot_id, region, since)
+        self.cache.put(key, result if result.get('success') else None)
+        return result
+    
+    async def _get_tft_stats_live(self, riot_id, region, since=None):
         try:
             username, tagline = riot_id.split('#', 1)
             
@@ -290,43 +400,57 @@ class RiotVerifier:
             url = f"https://api.tracker.gg/api/v2/tft/standard/profile/riot/{quote(username)}%23{tagline}"
             
             session = await self.get_session()
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Accept": "application/json"
-            }
-            
-            async with session.get(url, headers=headers, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
+            breaker = breakers.get(url)
+            if not breaker.allow():
+                # Nguồn đang lỗi -> bỏ qua ngay thay vì chờ timeout
+                return {'success': False, 'match_ids': [], 'matches': [], 'total_matches': 0}
+            
+            validator_key = ('live', since) + cache_key(riot_id, region)
+            headers = self._conditional_headers(JSON_HEADERS, validator_key)
+            
+            with breaker.guard():
+                await host_limiter.acquire(url)
+                async with session.get(url, headers=headers, timeout=REQUEST_TIMEOUT) as response:
+                    breaker.record_response(response.status, response.headers)
+                    if response.status == 304:
+                        # Không đổi từ lần trước -> bỏ qua decode + parse
+                        previous = self._not_modified(validator_key)
+                        if previous:
+                            return previous
+                    if response.status == 200:
+                        data = await response.json()
                     
-                    # Parse match history
-                    matches = self._parse_match_history(data)
+                        # Đọc match_id trước, chỉ parse chi tiết match chưa thấy
+                        segments = self._match_segments(data)
+                        match_ids = [match_id for match_id, _, _ in segments]
+                        if since in match_ids:
+                            segments = segments[:match_ids.index(since)]
+                        matches = self._parse_match_history(segments[:5])  # Lấy 5 match gần nhất
                     
-                    return {
-                        'success': True,
-                        'matches': matches[:5],  # Lấy 5 match gần nhất
-                        'total_matches': len(matches)
-                    }
+                        result = {
+                            'success': True,
+                            'match_ids': match_ids[:20],
+                            'matches': matches,
+                            'total_matches': len(match_ids)
+                        }
+                        self._store_validators(validator_key, response, result)
+                        return result
                     
         except Exception as e:
             print(f"Lỗi get_tft_stats_live: {e}")
         
-        return {'success': False, 'matches': [], 'total_matches': 0}
+        return {'success': False, 'match_ids': [], 'matches': [], 'total_matches': 0}
     
-    def _parse_match_history(self, data):
-        """Parse lịch sử match từ tracker.gg"""
+    def _match_segments(self, data):
+        """
+        Đọc nhanh các segment match của tracker.gg: chỉ metadata, chưa parse stats
+        
+        Returns: [(match_id, match_time, segment)] mới nhất trước
+        """
         try:
-            segments = data.get('data', {}).get('segments', [])
-            matches = []
-            
-            for segment in segments:
+            segments = []
+            for segment in data.get('data', {}).get('segments', []):
                 if segment.get('type') == 'match':
-                    stats = segment.get('stats', {})
-                    
-                    placement = stats.get('placement', {}).get('value', 8)
-                    game_length = stats.get('gameLength', {}).get('value', 0)
-                    queue_id = stats.get('queueId', {}).get('value', 0)
-                    
                     # Lấy thời gian match
                     metadata = segment.get('metadata', {})
                     timestamp = metadata.get('timestamp', None)
@@ -336,28 +460,48 @@ class RiotVerifier:
                     else:
                         match_time = datetime.now()
                     
-                    # Lấy traits (nếu có)
-                    traits = []
-                    for key, stat in stats.items():
-                        if key.startswith('trait_') and stat.get('value', 0) > 0:
-                            trait_name = key.replace('trait_', '').replace('_', ' ').title()
-                            trait_tier = min(int(stat.get('value', 0)), 3)
-                            traits.append({
-                                'name': trait_name,
-                                'tier': trait_tier
-                            })
-                    
-                    matches.append({
-                        'placement': placement,
-                        'game_length': game_length,
-                        'queue_id': queue_id,
-                        'timestamp': match_time.isoformat(),
-                        'traits': traits[:8],  # Giới hạn 8 traits
-                        'match_id': f"tracker_{int(match_time.timestamp())}"
-                    })
+                    segments.append((f"tracker_{int(match_time.timestamp())}", match_time, segment))
             
             # Sắp xếp theo thời gian mới nhất
-            matches.sort(key=lambda x: x['timestamp'], reverse=True)
+            segments.sort(key=lambda item: item[1].isoformat(), reverse=True)
+            return segments
+            
+        except Exception as e:
+            print(f"Lỗi đọc match segments: {e}")
+            return []
+    
+    def _parse_match_history(self, segments):
+        """Parse chi tiết các match (kết quả của _match_segments) từ tracker.gg"""
+        try:
+            matches = []
+            
+            for match_id, match_time, segment in segments:
+                stats = segment.get('stats', {})
+                
+                placement = stats.get('placement', {}).get('value', 8)
+                game_length = stats.get('gameLength', {}).get('value', 0)
+                queue_id = stats.get('queueId', {}).get('value', 0)
+                
+                # Lấy traits (nếu có)
+                traits = []
+                for key, stat in stats.items():
+                    if key.startswith('trait_') and stat.get('value', 0) > 0:
+                        trait_name = key.replace('trait_', '').replace('_', ' ').title()
+                        trait_tier = min(int(stat.get('value', 0)), 3)
+                        traits.append({
+                            'name': trait_name,
+                            'tier': trait_tier
+                        })
+                
+                matches.append({
+                    'placement': placement,
+                    'game_length': game_length,
+                    'queue_id': queue_id,
+                    'timestamp': match_time.isoformat(),
+                    'traits': traits[:8],  # Giới hạn 8 traits
+                    'match_id': match_id
+                })
+            
             return matches
             
         except Exception as e:
@@ -0,0 +1,64 @@
+import asyncio
+
+
+class _Call:
+    """1 request đang chạy và số caller đang chờ nó"""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Gộp các lời gọi đồng thời cùng khóa thành 1 request upstream
+
+    - Caller đầu tiên tạo task, các caller sau cùng khóa await task đó
+    - Kết quả / exception của task được trả cho mọi caller
+    - 1 caller bị cancel không làm hủy request của các caller khác
+      (asyncio.shield); chỉ khi caller cuối cùng bỏ đi thì task mới bị hủy
+    - Task xong thì khóa được xóa ngay, lần gọi sau sẽ tạo request mới
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.shared = 0
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, fn):
+        """Chạy `await fn()` hoặc đợi lời gọi cùng `key` đang chạy"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _, key=key, call=call: self._forget(key, call))
+            self.started += 1
+        else:
+            self.shared += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Không còn ai chờ (mọi caller đã bị cancel) -> hủy request,
+                # caller mới sau đó sẽ tạo request mới thay vì nhận task đã hủy
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self):
+        return {
+            'in_flight': len(self._calls),
+            'started': self.started,
+            'shared': self.shared
+        }
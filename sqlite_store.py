@@ -0,0 +1,383 @@
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from journal import JournalStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    discord_id   TEXT NOT NULL,
+    riot_key     TEXT NOT NULL,
+    riot_id      TEXT NOT NULL,
+    region       TEXT NOT NULL DEFAULT '',
+    verified     INTEGER NOT NULL DEFAULT 0,
+    last_checked TEXT,
+    data         TEXT NOT NULL,
+    PRIMARY KEY (discord_id, riot_key)
+);
+CREATE INDEX IF NOT EXISTS idx_players_discord ON players (discord_id);
+CREATE INDEX IF NOT EXISTS idx_players_account ON players (riot_key, region);
+CREATE INDEX IF NOT EXISTS idx_players_region ON players (region);
+CREATE INDEX IF NOT EXISTS idx_players_last_checked ON players (last_checked);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Các file JSON cũ sẽ được import một lần khi mở database SQLite mới
+LEGACY_JSON_FILES = ['tft_players.json', 'tft_tracker.json']
+
+
+class SQLiteDatabase:
+    """
+    Database SQLite (WAL) cùng interface với main.Database và database.Database
+
+    Mỗi player là 1 dòng: các cột được index để truy vấn, còn toàn bộ
+    bản ghi (settings, stats, ...) nằm trong cột `data` dạng JSON.
+    """
+
+    def __init__(self, db_file='tft_tracker.db'):
+        self.file_path = db_file
+        self.conn = sqlite3.connect(db_file, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._batch_depth = 0
+
+    # ========== TRANSACTION ==========
+
+    @contextmanager
+    def batch(self):
+        """Gộp nhiều thao tác ghi vào 1 transaction"""
+        if self._batch_depth == 0:
+            self.conn.execute('BEGIN')
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.execute('ROLLBACK')
+            raise
+        else:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.execute('COMMIT')
+
+    def flush(self):
+        """Checkpoint WAL vào file chính"""
+        try:
+            self.conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+            return True
+        except Exception as e:
+            print(f"❌ Lỗi checkpoint SQLite: {e}")
+            return False
+
+    def close(self):
+        """Đóng kết nối"""
+        try:
+            self.conn.close()
+        except Exception as e:
+            print(f"❌ Lỗi đóng SQLite: {e}")
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.conn.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, value)
+        )
+
+    # ========== ROW HELPERS ==========
+
+    @staticmethod
+    def _row_values(player):
+        return (
+            player['discord_id'],
+            player['riot_id'].lower(),
+            player['riot_id'],
+            (player.get('region') or '').lower(),
+            1 if player.get('verified') else 0,
+            player.get('last_checked'),
+            json.dumps(player, ensure_ascii=False, separators=(',', ':'))
+        )
+
+    def _insert(self, player, replace=False):
+        """Ghi 1 player, trả về True nếu có dòng được thêm/cập nhật"""
+        sql = (
+            'INSERT INTO players (discord_id, riot_key, riot_id, region, verified, last_checked, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?) '
+        )
+        if replace:
+            sql += (
+                'ON CONFLICT(discord_id, riot_key) DO UPDATE SET '
+                'riot_id = excluded.riot_id, region = excluded.region, '
+                'verified = excluded.verified, last_checked = excluded.last_checked, '
+                'data = excluded.data'
+            )
+        else:
+            sql += 'ON CONFLICT(discord_id, riot_key) DO NOTHING'
+        cursor = self.conn.execute(sql, self._row_values(player))
+        return cursor.rowcount > 0
+
+    def _touch(self):
+        self.set_meta('last_modified', datetime.now().isoformat())
+
+    def _query(self, sql, params=()):
+        return [json.loads(row[0]) for row in self.conn.execute(sql, params)]
+
+    def _modify(self, discord_id, riot_id, mutate):
+        """Đọc - sửa - ghi 1 player trong cùng transaction"""
+        with self.batch():
+            player = self.get_player(discord_id, riot_id)
+            if player is None:
+                return False
+            old_key = (player['discord_id'], player['riot_id'].lower())
+            mutate(player)
+            if (player['discord_id'], player['riot_id'].lower()) != old_key:
+                self.conn.execute(
+                    'DELETE FROM players WHERE discord_id = ? AND riot_key = ?', old_key
+                )
+            self._insert(player, replace=True)
+            self._touch()
+        return True
+
+    # ========== PLAYER OPERATIONS ==========
+
+    def add_player(self, discord_id, discord_name=None, riot_id=None, region=None,
+                   channel_id=None, verified=True):
+        """
+        Thêm player mới
+
+        Nhận cả 2 kiểu gọi:
+        - add_player(player_data) như database.Database
+        - add_player(discord_id, discord_name, riot_id, region, channel_id) như main.Database
+        """
+        try:
+            if isinstance(discord_id, dict):
+                player_data = discord_id
+            else:
+                player_data = {
+                    'discord_id': discord_id,
+                    'discord_name': discord_name,
+                    'riot_id': riot_id,
+                    'region': region,
+                    'channel_id': channel_id,
+                    'verified': verified,
+                    'added_at': datetime.now().isoformat(),
+                    'last_checked': None,
+                    'last_match_id': None,
+                    'settings': {
+                        'auto_notify': True,
+                        'mention_on_notify': True,
+                        'include_ai': False
+                    },
+                    'stats': {
+                        'total_notified': 0,
+                        'last_notified': None
+                    }
+                }
+
+            with self.batch():
+                added = self._insert(player_data)
+                if added:
+                    self._touch()
+            return added
+        except Exception as e:
+            print(f"❌ Lỗi thêm player: {e}")
+            return False
+
+    def remove_player(self, discord_id, riot_id):
+        """Xóa player"""
+        try:
+            with self.batch():
+                cursor = self.conn.execute(
+                    'DELETE FROM players WHERE discord_id = ? AND riot_key = ?',
+                    (discord_id, riot_id.lower())
+                )
+                if cursor.rowcount > 0:
+                    self._touch()
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"❌ Lỗi xóa player: {e}")
+            return False
+
+    def get_player(self, discord_id, riot_id):
+        """Tìm player theo (discord_id, riot_id)"""
+        players = self._query(
+            'SELECT data FROM players WHERE discord_id = ? AND riot_key = ?',
+            (discord_id, riot_id.lower())
+        )
+        return players[0] if players else None
+
+    def get_player_by_riot_id(self, riot_id):
+        """Tìm player theo Riot ID"""
+        players = self._query(
+            'SELECT data FROM players WHERE riot_key = ? LIMIT 1', (riot_id.lower(),)
+        )
+        return players[0] if players else None
+
+    def get_players_by_discord(self, discord_id):
+        """Lấy tất cả players của một Discord user"""
+        return self._query(
+            'SELECT data FROM players WHERE discord_id = ? ORDER BY rowid', (discord_id,)
+        )
+
+    get_players_by_discord_id = get_players_by_discord
+
+    def get_players_by_account(self, riot_id, region):
+        """Lấy tất cả subscriptions của một tài khoản (riot_id, region)"""
+        return self._query(
+            'SELECT data FROM players WHERE riot_key = ? AND region = ? ORDER BY rowid',
+            (riot_id.strip().lower(), (region or '').strip().lower())
+        )
+
+    def get_all_players(self, limit=None):
+        """Lấy tất cả players"""
+        if limit is None:
+            return self._query('SELECT data FROM players ORDER BY rowid')
+        return self._query('SELECT data FROM players ORDER BY rowid LIMIT ?', (limit,))
+
+    @property
+    def players(self):
+        return self.get_all_players()
+
+    def count_players(self):
+        """Đếm số players"""
+        return self.conn.execute('SELECT COUNT(*) FROM players').fetchone()[0]
+
+    def update_last_match(self, discord_id, riot_id, match_id, match_time=None):
+        """Cập nhật match cuối cùng"""
+        def mutate(player):
+            now = datetime.now().isoformat()
+            player['last_match_id'] = match_id
+            player['last_match_time'] = match_time or now
+            player['last_checked'] = now
+            stats = player.setdefault('stats', {})
+            stats['last_notified'] = match_time
+            stats['total_notified'] = stats.get('total_notified', 0) + 1
+
+        try:
+            return self._modify(discord_id, riot_id, mutate)
+        except Exception as e:
+            print(f"❌ Lỗi update last match: {e}")
+            return False
+
+    def update_settings(self, discord_id, riot_id, setting_key, setting_value):
+        """Cập nhật setting"""
+        def mutate(player):
+            player.setdefault('settings', {})[setting_key] = setting_value
+
+        try:
+            return self._modify(discord_id, riot_id, mutate)
+        except Exception as e:
+            print(f"❌ Lỗi update setting: {e}")
+            return False
+
+    update_setting = update_settings
+
+    def update_player_info(self, discord_id, riot_id, info_key, info_value):
+        """Cập nhật thông tin player"""
+        def mutate(player):
+            player[info_key] = info_value
+
+        try:
+            return self._modify(discord_id, riot_id, mutate)
+        except Exception as e:
+            print(f"❌ Lỗi update player info: {e}")
+            return False
+
+    def cleanup_inactive_players(self, days_inactive=30):
+        """Dọn dẹp players không hoạt động (dùng index last_checked)"""
+        try:
+            cutoff_date = (datetime.now() - timedelta(days=days_inactive)).isoformat()
+            with self.batch():
+                cursor = self.conn.execute(
+                    'DELETE FROM players WHERE last_checked IS NULL OR last_checked <= ?',
+                    (cutoff_date,)
+                )
+                if cursor.rowcount > 0:
+                    self._touch()
+            return cursor.rowcount
+        except Exception as e:
+            print(f"❌ Lỗi cleanup inactive players: {e}")
+            return 0
+
+    def get_stats(self):
+        """Lấy thống kê database"""
+        total, verified, unique_users = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(verified), 0), COUNT(DISTINCT discord_id) FROM players'
+        ).fetchone()
+        return {
+            'total_players': total,
+            'verified_players': verified,
+            'unique_users': unique_users,
+            'database_size': os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0,
+            'last_modified': self.get_meta('last_modified')
+        }
+
+
+# ========== MIGRATION ==========
+
+def _load_json_players(json_file):
+    """Đọc players từ file JSON cũ (snapshot + journal)"""
+    store = JournalStore(json_file)
+    data = store.load_snapshot([])
+    players_list = data.get('players', []) if isinstance(data, dict) else data
+
+    players = {}
+    for player in players_list:
+        players[(player['discord_id'], player['riot_id'].lower())] = player
+    for record in store.replay():
+        if record.get('op') == 'put':
+            player = record['player']
+            players[(player['discord_id'], player['riot_id'].lower())] = player
+        elif record.get('op') == 'del':
+            players.pop((record['discord_id'], record['riot_id'].lower()), None)
+    return list(players.values())
+
+
+def migrate_json(db, json_files=None):
+    """
+    Import một lần dữ liệu từ các file JSON cũ vào SQLite
+
+    Returns: số players đã import (0 nếu đã migrate trước đó)
+    """
+    if db.get_meta('migrated_from') is not None:
+        return 0
+
+    json_files = json_files or LEGACY_JSON_FILES
+    imported = 0
+    with db.batch():
+        for json_file in json_files:
+            store = JournalStore(json_file)
+            if not any(os.path.exists(path) for path in
+                       (store.snapshot_file, store.journal_file, store.compacting_file)):
+                continue
+            for player in _load_json_players(json_file):
+                if db._insert(player):
+                    imported += 1
+            print(f"📦 Đã import {json_file} vào {db.file_path}")
+
+        db.set_meta('migrated_from', ','.join(json_files))
+        if imported:
+            db._touch()
+    return imported
+
+
+if __name__ == '__main__':
+    # python sqlite_store.py [db_file] [json_file ...]
+    target = sys.argv[1] if len(sys.argv) > 1 else 'tft_tracker.db'
+    sources = sys.argv[2:] or None
+    database = SQLiteDatabase(target)
+    count = migrate_json(database, sources)
+    print(f"✅ Đã import {count} players vào {target}")
+    database.close()
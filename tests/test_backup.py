@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup import BackupScheduler
+from database import Database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def player(discord_id, riot_id, **fields):
+    return dict({'discord_id': discord_id, 'riot_id': riot_id, 'region': 'vn'}, **fields)
+
+
+def key(p):
+    return (p['discord_id'], p['riot_id'].lower())
+
+
+def riot_ids(data):
+    return sorted(p['riot_id'] for p in data['players'])
+
+
+def write_chain(backup_dir, full_every=6):
+    """seq 1: full {A, B}; 2: +C; 3: sửa A, xóa B; 4: +D"""
+    backups = BackupScheduler(backup_dir, min_interval=0, full_every=full_every)
+    a, b = player('1', 'A#VN2'), player('2', 'B#VN2')
+    backups.backup({'version': '1.0', 'players': [a, b]}, max_backups=20)
+
+    c = player('3', 'C#VN2')
+    backups.track(key(c), c)
+    backups.backup({'version': '1.0', 'players': [a, b, c]}, max_backups=20)
+
+    a = player('1', 'A#VN2', last_match_id='VN2_9')
+    backups.track(key(a), a)
+    backups.track(key(b), None)
+    backups.backup({'version': '1.0', 'players': [a, c]}, max_backups=20)
+
+    d = player('4', 'D#VN2')
+    backups.track(key(d), d)
+    backups.backup({'version': '1.0', 'players': [a, c, d]}, max_backups=20)
+    backups.close()
+
+
+def test_restore_replays_deltas_up_to_seq(tmp_path):
+    write_chain(tmp_path)
+    backups = BackupScheduler(tmp_path)
+    assert [b['type'] for b in backups.manifest['backups']] == ['full', 'delta', 'delta', 'delta']
+
+    assert riot_ids(backups.restore(upto_seq=1)) == ['A#VN2', 'B#VN2']
+    assert riot_ids(backups.restore(upto_seq=2)) == ['A#VN2', 'B#VN2', 'C#VN2']
+
+    restored = backups.restore(upto_seq=3)
+    assert riot_ids(restored) == ['A#VN2', 'C#VN2']
+    assert restored['version'] == '1.0'
+    a = next(p for p in restored['players'] if p['riot_id'] == 'A#VN2')
+    assert a['last_match_id'] == 'VN2_9'
+
+    assert riot_ids(backups.restore()) == ['A#VN2', 'C#VN2', 'D#VN2']
+    backups.close()
+
+
+def test_restore_starts_from_latest_full_before_seq(tmp_path):
+    # full_every=1 -> seq 1 full, 2 delta, 3 full, 4 delta
+    write_chain(tmp_path, full_every=1)
+    backups = BackupScheduler(tmp_path)
+    assert [b['type'] for b in backups.manifest['backups']] == ['full', 'delta', 'full', 'delta']
+
+    assert riot_ids(backups.restore(upto_seq=2)) == ['A#VN2', 'B#VN2', 'C#VN2']
+    assert riot_ids(backups.restore(upto_seq=3)) == ['A#VN2', 'C#VN2']
+    assert riot_ids(backups.restore()) == ['A#VN2', 'C#VN2', 'D#VN2']
+    assert BackupScheduler(tmp_path / 'empty').restore() is None
+    backups.close()
+
+
+def test_restore_database_backups(tmp_path):
+    db = Database(str(tmp_path / 'tft_tracker.json'), backup_dir=str(tmp_path / 'backups'),
+                  backup_interval=0)
+    for i in range(3):
+        db.add_player(player(str(i), f'P{i}#VN2'))
+    db.remove_player('1', 'p1#vn2')
+    db.update_setting('2', 'P2#VN2', 'auto_notify', False)
+    db.close()
+
+    backups = BackupScheduler(tmp_path / 'backups')
+    # Mỗi thay đổi 1 backup: seq 3 = sau 3 lần thêm, seq 4 = sau khi xóa P1
+    assert riot_ids(backups.restore(upto_seq=3)) == ['P0#VN2', 'P1#VN2', 'P2#VN2']
+    assert riot_ids(backups.restore(upto_seq=4)) == ['P0#VN2', 'P2#VN2']
+    latest = backups.restore()
+    p2 = next(p for p in latest['players'] if p['riot_id'] == 'P2#VN2')
+    assert p2['settings']['auto_notify'] is False
+    backups.close()
+
+
+def test_restore_command(tmp_path):
+    write_chain(tmp_path / 'backups')
+    output = tmp_path / 'restored.json'
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'backup.py'), str(tmp_path / 'backups'), str(output), '3'],
+        check=True, capture_output=True, cwd=tmp_path
+    )
+    with open(output, encoding='utf-8') as f:
+        assert riot_ids(json.load(f)) == ['A#VN2', 'C#VN2']
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from match_store import MatchStore
+from riot_client import RiotClient
+
+PUUID = 'puuid-player'
+MATCH_ID = 'VN2_1001'
+
+
+def riot_match(match_id, game_datetime, placement):
+    """Payload tft-match-v1 thô (rút gọn): player cần tìm + 1 người chơi khác"""
+    return {
+        'metadata': {'match_id': match_id, 'participants': ['puuid-other', PUUID]},
+        'info': {
+            'game_datetime': game_datetime,
+            'game_length': 1800.5,
+            'participants': [
+                {'puuid': 'puuid-other', 'placement': 1, 'level': 9, 'traits': [], 'units': []},
+                {
+                    'puuid': PUUID,
+                    'placement': placement,
+                    'level': 8,
+                    'traits': [{'name': 'Set9_Ionia', 'tier_current': 2, 'style': 2, 'num_units': 4}],
+                    'units': [{'character_id': 'TFT9_Ahri', 'tier': 2, 'itemNames': []}]
+                }
+            ]
+        }
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    match_store = MatchStore(str(tmp_path / 'matches.db'))
+    yield match_store
+    match_store.close()
+
+
+@pytest.fixture
+def client(store):
+    payloads = {
+        'VN2_1001': riot_match('VN2_1001', 1700000000000, 3),
+        'VN2_1002': riot_match('VN2_1002', 1700003600000, 6)
+    }
+    riot = RiotClient('RGAPI-test', matches=store)
+
+    async def get_account(riot_id, region):
+        return {'puuid': PUUID, 'gameName': 'Player', 'tagLine': 'VN2'}
+
+    async def request(host, method, path, params=None):
+        return payloads[path.rsplit('/', 1)[1]]
+
+    riot.get_account = get_account
+    riot._request = request
+    return riot
+
+
+async def poll(client, store, match_ids):
+    """Giống RiotAPIService.get_tft_match: lấy summary rồi gắn vào tài khoản"""
+    for match_id in match_ids:
+        match = await client.get_match_summary('Player#VN2', 'vn', match_id)
+        store.add_player_match('Player#VN2', 'vn', match_id, match['timestamp'], summary=match)
+
+
+def test_store_keeps_raw_payload_and_player_summary(client, store):
+    asyncio.run(poll(client, store, ['VN2_1001']))
+
+    assert 'metadata' in store.get(MATCH_ID)
+    [summary] = store.recent_matches('player#vn2', 'VN')
+    assert summary['match_id'] == MATCH_ID
+    assert summary['placement'] == 3
+    assert summary['traits'] == [{'name': 'Ionia', 'tier': 2}]
+
+
+def test_raw_riot_payload_through_analyzer(client, store):
+    pytest.importorskip('google.generativeai')
+    from gemini_analyzer import GeminiAnalyzer
+
+    asyncio.run(poll(client, store, ['VN2_1001', 'VN2_1002']))
+    analyzer = GeminiAnalyzer(matches=store)
+    caller_history = [store.recent_matches('Player#VN2', 'vn', 1)[0]]
+
+    history = analyzer._merge_history(caller_history, 'Player#VN2', 'vn', 5)
+    assert [m['match_id'] for m in history] == ['VN2_1002', 'VN2_1001']
+    assert [m['placement'] for m in history] == [6, 3]
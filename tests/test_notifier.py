@@ -0,0 +1,201 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notifier import Notification, NotificationQueue
+
+
+class TransientError(Exception):
+    pass
+
+
+class FakeChannel:
+    """send() giả: ghi lại batch đã gửi, `failures` lần đầu ném lỗi"""
+
+    def __init__(self, failures=0, error=TransientError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+        self.sent = []
+
+    async def send(self, batch):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error('tạm thời lỗi')
+        self.sent.append((batch.channel_id, batch.content, list(batch.embeds)))
+        return f'message-{len(self.sent)}'
+
+
+def notification(channel_id, embed, mention=None):
+    # Embed giả là chuỗi: len(embed) = số ký tự embed
+    return Notification(channel_id, content=mention, embed=embed, label=embed[:8])
+
+
+def make_queue(channel, **kwargs):
+    kwargs.setdefault('workers', 1)
+    kwargs.setdefault('retry_base', 0.01)
+    kwargs.setdefault('batch_window', 0.05)
+    return NotificationQueue(channel.send, **kwargs)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_batch_merges_channel_and_dedupes_mentions():
+    channel = FakeChannel()
+
+    async def scenario():
+        queue = make_queue(channel)
+        queue.start()
+        await queue.submit(notification('1', 'embed-a', '<@1>'))
+        await queue.submit(notification('1', 'embed-b', '<@2> <@1>'))
+        await queue.submit(notification('2', 'embed-c', '<@3>'))
+        await queue.submit(notification('1', 'embed-d'))
+        await queue.stop()
+        return queue
+
+    queue = run(scenario())
+    assert sorted(channel.sent) == [
+        ('1', '<@1> <@2>', ['embed-a', 'embed-b', 'embed-d']),
+        ('2', '<@3>', ['embed-c']),
+    ]
+    assert queue.counters['sent'] == 4
+    assert queue.counters['messages'] == 2
+
+
+def test_batch_size_flushes_immediately():
+    channel = FakeChannel()
+
+    async def scenario():
+        queue = make_queue(channel, batch_size=2, batch_window=60)
+        queue.start()
+        for i in range(5):
+            await queue.submit(notification('1', f'embed-{i}'))
+        assert queue.depth() >= 1
+        await queue.stop()
+
+    run(scenario())
+    assert [embeds for _, _, embeds in channel.sent] == [
+        ['embed-0', 'embed-1'], ['embed-2', 'embed-3'], ['embed-4']
+    ]
+
+
+def test_batch_chars_splits_batch():
+    channel = FakeChannel()
+
+    async def scenario():
+        queue = make_queue(channel, batch_chars=100)
+        queue.start()
+        await queue.submit(notification('1', 'a' * 60))
+        await queue.submit(notification('1', 'b' * 30))
+        # 60 + 30 + 20 > 100: batch đang gom được gửi trước, 'c' mở batch mới
+        await queue.submit(notification('1', 'c' * 20))
+        await queue.stop()
+
+    run(scenario())
+    assert [[e[0] for e in embeds] for _, _, embeds in channel.sent] == [['a', 'b'], ['c']]
+    for _, _, embeds in channel.sent:
+        assert sum(len(e) for e in embeds) <= 100
+
+
+def test_retry_on_retryable_error():
+    channel = FakeChannel(failures=2)
+
+    async def scenario():
+        queue = make_queue(channel, batch_window=0, max_retries=3,
+                           retryable=lambda error: isinstance(error, TransientError))
+        queue.start()
+        await queue.submit(notification('1', 'embed-a'))
+        await queue.stop()
+        return queue
+
+    queue = run(scenario())
+    assert channel.calls == 3
+    assert [embeds for _, _, embeds in channel.sent] == [['embed-a']]
+    assert queue.counters['retried'] == 2
+    assert queue.counters['sent'] == 1
+    assert queue.counters['failed'] == 0
+
+
+def test_retry_uses_retry_after():
+    class RateLimited(Exception):
+        retry_after = 0.01
+
+    channel = FakeChannel(failures=1, error=RateLimited)
+
+    async def scenario():
+        # retry_base lớn: nếu không dùng retry_after thì stop() hết timeout
+        queue = make_queue(channel, batch_window=0, retry_base=60)
+        queue.start()
+        await queue.submit(notification('1', 'embed-a'))
+        await asyncio.sleep(0.1)
+        await queue.stop(timeout=1)
+        return queue
+
+    queue = run(scenario())
+    assert channel.calls == 2
+    assert queue.counters['sent'] == 1
+
+
+def test_no_retry_when_not_retryable():
+    channel = FakeChannel(failures=1)
+
+    async def scenario():
+        queue = make_queue(channel, batch_window=0, retryable=lambda error: False)
+        queue.start()
+        await queue.submit(notification('1', 'embed-a', '<@1>'))
+        await queue.submit(notification('1', 'embed-b', '<@2>'))
+        await queue.stop()
+        return queue
+
+    queue = run(scenario())
+    assert channel.calls == 2
+    assert [embeds for _, _, embeds in channel.sent] == [['embed-b']]
+    assert queue.counters['retried'] == 0
+    assert queue.counters['failed'] == 1
+    assert queue.counters['sent'] == 1
+
+
+def test_gives_up_after_max_retries():
+    channel = FakeChannel(failures=10)
+
+    async def scenario():
+        queue = make_queue(channel, batch_window=0, max_retries=2)
+        queue.start()
+        await queue.submit(notification('1', 'embed-a'))
+        await queue.stop()
+        return queue
+
+    queue = run(scenario())
+    assert channel.calls == 3
+    assert channel.sent == []
+    assert queue.counters['retried'] == 2
+    assert queue.counters['failed'] == 1
+
+
+def test_stop_flushes_pending_batches():
+    channel = FakeChannel()
+
+    async def scenario():
+        # batch_window dài: chỉ stop() mới đẩy các batch đang gom đi
+        queue = make_queue(channel, batch_window=60)
+        queue.start()
+        await queue.submit(notification('1', 'embed-a', '<@1>'))
+        await queue.submit(notification('1', 'embed-b', '<@1>'))
+        await queue.submit(notification('2', 'embed-c'))
+        assert channel.sent == []
+        assert queue.depth() == 3
+        await queue.stop(timeout=1)
+        return queue
+
+    queue = run(scenario())
+    assert sorted(channel.sent) == [
+        ('1', '<@1>', ['embed-a', 'embed-b']),
+        ('2', None, ['embed-c']),
+    ]
+    assert queue.depth() == 0
+    assert not queue.running
+    assert queue.stats()['workers'] == 0
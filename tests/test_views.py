@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from views import ReadOnlyDict, freeze
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(
+        str(tmp_path / 'tft_tracker.json'),
+        backup_dir=str(tmp_path / 'backups'),
+        backup_interval=3600
+    )
+    database.add_player({
+        'discord_id': '1',
+        'discord_name': 'tester',
+        'riot_id': 'Player#VN2',
+        'region': 'vn',
+        'channel_id': '10',
+        'settings': {'auto_notify': True}
+    })
+    yield database
+    database.journal.close()
+
+
+def test_getters_return_read_only_views(db):
+    players = db.get_all_players()
+    player = players[0]
+
+    assert isinstance(player, ReadOnlyDict)
+    assert player['riot_id'] == 'Player#VN2'
+    for name in ('set', 'set_setting', 'mark_notified', 'update'):
+        assert not hasattr(player, name)
+    with pytest.raises(TypeError):
+        player['riot_id'] = 'HACK'
+    with pytest.raises(TypeError):
+        player['settings']['auto_notify'] = False
+
+    found = db.get_player_by_riot_id('player#vn2')
+    assert not hasattr(found, 'set')
+    assert all(not hasattr(p, 'set') for p in db.get_players_by_discord_id('1'))
+
+    assert db.data['players'][0]['riot_id'] == 'Player#VN2'
+
+
+def test_copies_are_plain_dicts(db):
+    players = db.get_all_players().to_list()
+    assert type(players[0]) is dict
+    players[0]['riot_id'] = 'HACK'
+    players[0]['settings']['auto_notify'] = False
+
+    player = db.get_player_by_riot_id('Player#VN2').to_dict()
+    assert type(player) is dict
+    assert player['riot_id'] == 'Player#VN2'
+    assert player['settings'] == {'auto_notify': True}
+
+
+def test_freeze_does_not_wrap_twice():
+    view = freeze({'a': [1, {'b': 2}]})
+    assert freeze(view) is view
+    assert view['a'][1]['b'] == 2
+    assert view.to_dict() == {'a': [1, {'b': 2}]}
@@ -1,23 +1,24 @@
-import aiohttp
 import asyncio
 from datetime import datetime, timedelta
 import random
 
+from http_client import http_client
+from response_cache import ResponseCache, cache_key
+
 class TFTService:
     """Dịch vụ lấy dữ liệu TFT"""
     
-    def __init__(self):
-        self.session = None
-        self.cache = {}
+    def __init__(self, cache=None, matches=None):
+        self.cache = cache if cache is not None else ResponseCache()
+        # MatchStore: chi tiết match đã kết thúc lưu trên đĩa, chỉ tải 1 lần
+        self.matches = matches
     
     async def get_session(self):
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-        return self.session
+        """Lấy aiohttp session dùng chung (http_client)"""
+        return http_client.get_session()
     
     async def close_session(self):
-        if self.session and not self.session.closed:
-            await self.session.close()
+        """Session dùng chung được đóng bởi http_client.close(), không đóng ở đây"""
     
     async def get_player_overview(self, riot_id, region='vn'):
         """
@@ -32,6 +33,12 @@ class TFTService:
             'last_played': str
         }
         """
+        return await self.cache.get_or_fetch(
+            ('overview',) + cache_key(riot_id, region),
+            lambda: self._get_player_overview(riot_id, region)
+        )
+    
+    async def _get_player_overview(self, riot_id, region):
         # Trong thực tế, bạn sẽ gọi API thực
         # Đây là mock data cho demo
         
@@ -63,73 +70,112 @@ class TFTService:
             'source': 'mock_data'
         }
     
-    async def get_match_history(self, riot_id, region='vn', limit=5):
+    async def get_match_ids(self, riot_id, region='vn', limit=5):
+        """Danh sách match_id gần nhất (mới nhất trước), không kèm chi tiết"""
+        return await self.cache.get_or_fetch(
+            ('ids', limit) + cache_key(riot_id, region),
+            lambda: self._get_match_ids(riot_id, region, limit)
+        )
+    
+    async def _get_match_ids(self, riot_id, region, limit):
+        # Mock data - trong thực tế sẽ gọi API thật
+        await asyncio.sleep(0.1)
+        now = int(datetime.now().timestamp())
+        return [f"{riot_id.replace('#', '_')}_{now - i}" for i in range(limit)]
+    
+    async def get_match_history(self, riot_id, region='vn', limit=5, since=None):
         """
         Lấy lịch sử match
+        
+        Lấy match_id trước, chỉ tải chi tiết các match mới hơn `since`
+        (match_id đã thấy gần nhất).
         Returns: list of match data
         """
+        match_ids = await self.get_match_ids(riot_id, region, limit)
+        if since in match_ids:
+            match_ids = match_ids[:match_ids.index(since)]
+        matches = await asyncio.gather(
+            *(self.get_match_summary(riot_id, match_id, i) for i, match_id in enumerate(match_ids))
+        )
+        return [match for match in matches if match]
+    
+    async def get_match_summary(self, riot_id, match_id, index=0):
+        """Chi tiết 1 match trong lịch sử (match đã kết thúc không đổi nên cache lâu)"""
+        return await self.cache.get_or_fetch(
+            ('summary', match_id),
+            lambda: self._get_match_summary(riot_id, match_id, index),
+            ttl=24 * 3600
+        )
+    
+    async def _get_match_summary(self, riot_id, match_id, index):
         # Mock data - trong thực tế sẽ gọi API thật
         
-        await asyncio.sleep(0.3)
+        await asyncio.sleep(0.2)
         
-        matches = []
-        seed = sum(ord(c) for c in riot_id)
-        random.seed(seed)
+        rng = random.Random(match_id)
+        placement = rng.randint(1, 8)
+        level = rng.randint(7, 10)
         
-        for i in range(limit):
-            placement = random.randint(1, 8)
-            level = random.randint(7, 10)
-            
-            # Tạo traits ngẫu nhiên
-            all_traits = ['Darkin', 'Challenger', 'Juggernaut', 'Shurima', 
-                         'Ionia', 'Noxus', 'Sorcerer', 'Multicaster',
-                         'Demacia', 'Freljord', 'Piltover', 'Zaun',
-                         'Void', 'Yordle', 'Strategist', 'Gunner']
-            
-            num_traits = random.randint(3, 6)
-            selected_traits = random.sample(all_traits, num_traits)
-            
-            traits = []
-            for trait in selected_traits:
-                traits.append({
-                    'name': trait,
-                    'tier': random.randint(1, 3),
-                    'num_units': random.randint(2, 8)
-                })
-            
-            # Tạo units ngẫu nhiên
-            all_units = ['Aatrox', 'Kaisa', 'Warwick', 'JarvanIV', 'Nasus',
-                        'Azir', 'Katarina', 'Darius', 'Swain', 'Jayce',
-                        'Heimerdinger', 'Zeri', 'Jinx', 'Vi', 'Ekko']
-            
-            num_units = random.randint(8, 12)
-            selected_units = random.sample(all_units, min(num_units, len(all_units)))
-            
-            units = []
-            for unit in selected_units:
-                units.append({
-                    'character_id': unit,
-                    'tier': random.randint(1, 3),
-                    'items': random.sample(['BF Sword', 'Recurve Bow', 'Chain Vest'], 
-                                          random.randint(0, 3))
-                })
-            
-            matches.append({
-                'match_id': f"{riot_id.replace('#', '_')}_{int(datetime.now().timestamp()) - i}",
-                'placement': placement,
-                'level': level,
-                'traits': traits,
-                'units': units,
-                'timestamp': (datetime.now() - timedelta(hours=i*3)).isoformat(),
-                'game_duration': random.randint(1200, 1800),
-                'players_remaining': 8 if i == 0 else random.randint(1, 8),
-                'source': 'mock_data'
+        # Tạo traits ngẫu nhiên
+        all_traits = ['Darkin', 'Challenger', 'Juggernaut', 'Shurima', 
+                     'Ionia', 'Noxus', 'Sorcerer', 'Multicaster',
+                     'Demacia', 'Freljord', 'Piltover', 'Zaun',
+                     'Void', 'Yordle', 'Strategist', 'Gunner']
+        
+        num_traits = rng.randint(3, 6)
+        selected_traits = rng.sample(all_traits, num_traits)
+        
+        traits = []
+        for trait in selected_traits:
+            traits.append({
+                'name': trait,
+                'tier': rng.randint(1, 3),
+                'num_units': rng.randint(2, 8)
+            })
+        
+        # Tạo units ngẫu nhiên
+        all_units = ['Aatrox', 'Kaisa', 'Warwick', 'JarvanIV', 'Nasus',
+                    'Azir', 'Katarina', 'Darius', 'Swain', 'Jayce',
+                    'Heimerdinger', 'Zeri', 'Jinx', 'Vi', 'Ekko']
+        
+        num_units = rng.randint(8, 12)
+        selected_units = rng.sample(all_units, min(num_units, len(all_units)))
+        
+        units = []
+        for unit in selected_units:
+            units.append({
+                'character_id': unit,
+                'tier': rng.randint(1, 3),
+                'items': rng.sample(['BF Sword', 'Recurve Bow', 'Chain Vest'], 
+                                    rng.randint(0, 3))
             })
         
-        return matches
+        return {
+            'match_id': match_id,
+            'placement': placement,
+            'level': level,
+            'traits': traits,
+            'units': units,
+            'timestamp': datetime.fromtimestamp(int(match_id.rsplit('_', 1)[1])).isoformat(),
+            'game_duration': rng.randint(1200, 1800),
+            'players_remaining': 8 if index == 0 else rng.randint(1, 8),
+            'source': 'mock_data'
+        }
     
     async def get_match_details(self, match_id):
-        """Lấy chi tiết match (mock)"""
+        """Lấy chi tiết match (mock), match đã kết thúc không đổi nên cache lâu / lưu vào match store"""
+        if self.matches is not None:
+            # Khóa riêng: match_id trần trong kho là payload tft-match-v1 của RiotClient
+            return await self.matches.get_or_fetch(
+                f'details:{match_id}', lambda: self._get_match_details(match_id)
+            )
+        return await self.cache.get_or_fetch(
+            ('match', match_id),
+            lambda: self._get_match_details(match_id),
+            ttl=24 * 3600
+        )
+    
+    async def _get_match_details(self, match_id):
         await asyncio.sleep(0.2)
         
         return {
@@ -0,0 +1,108 @@
+import copy
+from collections.abc import Mapping, Sequence
+
+
+class ReadOnlyDict(Mapping):
+    """
+    View chỉ-đọc trên dict / Mapping (vd: Player), không copy
+
+    dict/list lồng nhau cũng được bọc; các hàm ghi của bản ghi gốc
+    (set, set_setting, mark_notified, ...) không lộ ra ngoài view.
+    """
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, key):
+        return freeze(self._data[key])
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __eq__(self, other):
+        if isinstance(other, ReadOnlyDict):
+            other = other._data
+        return self._data == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'ReadOnlyDict({self._data!r})'
+
+    def to_dict(self):
+        """Bản copy có thể sửa (deep copy, luôn là dict thường)"""
+        return thaw(self._data)
+
+
+class ReadOnlyList(Sequence):
+    """View chỉ-đọc trên list, không copy"""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadOnlyList(self._data[index])
+        return freeze(self._data[index])
+
+    def __iter__(self):
+        for item in self._data:
+            yield freeze(item)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, ReadOnlyList):
+            other = other._data
+        return self._data == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'ReadOnlyList({self._data!r})'
+
+    def to_list(self):
+        """Bản copy có thể sửa (deep copy, phần tử Mapping thành dict thường)"""
+        return thaw(self._data)
+
+
+def freeze(value):
+    """Bọc dict/Mapping/list thành view chỉ-đọc, giá trị khác giữ nguyên"""
+    if isinstance(value, (ReadOnlyDict, ReadOnlyList)):
+        return value
+    if isinstance(value, Mapping):
+        return ReadOnlyDict(value)
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    return value
+
+
+def thaw(value):
+    """Bản copy sửa được của view / bản ghi: Mapping -> dict, list -> list (đệ quy)"""
+    if isinstance(value, (ReadOnlyDict, ReadOnlyList)):
+        value = value._data
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return copy.deepcopy(value)
+
+
+def json_default(value):
+    """Hook `default` cho json.dumps: serialize view / bản ghi về dict, list"""
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if hasattr(value, 'to_list'):
+        return value.to_list()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')